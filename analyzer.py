@@ -1,16 +1,35 @@
 # analyzer.py
 import asyncio
-import aiohttp
+import codecs
 import datetime
+import inspect
+import logging
+import multiprocessing
+import os
+import pickle
+import random
 import re
-import requests
-import OpenDartReader
-import pandas as pd
-from typing import List, Dict, Optional, Tuple
-from urllib.parse import quote
-from bs4 import BeautifulSoup
+import threading
+import time
+import zlib
+from typing import TYPE_CHECKING, Callable, List, Dict, Mapping, Optional, Tuple
+from urllib.parse import quote, urlsplit
+from lxml import etree
 from difflib import SequenceMatcher
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import metrics
+from cache import DEFAULT_CACHE_DIR, ContentCache, NewsStateStore, get_content_cache, get_news_state
+
+# pandas / OpenDartReader / BeautifulSoup / aiohttp는 처음 사용할 때 import
+# (UI·DB만 쓰는 프로세스와 파싱 워커 프로세스의 기동 시간 단축 — benchmark.py importtime 으로 확인)
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger('stock_analyzer.analyzer')
+
 
 class Config:
     def __init__(self, CLIENT_ID: str, CLIENT_SECRET: str, DART_API_KEY: str, OPENAI_API_KEY: str):
@@ -27,8 +46,62 @@ class Config:
         self.MIN_BODY_LENGTH = 100
         self.MAX_OTHER_COMPANIES = 5
         self.SIMILARITY_THRESHOLD = 0.6
+        # 제목 근접 중복: 하루 기사 수가 DEDUP_EXACT_BELOW 이상이면 MinHash/LSH 후보만 비교
+        self.DEDUP_EXACT_BELOW = 40
+        self.DEDUP_NUM_PERM = 16
+        self.DEDUP_BANDS = 16
+        self.DEDUP_STOP_DF = 0.5
         self.BODY_HEAD_CHECK = 2000
         
+        # 네이버 검색 API: 키워드 동시 검색 수 / 초당 요청 한도 / 엔드포인트 (벤치마크는 로컬 재생 서버로 교체)
+        self.NAVER_CONCURRENCY = 4
+        self.NAVER_RPS = 10
+        self.NAVER_SEARCH_URL = "https://openapi.naver.com/v1/search/news.json"
+        
+        # 다종목 동시 분석: 동시 종목 수 / DART / OpenAI 동시 요청 수
+        self.BATCH_CONCURRENCY = 10
+        self.DART_CONCURRENCY = 2
+        self.OPENAI_CONCURRENCY = 8
+        
+        # 작업 큐 워커 (worker.py) — 대기열 확인 간격 / 생존 신호 간격 / 응답 없는 작업 재등록 기준 / 최대 시도
+        self.JOB_POLL_INTERVAL = 2.0
+        self.JOB_HEARTBEAT_INTERVAL = 15.0
+        self.JOB_STALE_AFTER = 120.0
+        self.JOB_MAX_ATTEMPTS = 3
+        
+        # 기사 다운로드 — 호스트별 동시 연결, keep-alive, 재시도 간격, 차단기
+        self.HOST_CONCURRENCY = 3
+        self.MAX_CONNECTIONS = 50
+        self.CONNECT_TIMEOUT = 5
+        self.READ_TIMEOUT = 10
+        self.KEEPALIVE_TIMEOUT = 30
+        self.DNS_CACHE_TTL = 300
+        self.BACKOFF_BASE = 0.5
+        self.BACKOFF_MAX = 8.0
+        self.CIRCUIT_FAILURES = 3  # 연속 타임아웃/연결 실패 횟수 → 해당 호스트 건너뜀
+        self.CIRCUIT_COOLDOWN = 300.0  # 차단 후 이 시간(초)이 지나면 요청 1건으로 재시험 (성공 시 해제)
+        self.HOST_STATE_MAX = 2048  # 호스트별 슬롯/실패 기록 최대 개수 (오래 쓰지 않은 것부터 정리)
+        
+        # 기사 페이지 다운로드 상한 / 본문 컨테이너 발견 후 더 읽을 바이트
+        self.FETCH_MAX_BYTES = 3 * 1024 * 1024
+        self.FETCH_TAIL_BYTES = 256 * 1024
+        
+        # 기사 HTML 파싱/정제/필터 실행 위치: 'process' | 'thread' | 'inline'(이벤트 루프)
+        self.PARSE_EXECUTOR = 'process'
+        self.PARSE_WORKERS = 0  # 0이면 CPU 코어 수
+        
+        # 로컬 캐시 (기사 본문 / DART 하위문서 / GPT 응답)
+        self.CACHE_DIR = DEFAULT_CACHE_DIR
+        self.USE_CONTENT_CACHE = True
+        self.CONTENT_CACHE_TTL = 7 * 24 * 3600
+        self.CONTENT_CACHE_MAX_MB = 512
+        # 증분 뉴스 수집 — 지난 수집 이후 기사만 검색/다운로드하고 이전에 통과한 기사와 합침
+        # (이전 기사는 현재 필터로 다시 검사하지만, 필터에서 탈락했던 기사는 다시 보지 않으므로 기본은 끔)
+        self.INCREMENTAL_NEWS = False
+        self.INCREMENTAL_OVERLAP_HOURS = 24  # 늦게 색인되는 기사 대비, 기준 시각보다 조금 더 검색
+        self.USE_GPT_CACHE = True
+        self.GPT_CACHE_TTL = 90 * 24 * 3600
+        
         self.KEYWORDS = [
             "매출", "수출", "계약", "수주", "출시", "허가", "양산", "인수", "진출", "신사업", "투자", "공급"
         ]
@@ -49,31 +122,82 @@ class Config:
         self.BODY_BLACKLIST = self.TITLE_BLACKLIST.copy()
 
 
+# 종목명 뒤에 허용되는 문자 (조사/구두점) — 그 외 한글/영숫자가 이어지면 다른 단어로 간주
+NAME_PARTICLES = frozenset(" 은는이가을를의와과로서에.,\"'\n\r")
+
+
+def _is_name_boundary(ch: str) -> bool:
+    if ch in NAME_PARTICLES:
+        return True
+    return not ('가' <= ch <= '힣' or 'a' <= ch <= 'z' or 'A' <= ch <= 'Z' or '0' <= ch <= '9')
+
+
 class RegexCache:
+    """종목명 다중 매칭 (Aho-Corasick 오토마톤, 텍스트 1회 스캔)
+
+    기존 종목별 정규식 `종목명(?=[조사]|$|[^가-힣a-zA-Z0-9])` 과 동일한 판정을 한다.
+    """
     def __init__(self, companies: List[str]):
         self.companies = companies
-        self.patterns = {}
-        for company in companies:
-            pattern = f"{re.escape(company)}(?=[ 은는이가을를의와과로서에.,\"'\n\r]|$|[^가-힣a-zA-Z0-9])"
-            self.patterns[company] = re.compile(pattern)
-    
-    def count_matches(self, text: str, exclude: str = None) -> int:
-        count = 0
-        for company, pattern in self.patterns.items():
-            if company == exclude:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+
+        for company in dict.fromkeys(companies):
+            if not company:
                 continue
-            if pattern.search(text):
-                count += 1
-                if count >= 10:
-                    break
-        return count
-    
-    def find_any(self, text: str, exclude: str = None) -> bool:
-        for company, pattern in self.patterns.items():
-            if company == exclude:
+            state = 0
+            for ch in company:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(company)
+
+        # BFS로 실패 링크 구성, 출력 목록은 실패 링크를 따라 병합
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str, exclude: str = None):
+        """경계 조건을 만족하는 종목명을 등장 순서대로 반환 (중복 포함)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(text)
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
                 continue
-            if pattern.search(text):
-                return True
+            if i + 1 < n and not _is_name_boundary(text[i + 1]):
+                continue
+            for company in out[state]:
+                if company != exclude:
+                    yield company
+
+    def count_matches(self, text: str, exclude: str = None) -> int:
+        found = set()
+        for company in self.iter_matches(text, exclude):
+            found.add(company)
+            if len(found) >= 10:
+                break
+        return len(found)
+
+    def find_any(self, text: str, exclude: str = None) -> bool:
+        for _ in self.iter_matches(text, exclude):
+            return True
         return False
 
 
@@ -88,7 +212,7 @@ def parse_date(date_str: str) -> Optional[datetime.datetime]:
     try:
         dt = datetime.datetime.strptime(date_str, "%a, %d %b %Y %H:%M:%S %z")
         return dt.replace(tzinfo=None)
-    except:
+    except (TypeError, ValueError):
         return None
 
 
@@ -96,202 +220,823 @@ def similarity(s1: str, s2: str) -> float:
     return SequenceMatcher(None, s1, s2).ratio()
 
 
+EMAIL_PATTERN = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+
+# 본문 하단 UI/저작권 문구 — 처음 등장하는 위치에서 본문을 자름
+CUTOFF_PATTERNS = [
+    r'관련\s*기사', r'다른\s*기사', r'추천\s*기사', r'인기\s*기사',
+    r'더\s*보기', r'See more', r'Tag\s*#', r'#바이오',
+    r'저작권자', r'무단\s*전재', r'재배포\s*금지',
+    r'Copyright', r'All rights reserved', r'개인정보\s*보호',
+    r'구독\s*신청', r'뉴스\s*스탠드', r'좋아요\s*슬퍼요',
+    r'기사\s*제보', r'댓글\s*작성', r'많이\s*본\s*뉴스',
+    r'지금\s*뜨는', r'공유하기', r'URL\s*복사',
+    r'글자\s*크기', r'기사\s*듣기', r'인쇄하기', r'읽기모드',
+]
+
+# 이 패턴이 있는 줄은 제거 (기자/사진 크레딧, 연락처 등)
+NOISE_PATTERNS = [
+    r'기자\s*=', r'특파원\s*=', r'©|ⓒ',
+    r'사진\s*=', r'출처\s*:', r'자료\s*:',
+    r'\d{2,4}-\d{2,4}-\d{4}', r'FAX|Fax|fax',
+]
+
+_EMAIL_RE = re.compile(EMAIL_PATTERN)
+_EMAIL_LOCAL_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-')
+
+# 맨 앞 문자 클래스(lookahead)로 후보 위치를 먼저 거름 — 패턴 추가 시 첫 글자도 함께 추가할 것
+_CUTOFF_RE = re.compile(
+    '(?=[관다추인더ST#저무재CA개구뉴좋기댓많지공U글읽])(?:' + '|'.join(f'(?:{p})' for p in CUTOFF_PATTERNS) + ')',
+    re.IGNORECASE)
+_CUTOFF_RES = [re.compile(p, re.IGNORECASE) for p in CUTOFF_PATTERNS]
+# 줄 단위 검사와 같도록 \s 는 개행을 제외 → 본문 전체를 한 번에 스캔해도 줄을 넘는 매치 없음
+_NOISE_RE = re.compile(
+    '(?=[기특©ⓒ사출자\\dFf])(?:' + '|'.join(f'(?:{p})' for p in NOISE_PATTERNS).replace(r'\s', r'[^\S\n]') + ')')
+
+
+def _find_email(text: str) -> int:
+    """첫 이메일 주소 시작 위치 (없으면 -1) — '@' 주변만 정규식 검사"""
+    at = text.find('@')
+    while at != -1:
+        start = at
+        while start > 0 and text[start - 1] in _EMAIL_LOCAL_CHARS:
+            start -= 1
+        if start < at and _EMAIL_RE.match(text, start):
+            return start
+        at = text.find('@', at + 1)
+    return -1
+
+
+def _noise_lines(text: str) -> set:
+    """잡음 패턴이 있는 줄 번호"""
+    noisy = set()
+    pos = line_no = 0
+    while True:
+        match = _NOISE_RE.search(text, pos)
+        if not match:
+            return noisy
+        line_no += text.count('\n', pos, match.start())
+        noisy.add(line_no)
+        # 같은 줄의 나머지는 볼 필요 없음
+        pos = text.find('\n', match.end()) + 1
+        if not pos:
+            return noisy
+        line_no += 1
+
+
+def _apply_cutoff(text: str) -> str:
+    """cutoff 패턴 중 가장 앞선 위치에서 자름 (결합 정규식 1회 스캔)
+
+    기존 구현은 패턴을 순서대로 적용하며 매번 strip() 했기 때문에, 드물게
+    (앞쪽 공백 때문에 검색 시작점이 밀리거나 매치끼리 겹칠 때) 결과가 달라질 수 있음.
+    그 경우만 패턴별 순차 적용으로 처리해 결과를 동일하게 유지.
+    """
+    # cutoff는 본문 후반부(뒤쪽 70%)에서만 적용 — 상단 UI 요소에 걸리는 것 방지
+    cutoff_start = len(text) * 3 // 10
+    first = _CUTOFF_RE.search(text, cutoff_start)
+    if not first:
+        return text
+    
+    lead = len(text) - len(text.lstrip())
+    following = _CUTOFF_RE.search(text, first.start() + 1)
+    if first.start() >= cutoff_start + lead and (following is None or following.start() >= first.end()):
+        return text[:first.start()].strip()
+    
+    for pattern in _CUTOFF_RES:
+        match = pattern.search(text, cutoff_start)
+        if match:
+            text = text[:match.start()].strip()
+    return text
+
+
 def clean_body_final(text: str) -> str:
     if not text:
         return ""
     
-    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-    email_match = re.search(email_pattern, text)
-    if email_match:
-        text = text[:email_match.start()].strip()
-    
-    cutoff_patterns = [
-        r'관련\s*기사', r'다른\s*기사', r'추천\s*기사', r'인기\s*기사',
-        r'더\s*보기', r'See more', r'Tag\s*#', r'#바이오',
-        r'저작권자', r'무단\s*전재', r'재배포\s*금지',
-        r'Copyright', r'All rights reserved', r'개인정보\s*보호',
-        r'구독\s*신청', r'뉴스\s*스탠드', r'좋아요\s*슬퍼요',
-        r'기사\s*제보', r'댓글\s*작성', r'많이\s*본\s*뉴스',
-        r'지금\s*뜨는', r'공유하기', r'URL\s*복사',
-        r'글자\s*크기', r'기사\s*듣기', r'인쇄하기', r'읽기모드',
-    ]
+    email_start = _find_email(text)
+    if email_start != -1:
+        text = text[:email_start].strip()
     
-    # cutoff는 본문 후반부(뒤쪽 70%)에서만 적용 — 상단 UI 요소에 걸리는 것 방지
-    cutoff_start = len(text) * 3 // 10
-    for pattern in cutoff_patterns:
-        match = re.search(pattern, text[cutoff_start:], re.IGNORECASE)
-        if match:
-            text = text[:cutoff_start + match.start()].strip()
+    text = _apply_cutoff(text)
     
-    lines = text.split('\n')
+    noisy = _noise_lines(text)
     clean_lines = []
-    
-    noise_patterns = [
-        r'기자\s*=', r'특파원\s*=', r'©|ⓒ',
-        r'사진\s*=', r'출처\s*:', r'자료\s*:',
-        r'\d{2,4}-\d{2,4}-\d{4}', r'FAX|Fax|fax',
-    ]
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
+    for i, line in enumerate(text.split('\n')):
+        if i in noisy:
             continue
+        line = line.strip()
         if len(line) < 15:
             continue
-        if any(re.search(p, line) for p in noise_patterns):
-            continue
         clean_lines.append(line)
     
-    text = '\n'.join(clean_lines)
-    text = re.sub(r'\n{2,}', '\n', text)
-    
-    return text.strip()
+    # 빈 줄은 이미 제외됐으므로 연속 개행 정리 불필요
+    return '\n'.join(clean_lines)
+
+
+# 한국어 페이지 인코딩 별칭 — euc-kr 선언 페이지도 실제로는 cp949 확장 문자를 쓰는 경우가 많음
+CHARSET_ALIASES = {
+    'euc-kr': 'cp949', 'euc_kr': 'cp949', 'euckr': 'cp949', 'ks_c_5601-1987': 'cp949',
+    'ksc5601': 'cp949', 'x-windows-949': 'cp949', 'windows-949': 'cp949', 'ms949': 'cp949',
+}
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+LOOSE_CHARSETS = ('iso-8859-1', 'latin-1', 'latin1', 'windows-1252', 'us-ascii', 'ascii')
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+# 본문 추출/정제 로직(parse_article_html, clean_body_final, doc_section)을 바꾸면 올릴 것
+# — 본문 캐시 키에 포함되어 이전 로직으로 추출한 결과는 사용되지 않음
+PARSER_VERSION = "3"
+
+
+def sniff_charset(head: bytes) -> Optional[str]:
+    """<meta charset> / <meta http-equiv=Content-Type content="...charset=..."> 에서 인코딩 추출"""
+    match = _META_CHARSET_RE.search(head)
+    return match.group(1).decode('ascii') if match else None
+
+
+def decode_html(content: bytes, charset: Optional[str] = None, truncated: bool = False) -> str:
+    """선언된 인코딩(헤더 → meta)으로 한 번만 디코딩, 틀린 선언이면 utf-8 → cp949 순으로 대체
+
+    truncated=True면 끝에 잘린 멀티바이트 문자는 버림
+    """
+    charset = charset or sniff_charset(content[:4096])
+    candidates = [CHARSET_ALIASES.get(charset.lower(), charset)] if charset else []
+    if charset and charset.lower() in LOOSE_CHARSETS:
+        # 서버 기본값으로 붙는 경우가 많아 신뢰하지 않음 — 모든 바이트가 디코딩되므로 마지막에 시도
+        candidates = ['utf-8', 'cp949'] + candidates
+    candidates += [c for c in ('utf-8', 'cp949') if c not in candidates]
+    for enc in candidates:
+        try:
+            return codecs.getincrementaldecoder(enc)().decode(content, final=not truncated)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return content.decode('cp949', errors='ignore')
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """지수 백오프 + full jitter — 동시에 실패한 요청들이 같은 시각에 재시도하지 않도록"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
 
 
 class HTTPClient:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, cache: Optional[ContentCache] = None):
         self.config = config
         self.session = None
+        if cache is None and config.USE_CONTENT_CACHE:
+            cache = get_content_cache(config.CACHE_DIR, config.CONTENT_CACHE_TTL,
+                                      config.CONTENT_CACHE_MAX_MB * 1024 * 1024)
+        self.cache = cache
+        # 호스트 → [세마포어, 사용 중인 요청 수] (LRU — 사용 중이 아닌 것만 정리)
+        self._host_slots: 'OrderedDict[str, list]' = OrderedDict()
+        # 호스트 → 연속 실패 수 / 차단 시작 시각 (time.monotonic)
+        self._host_failures: 'OrderedDict[str, int]' = OrderedDict()
+        self._circuit_opened: Dict[str, float] = {}
+    
+    @property
+    def skipped_hosts(self) -> set:
+        """현재 차단 중인 호스트"""
+        return set(self._circuit_opened)
     
     async def __aenter__(self):
-        timeout = aiohttp.ClientTimeout(total=self.config.REQUEST_TIMEOUT)
+        import aiohttp
+        c = self.config
+        timeout = aiohttp.ClientTimeout(total=c.REQUEST_TIMEOUT, sock_connect=c.CONNECT_TIMEOUT,
+                                        sock_read=c.READ_TIMEOUT)
+        connector = aiohttp.TCPConnector(limit=c.MAX_CONNECTIONS, limit_per_host=c.HOST_CONCURRENCY,
+                                         ttl_dns_cache=c.DNS_CACHE_TTL, keepalive_timeout=c.KEEPALIVE_TIMEOUT)
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
-        self.session = aiohttp.ClientSession(headers=headers, timeout=timeout)
+        self.session = aiohttp.ClientSession(headers=headers, timeout=timeout, connector=connector)
         return self
     
     async def __aexit__(self, *args):
         if self.session:
             await self.session.close()
     
-    async def fetch(self, url: str) -> Tuple[int, str]:
+    @asynccontextmanager
+    async def slot(self, url: str, semaphore: asyncio.Semaphore = None):
+        """호스트별 슬롯 → 전체 슬롯 순으로 획득
+
+        호스트 슬롯을 먼저 잡아야 한 매체 링크가 몰려도 전체 슬롯을 모두 차지한 채 대기하지 않음
+        """
+        host = urlsplit(url).hostname or ''
+        entry = self._host_slots.get(host)
+        if entry is None:
+            entry = self._host_slots[host] = [asyncio.Semaphore(self.config.HOST_CONCURRENCY), 0]
+            self._prune_host_slots()
+        else:
+            self._host_slots.move_to_end(host)
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                if semaphore is None:
+                    yield
+                else:
+                    async with semaphore:
+                        yield
+        finally:
+            entry[1] -= 1
+    
+    def _prune_host_slots(self):
+        excess = len(self._host_slots) - self.config.HOST_STATE_MAX
+        if excess <= 0:
+            return
+        idle = [h for h, (_, users) in self._host_slots.items() if users == 0][:excess]
+        for h in idle:
+            del self._host_slots[h]
+    
+    def _circuit_allows(self, host: str) -> bool:
+        """차단 중이면 False — 대기 시간이 지났으면 이번 요청 1건만 통과 (반열림: 실패 1회면 다시 차단)"""
+        opened = self._circuit_opened.get(host)
+        if opened is None:
+            return True
+        now = time.monotonic()
+        if now - opened < self.config.CIRCUIT_COOLDOWN:
+            return False
+        self._circuit_opened[host] = now  # 시험 요청이 끝나기 전 다른 요청은 계속 건너뜀
+        self._host_failures[host] = self.config.CIRCUIT_FAILURES - 1
+        metrics.inc('http_circuit_probe_total')
+        return True
+    
+    def _record_success(self, host: str):
+        self._host_failures.pop(host, None)
+        if self._circuit_opened.pop(host, None) is not None:
+            logger.info("%s 재시험 성공 — 요청 재개", host)
+    
+    def _record_failure(self, host: str):
+        failures = self._host_failures.pop(host, 0) + 1
+        self._host_failures[host] = failures  # 최근 실패한 호스트가 뒤로
+        if len(self._host_failures) > self.config.HOST_STATE_MAX:
+            # 차단 중인 호스트의 기록은 남김 (반열림 판정에 필요)
+            stale = [h for h in self._host_failures if h not in self._circuit_opened]
+            for h in stale[:len(self._host_failures) - self.config.HOST_STATE_MAX]:
+                del self._host_failures[h]
+        if failures >= self.config.CIRCUIT_FAILURES:
+            reopened = host in self._circuit_opened
+            self._circuit_opened[host] = time.monotonic()
+            if not reopened:
+                metrics.inc('http_circuit_open_total')
+                logger.warning("연속 실패 %d회 — %.0f초 동안 %s 요청 중단",
+                               failures, self.config.CIRCUIT_COOLDOWN, host)
+    
+    async def fetch_with_headers(self, url: str, headers: Dict[str, str] = None, max_bytes: int = None,
+                                 stop_markers: Tuple[bytes, ...] = (), html_only: bool = False
+                                 ) -> Tuple[int, str, Mapping[str, str]]:
+        """(status, text, 응답 헤더 — 대소문자 구분 없이 조회) — 조건부 요청 헤더 전달용
+
+        응답은 스트리밍으로 읽음:
+        - max_bytes: 이 크기까지만 읽고 중단
+        - stop_markers: 본문 컨테이너 표식이 보이면 FETCH_TAIL_BYTES만 더 읽고 중단
+        - html_only: Content-Type이 HTML이 아니면 본문을 읽지 않고 빈 문자열
+        """
+        with metrics.timer('http_fetch'):
+            return await self._fetch_with_retries(url, headers, max_bytes, stop_markers, html_only)
+
+    async def _fetch_with_retries(self, url: str, headers: Optional[Dict[str, str]], max_bytes: Optional[int],
+                                  stop_markers: Tuple[bytes, ...], html_only: bool) -> Tuple[int, str, Mapping[str, str]]:
+        import aiohttp
+        host = urlsplit(url).hostname or ''
         for attempt in range(self.config.RETRY_COUNT):
+            if not self._circuit_allows(host):
+                metrics.inc('http_skipped_total', reason='circuit_open')
+                break
             try:
-                async with self.session.get(url) as resp:
-                    content = await resp.read()
-                    try:
-                        text = content.decode('utf-8')
-                    except:
-                        try:
-                            text = content.decode('euc-kr')
-                        except:
-                            text = content.decode('cp949', errors='ignore')
-                    return (resp.status, text)
+                async with self.session.get(url, headers=headers) as resp:
+                    self._record_success(host)
+                    metrics.inc('http_requests_total', result=f"{resp.status // 100}xx")
+                    # CIMultiDict 유지 — 'etag', 'Last-modified' 처럼 보내는 서버도 같은 키로 조회
+                    resp_headers = resp.headers.copy()
+                    content_type = resp.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                    if html_only and content_type and content_type not in HTML_CONTENT_TYPES:
+                        metrics.inc('http_skipped_total', reason='content_type')
+                        return (resp.status, "", resp_headers)
+                    
+                    content, truncated = await self._read_limited(resp, max_bytes, stop_markers)
+                    metrics.inc('http_bytes_total', len(content))
+                    if truncated:
+                        metrics.inc('http_truncated_total')
+                    return (resp.status, decode_html(content, resp.charset, truncated), resp_headers)
+            except asyncio.TimeoutError:
+                metrics.inc('http_requests_total', result='timeout')
+                self._record_failure(host)
+            except aiohttp.ClientConnectionError:
+                metrics.inc('http_requests_total', result='connection_error')
+                self._record_failure(host)
             except Exception as e:
-                if attempt == self.config.RETRY_COUNT - 1:
-                    pass
-                await asyncio.sleep(0.5 * (attempt + 1))
-        return (0, "")
-
-
-async def extract_body(url: str, client: HTTPClient) -> str:
-    status, html = await client.fetch(url)
-    if status != 200 or not html:
-        return ""
+                metrics.inc('http_requests_total', result='error')
+                logger.warning("요청 실패 %s: %s: %s", url, type(e).__name__, e)
+            if attempt < self.config.RETRY_COUNT - 1:
+                metrics.inc('http_retries_total')
+                await asyncio.sleep(backoff_delay(attempt, self.config.BACKOFF_BASE, self.config.BACKOFF_MAX))
+        return (0, "", {})
     
-    try:
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        selectors = [
-            'div#dic_area', 'div#articleBodyContents', 'div.article_body',
-            'div#article-view-content-div', 'div.news_cnt_detail_wrap',
-            'article.article-body', 'div#newsct_article', 'div.article-body',
-            'article', 'div#content',
-        ]
+    async def _read_limited(self, resp, max_bytes: Optional[int],
+                            stop_markers: Tuple[bytes, ...]) -> Tuple[bytes, bool]:
+        """(읽은 바이트, 중간에 끊었는지) — 끊으면 나머지는 받지 않고 연결을 닫음"""
+        if not max_bytes and not stop_markers:
+            return await resp.read(), False
         
-        body_elem = None
-        for sel in selectors:
-            body_elem = soup.select_one(sel)
-            if body_elem:
-                break
-        
-        if not body_elem:
-            body_elem = soup.find('body') or soup
-        
-        for tag in body_elem.find_all(['script', 'style', 'header', 'footer',
-                                     'nav', 'aside', 'form', 'iframe', 'button']):
-            tag.decompose()
+        buf = bytearray()
+        limit = max_bytes or float('inf')
+        overlap = max((len(m) for m in stop_markers), default=1) - 1
+        marker_found = False
+        async for chunk in resp.content.iter_chunked(64 * 1024):
+            start = max(0, len(buf) - overlap)
+            buf += chunk
+            if stop_markers and not marker_found:
+                for marker in stop_markers:
+                    pos = buf.find(marker, start)
+                    if pos != -1:
+                        marker_found = True
+                        limit = min(limit, pos + self.config.FETCH_TAIL_BYTES)
+                        break
+            if len(buf) >= limit:
+                return bytes(buf[:int(limit)]), True
+        return bytes(buf), False
+    
+    async def fetch_cached(self, url: str, transform: Callable[[str], str], offload: bool = False,
+                           timer_name: str = 'parse', version: str = PARSER_VERSION, **fetch_options) -> str:
+        """URL → transform(html) 결과를 캐시 (신선하면 네트워크 생략, 만료 시 조건부 요청)
+
+        offload=True면 transform을 스레드에서 실행 (큰 문서 파싱 시 이벤트 루프 보호)
+        transform이 awaitable을 반환하면 그 결과를 기다림 (ParseStage 등)
+        timer_name: transform 소요 시간을 기록할 계측 단계 이름
+        version: 캐시 키에 붙는 추출 로직 버전
+        fetch_options는 fetch_with_headers로 전달 (max_bytes, stop_markers, html_only)
+        캐시(SQLite) 접근은 스레드에서 — 이벤트 루프를 막지 않음
+        """
+        key = ContentCache.make_key(url, version)
+        entry = await asyncio.to_thread(self.cache.get, key) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            metrics.inc('content_cache_total', result='fresh')
+            return entry.body
         
-        text = body_elem.get_text(separator='\n')
-        body = clean_body_final(text)
+        status, html, headers = await self.fetch_with_headers(url, ContentCache.conditional_headers(entry),
+                                                              **fetch_options)
+        if status == 304 and entry:
+            metrics.inc('content_cache_total', result='revalidated')
+            await asyncio.to_thread(self.cache.touch, key)
+            return entry.body
+        if status != 200 or not html:
+            if entry:
+                metrics.inc('content_cache_total', result='stale')
+            return entry.body if entry else ""
+        if self.cache:
+            metrics.inc('content_cache_total', result='miss')
         
+        try:
+            with metrics.timer(timer_name):
+                body = await asyncio.to_thread(transform, html) if offload else transform(html)
+                if inspect.isawaitable(body):
+                    body = await body
+        except Exception as e:
+            metrics.inc('parse_errors_total', stage=timer_name)
+            logger.warning("%s 실패 %s: %s: %s", timer_name, url, type(e).__name__, e)
+            return ""
+        if self.cache:
+            await asyncio.to_thread(self.cache.put, key, body, headers.get('ETag', ''), headers.get('Last-Modified', ''))
         return body
-        
-    except:
+
+
+# 기사 본문 영역 후보 (우선순위 순) — 'tag', 'tag#id', 'tag.class' 형식만 지원
+ARTICLE_SELECTORS = [
+    'div#dic_area', 'div#articleBodyContents', 'div.article_body',
+    'div#article-view-content-div', 'div.news_cnt_detail_wrap',
+    'article.article-body', 'div#newsct_article', 'div.article-body',
+    'article', 'div#content',
+]
+# 다운로드 중 이 표식이 보이면 본문 컨테이너가 시작된 것 (id 선택자만 — class는 CSS에도 등장)
+ARTICLE_CONTAINER_MARKERS = tuple(
+    f'id={q}{sel.split("#", 1)[1]}{q}'.encode('ascii')
+    for sel in ARTICLE_SELECTORS if '#' in sel and sel != 'div#content' for q in ('"', "'"))
+BOILERPLATE_TAGS = ('script', 'style', 'header', 'footer', 'nav', 'aside', 'form', 'iframe', 'button')
+
+
+def selector_xpath(selector: str) -> str:
+    """단순 CSS 선택자 → 문서 순서상 첫 요소를 찾는 XPath"""
+    if '#' in selector:
+        tag, value = selector.split('#', 1)
+        cond = f"[@id='{value}']"
+    elif '.' in selector:
+        tag, value = selector.split('.', 1)
+        cond = f"[contains(concat(' ', normalize-space(@class), ' '), ' {value} ')]"
+    else:
+        tag, cond = selector, ''
+    return f"(//{tag or '*'}{cond})[1]"
+
+
+_ARTICLE_XPATHS = [etree.XPath(selector_xpath(sel)) for sel in ARTICLE_SELECTORS]
+# i번째보다 우선순위가 높은 선택자 중 하나라도 맞는지 (XPath 1회로 확인)
+_HIGHER_PRIORITY_MATCH = [None] + [
+    etree.XPath('boolean(' + ' | '.join(selector_xpath(sel) for sel in ARTICLE_SELECTORS[:i]) + ')')
+    for i in range(1, len(ARTICLE_SELECTORS))]
+# 언론사(호스트)별로 마지막에 맞았던 선택자 (LRU) — 같은 매체의 다음 기사는 바로 시도
+SELECTOR_HINTS_MAX = 1024
+_selector_hints: 'OrderedDict[str, int]' = OrderedDict()
+_selector_hints_lock = threading.Lock()
+_parser_local = threading.local()
+
+
+def _html_parser() -> etree.HTMLParser:
+    # lxml 파서는 스레드 간 공유하지 않음
+    parser = getattr(_parser_local, 'parser', None)
+    if parser is None:
+        parser = _parser_local.parser = etree.HTMLParser(encoding='utf-8')
+    return parser
+
+
+def _find_article_elem(root, host: Optional[str]):
+    """ARTICLE_SELECTORS 순서대로 처음 맞는 요소 — 호스트 힌트는 더 앞선 선택자가 없을 때만 사용"""
+    hint = None
+    if host:
+        with _selector_hints_lock:
+            hint = _selector_hints.get(host)
+            if hint is not None:
+                _selector_hints.move_to_end(host)
+    start = 0
+    if hint is not None and not (hint and _HIGHER_PRIORITY_MATCH[hint](root)):
+        found = _ARTICLE_XPATHS[hint](root)
+        if found:
+            return found[0]
+        start = hint + 1  # 앞선 선택자는 이미 없음을 확인
+    for i in range(start, len(_ARTICLE_XPATHS)):
+        found = _ARTICLE_XPATHS[i](root)
+        if found:
+            if host and i != hint:
+                with _selector_hints_lock:
+                    _selector_hints[host] = i
+                    if len(_selector_hints) > SELECTOR_HINTS_MAX:
+                        _selector_hints.popitem(last=False)
+            return found[0]
+    return None
+
+
+def extract_article_text(html: str, host: Optional[str] = None) -> str:
+    """기사 HTML → 본문 영역 텍스트 (정제 전)"""
+    # str을 그대로 넘기면 <?xml encoding=...?> 선언이 있는 문서에서 lxml이 거부 → UTF-8 바이트로 전달
+    root = etree.fromstring(html.encode('utf-8', 'ignore'), _html_parser())
+    if root is None:
         return ""
+    
+    body_elem = _find_article_elem(root, host)
+    if body_elem is None:
+        body_elem = next(root.iter('body'), root)
+    
+    # 본문 하위 트리에서만 제거 — 뒤따르는 텍스트(tail)는 남기되 앞 텍스트와 붙지 않도록 줄바꿈 삽입
+    removed = (*BOILERPLATE_TAGS, etree.Comment, etree.ProcessingInstruction)
+    for elem in body_elem.iter(*removed):
+        if elem.tail:
+            elem.tail = '\n' + elem.tail
+    etree.strip_elements(body_elem, *removed, with_tail=False)
+    
+    return '\n'.join(body_elem.itertext())
+
+
+def parse_article_html(html: str, url: str = None) -> str:
+    """기사 HTML → 정제된 본문"""
+    host = urlsplit(url).hostname if url else None
+    return clean_body_final(extract_article_text(html, host))
+
+
+def title_filter_reason(title: str, target: str, config: Config, regex_cache: RegexCache) -> Optional[str]:
+    """제목 필터에 걸린 이유 (통과하면 None)"""
+    for bl in config.TITLE_BLACKLIST:
+        if bl in title:
+            return 'title_blacklist'
+    if target not in title and regex_cache.find_any(title, exclude=target):
+        return 'other_company_title'
+    return None
+
+
+def body_filter_reason(body: str, target: str, config: Config, regex_cache: RegexCache) -> Optional[str]:
+    """본문 필터에 걸린 이유 (통과하면 None) — 계측용 분류 이름"""
+    if not body:
+        return 'no_body'
+    if len(body) < config.MIN_BODY_LENGTH:
+        return 'too_short'
+    if target not in body:
+        return 'target_missing'
+    if target not in body[:config.BODY_HEAD_CHECK]:
+        return 'target_not_in_head'
+    if regex_cache.count_matches(body[:3000], exclude=target) >= config.MAX_OTHER_COMPANIES:
+        return 'other_companies'
+    for bl in config.BODY_BLACKLIST:
+        if bl in body:
+            return 'body_blacklist'
+    return None
+
+
+def body_passes_filters(body: str, target: str, config: Config, regex_cache: RegexCache) -> bool:
+    """본문 필터 — 대상 종목이 앞부분에 있고, 다른 종목이 많지 않으며, 블랙리스트 문구가 없을 것"""
+    return body_filter_reason(body, target, config, regex_cache) is None
+
+
+# 프로세스 워커 전역 상태 (initializer에서 1회 설정)
+_worker_state: Dict = {}
+
+
+def _init_parse_worker(config: Config, regex_cache: RegexCache):
+    _worker_state['config'] = config
+    _worker_state['regex_cache'] = regex_cache
+
+
+def _filter_in_worker(body: str, target: str) -> Optional[str]:
+    return body_filter_reason(body, target, _worker_state['config'], _worker_state['regex_cache'])
+
+
+class ParseStage:
+    """기사 HTML 파싱/정제/필터를 이벤트 루프 밖에서 실행 (다운로드는 비동기 그대로)
+
+    - executor: 'process'(코어 수만큼 확장) | 'thread' | 'inline'
+    - 동시에 맡길 수 있는 작업은 workers * 2개 — 파싱이 밀리면 다운로드 쪽이 기다림(backpressure)
+    """
+    def __init__(self, config: Config, regex_cache: RegexCache, executor: str = None, workers: int = None):
+        self.config = config
+        self.regex_cache = regex_cache
+        self.kind = executor or config.PARSE_EXECUTOR
+        self.workers = workers or config.PARSE_WORKERS or os.cpu_count() or 1
+        self.executor: Optional[Executor] = None
+        if self.kind == 'process':
+            # 스레드가 떠 있는 프로세스(Streamlit 등)에서 fork는 위험 → forkserver/spawn
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self.executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context(method),
+                initializer=_init_parse_worker, initargs=(config, regex_cache))
+        elif self.kind == 'thread':
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='parse')
+        elif self.kind != 'inline':
+            raise ValueError(f"알 수 없는 PARSE_EXECUTOR: {self.kind}")
+        self._slots = asyncio.Semaphore(self.workers * 2)
+
+    async def _run(self, fn: Callable, *args):
+        if self.executor is None:
+            return fn(*args)
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def parse(self, html: str, url: str = None) -> str:
+        return await self._run(parse_article_html, html, url)
+
+    async def filter_reason(self, body: str, target: str) -> Optional[str]:
+        if self.kind == 'process':
+            return await self._run(_filter_in_worker, body, target)
+        return await self._run(body_filter_reason, body, target, self.config, self.regex_cache)
+
+    async def check(self, body: str, target: str) -> bool:
+        return await self.filter_reason(body, target) is None
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+
+async def extract_body(url: str, client: HTTPClient, stage: ParseStage = None) -> str:
+    options = dict(max_bytes=client.config.FETCH_MAX_BYTES, stop_markers=ARTICLE_CONTAINER_MARKERS, html_only=True,
+                   timer_name='article_parse')
+    if stage is None:
+        return await client.fetch_cached(url, lambda html: parse_article_html(html, url), **options)
+    return await client.fetch_cached(url, lambda html: stage.parse(html, url), **options)
+
+
+class RateLimiter:
+    """초당 요청 수 제한 (이벤트 루프 간 공유 가능, 슬롯 예약 방식)"""
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+    
+    async def acquire(self):
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+    
+    def backoff(self, seconds: float):
+        """429 응답 시 모든 요청을 일정 시간 뒤로 미룸"""
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+_naver_limiters: Dict[float, RateLimiter] = {}
+
+
+def get_naver_limiter(config: Config) -> RateLimiter:
+    """프로세스 전역 네이버 API 한도 공유"""
+    limiter = _naver_limiters.get(config.NAVER_RPS)
+    if limiter is None:
+        limiter = _naver_limiters[config.NAVER_RPS] = RateLimiter(config.NAVER_RPS)
+    return limiter
+
+
+async def _search_keyword(session, target: str, keyword: str, cutoff: datetime.datetime,
+                          config: Config, limiter: RateLimiter,
+                          semaphore: asyncio.Semaphore) -> List[Tuple[Dict, datetime.datetime]]:
+    """키워드 하나를 cutoff까지 페이징하여 원본 item 목록 반환"""
+    query = f'"{target}" "{keyword}"'
+    items_out = []
+    
+    async with semaphore:
+        for start in range(1, 1001, 100):
+            url = f"{config.NAVER_SEARCH_URL}?query={quote(query)}&display=100&start={start}&sort=date"
+            
+            data = None
+            for attempt in range(config.RETRY_COUNT):
+                await limiter.acquire()
+                try:
+                    with metrics.timer('naver_request'):
+                        async with session.get(url) as resp:
+                            metrics.inc('naver_requests_total', result=str(resp.status))
+                            if resp.status == 429:
+                                retry_after = resp.headers.get('Retry-After', '')
+                                delay = float(retry_after) if retry_after.isdigit() else 0.5 * (2 ** attempt)
+                                limiter.backoff(delay + random.uniform(0, 0.2))
+                                continue
+                            if resp.status == 200:
+                                data = await resp.json()
+                            else:
+                                logger.warning("네이버 검색 응답 %d (%s / %s)", resp.status, target, keyword)
+                            break
+                except Exception as e:
+                    metrics.inc('naver_requests_total', result='error')
+                    logger.warning("네이버 검색 실패 (%s / %s): %s: %s", target, keyword, type(e).__name__, e)
+                    break
+            
+            if data is None:
+                break
+            items = data.get('items', [])
+            if not items:
+                break
+            
+            stop = False
+            for item in items:
+                pub_date = parse_date(item.get('pubDate', ''))
+                if not pub_date or pub_date < cutoff:
+                    stop = True
+                    break
+                items_out.append((item, pub_date))
+            
+            if stop:
+                break
+    
+    return items_out
+
 
+async def search_naver(target: str, config: Config, regex_cache: RegexCache,
+                       limiter: RateLimiter = None,
+                       semaphore: asyncio.Semaphore = None,
+                       since: datetime.datetime = None,
+                       skip_urls: set = None) -> List[Dict]:
+    """키워드별 검색을 동시에 수행하고, 결과는 키워드 순서대로 병합 (순차 실행과 동일한 결과)
 
-async def search_naver(target: str, config: Config, regex_cache: RegexCache) -> List[Dict]:
+    since: 이 시각 이전 기사가 나오면 페이징 중단 (증분 수집), skip_urls: 이미 본 기사 제외
+    """
+    import aiohttp
     cutoff = datetime.datetime.now() - datetime.timedelta(days=config.MONTHS_AGO * 30)
+    if since and since > cutoff:
+        cutoff = since
+    skip_urls = skip_urls or set()
     headers = {
         "X-Naver-Client-Id": config.CLIENT_ID,
         "X-Naver-Client-Secret": config.CLIENT_SECRET
     }
+    limiter = limiter or get_naver_limiter(config)
+    semaphore = semaphore or asyncio.Semaphore(config.NAVER_CONCURRENCY)
+    
+    async with aiohttp.ClientSession(headers=headers) as session:
+        per_keyword = await asyncio.gather(*[
+            _search_keyword(session, target, keyword, cutoff, config, limiter, semaphore)
+            for keyword in config.KEYWORDS
+        ])
     
     collected = []
     seen_urls = set()
+    filtered = defaultdict(int)
     
-    async with aiohttp.ClientSession(headers=headers) as session:
-        for keyword in config.KEYWORDS:
-            query = f'"{target}" "{keyword}"'
+    for items in per_keyword:
+        for item, pub_date in items:
+            link = item.get('originallink') or item.get('link')
+            if link in seen_urls:
+                filtered['duplicate_url'] += 1
+                continue
+            if link in skip_urls:
+                filtered['already_seen'] += 1
+                continue
             
-            for start in range(1, 1001, 100):
-                url = f"https://openapi.naver.com/v1/search/news.json?query={quote(query)}&display=100&start={start}&sort=date"
-                
-                try:
-                    async with session.get(url) as resp:
-                        if resp.status != 200:
-                            break
-                        data = await resp.json()
-                        items = data.get('items', [])
-                        if not items:
-                            break
-                        
-                        stop = False
-                        for item in items:
-                            pub_date = parse_date(item.get('pubDate', ''))
-                            if not pub_date or pub_date < cutoff:
-                                stop = True
-                                break
-                            
-                            link = item.get('originallink') or item.get('link')
-                            if link in seen_urls:
-                                continue
-                            
-                            title = clean_html(item.get('title', ''))
-                            
-                            bl_found = None
-                            for bl in config.TITLE_BLACKLIST:
-                                if bl in title:
-                                    bl_found = bl
-                                    break
-                            if bl_found:
-                                continue
-                            
-                            if target not in title:
-                                if regex_cache.find_any(title, exclude=target):
-                                    continue
-                            
-                            seen_urls.add(link)
-                            collected.append({
-                                'title': title,
-                                'link': link,
-                                'date': item['pubDate'],
-                                'pub_date': pub_date
-                            })
-                        
-                        if stop:
-                            break
-                except Exception as e:
-                    break
+            title = clean_html(item.get('title', ''))
+            reason = title_filter_reason(title, target, config, regex_cache)
+            if reason:
+                filtered[reason] += 1
+                continue
+            
+            seen_urls.add(link)
+            collected.append({
+                'title': title,
+                'link': link,
+                'date': item['pubDate'],
+                'pub_date': pub_date
+            })
     
+    for reason, count in filtered.items():
+        metrics.inc('articles_filtered_total', count, reason=reason)
     return collected
 
 
-def deduplicate(articles: List[Dict], threshold: float) -> List[Dict]:
+def is_similar(s1: str, s2: str, threshold: float) -> bool:
+    """similarity(s1, s2) >= threshold 판정 (상한값 검사로 불필요한 ratio 계산 생략)"""
+    l1, l2 = len(s1), len(s2)
+    if not l1 + l2:
+        return threshold <= 1.0
+    if 2.0 * min(l1, l2) / (l1 + l2) < threshold:
+        return False
+    sm = SequenceMatcher(None, s1, s2)
+    if sm.quick_ratio() < threshold:
+        return False
+    return sm.ratio() >= threshold
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def shingle_set(text: str, k: int) -> set:
+    return {text[i:i + k] for i in range(max(1, len(text) - k + 1))}
+
+
+class NearDuplicateIndex:
+    """제목 근접 중복 탐지 (문자 n-gram MinHash + LSH 버킷, 후보는 is_similar로 최종 확인)
+
+    보관된 제목이 exact_below 개 미만이면 전수 비교하므로 기존 결과와 완전히 같다.
+    stop_shingles(종목명처럼 그날 제목 대부분에 나오는 n-gram)은 서명에서 제외한다.
+    """
+    def __init__(self, threshold: float, shingle_size: int = 2, num_perm: int = 16,
+                 bands: int = 16, exact_below: int = 40, seed: int = 1,
+                 stop_shingles: frozenset = frozenset()):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.stop_shingles = stop_shingles
+        self.bands = bands
+        self.rows = max(1, num_perm // bands)
+        self.exact_below = exact_below
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(self.bands * self.rows)]
+        self.titles: List[str] = []
+        self._signatures: List[Optional[List[int]]] = []
+        self._buckets: Dict[Tuple, List[int]] = defaultdict(list)
+        self._indexed = 0
+    
+    def _signature(self, title: str) -> List[int]:
+        shingles = shingle_set(title, self.shingle_size) - self.stop_shingles
+        if not shingles:
+            shingles = {title}
+        hashes = [zlib.crc32(sh.encode('utf-8')) for sh in shingles]
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+    
+    def _band_keys(self, sig: List[int]):
+        r = self.rows
+        for band in range(self.bands):
+            yield (band, *sig[band * r:(band + 1) * r])
+    
+    def _index_pending(self):
+        for idx in range(self._indexed, len(self.titles)):
+            if self._signatures[idx] is None:
+                self._signatures[idx] = self._signature(self.titles[idx])
+            for key in self._band_keys(self._signatures[idx]):
+                self._buckets[key].append(idx)
+        self._indexed = len(self.titles)
+    
+    def add_if_unique(self, title: str) -> bool:
+        """기존 제목과 근접 중복이 아니면 추가하고 True 반환"""
+        sig = None
+        if len(self.titles) < self.exact_below:
+            if any(is_similar(title, existing, self.threshold) for existing in self.titles):
+                return False
+        else:
+            self._index_pending()
+            sig = self._signature(title)
+            checked = set()
+            for key in self._band_keys(sig):
+                for idx in self._buckets.get(key, ()):
+                    if idx in checked:
+                        continue
+                    checked.add(idx)
+                    if is_similar(title, self.titles[idx], self.threshold):
+                        return False
+        
+        self.titles.append(title)
+        self._signatures.append(sig)
+        if len(self.titles) > self.exact_below:
+            self._index_pending()
+        return True
+
+
+def deduplicate(articles: List[Dict], threshold: float, exact_below: int = 40,
+                num_perm: int = 16, bands: int = 16, stop_df: float = 0.5) -> List[Dict]:
+    # 날짜별로 stop_df 비율 이상의 제목에 등장하는 n-gram은 LSH 서명에서 제외
+    day_titles = defaultdict(list)
+    for art in articles:
+        day_titles[art['pub_date'].strftime('%Y-%m-%d')].append(art['title'])
+    
     seen_urls = set()
-    by_date = defaultdict(list)
+    by_date: Dict[str, NearDuplicateIndex] = {}
     unique = []
     
     for art in articles:
@@ -300,27 +1045,133 @@ def deduplicate(articles: List[Dict], threshold: float) -> List[Dict]:
             continue
         
         date_key = art['pub_date'].strftime('%Y-%m-%d')
+        index = by_date.get(date_key)
+        if index is None:
+            titles = day_titles[date_key]
+            stop = frozenset()
+            if len(titles) >= exact_below:
+                df = defaultdict(int)
+                for t in titles:
+                    for sh in shingle_set(t, 2):
+                        df[sh] += 1
+                stop = frozenset(sh for sh, c in df.items() if c >= stop_df * len(titles))
+            index = by_date[date_key] = NearDuplicateIndex(
+                threshold, num_perm=num_perm, bands=bands, exact_below=exact_below, stop_shingles=stop)
         
-        is_dup = False
-        for existing in by_date[date_key]:
-            if similarity(art['title'], existing['title']) >= threshold:
-                is_dup = True
-                break
-        
-        if is_dup:
+        if not index.add_if_unique(art['title']):
             continue
         
         seen_urls.add(url)
-        by_date[date_key].append(art)
         unique.append(art)
     
     return unique
 
 
+def normalize_stock_code(stock_code: str) -> str:
+    if stock_code.startswith('A') or stock_code.startswith('a'):
+        return stock_code[1:].strip().zfill(6)
+    return stock_code.strip().zfill(6)
+
+
+class CorpCodeIndex:
+    """DART corp_codes 조회 인덱스 (종목코드 / 회사명 / 공백 제거 회사명 → corp_code)
+
+    회사명이 같은 법인이 여럿이면 상장사(종목코드 보유)를 미리 골라둔다.
+    corp_codes 표가 바뀌지 않는 한 OpenDart 캐시 폴더의 pickle을 재사용한다.
+    """
+    VERSION = 1
+    FILENAME = 'corp_code_index.pkl'
+
+    def __init__(self, by_stock_code: Dict[str, str], by_name: Dict[str, str],
+                 by_name_nospace: Dict[str, str], fingerprint: tuple):
+        self.by_stock_code = by_stock_code
+        self.by_name = by_name
+        self.by_name_nospace = by_name_nospace
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def make_fingerprint(df: 'pd.DataFrame') -> tuple:
+        if df.empty:
+            return (0,)
+        modified = str(df['modify_date'].max()) if 'modify_date' in df.columns else ''
+        return (len(df), str(df['corp_code'].iloc[0]), str(df['corp_code'].iloc[-1]), modified)
+
+    @classmethod
+    def build(cls, df: 'pd.DataFrame') -> 'CorpCodeIndex':
+        corp_codes = df['corp_code'].tolist()
+        names = df['corp_name'].tolist()
+        if 'stock_code' in df.columns:
+            stock_codes = df['stock_code'].astype(str).str.strip().tolist()
+            listed = (df['stock_code'].notnull() & (df['stock_code'].astype(str).str.strip() != '')).tolist()
+        else:
+            stock_codes = [''] * len(df)
+            listed = [False] * len(df)
+
+        by_stock_code: Dict[str, str] = {}
+        # 이름 → (첫 번째 corp_code, 첫 번째 상장사 corp_code)
+        first_by_name: Dict[str, List] = {}
+        first_by_nospace: Dict[str, List] = {}
+        for corp_code, name, code, is_listed in zip(corp_codes, names, stock_codes, listed):
+            if 'stock_code' in df.columns:
+                by_stock_code.setdefault(code, corp_code)
+            if not isinstance(name, str):
+                continue
+            for table, key in ((first_by_name, name), (first_by_nospace, name.replace(" ", ""))):
+                entry = table.setdefault(key, [corp_code, None])
+                if is_listed and entry[1] is None:
+                    entry[1] = corp_code
+
+        def resolve(table):
+            return {key: listed_code or first for key, (first, listed_code) in table.items()}
+
+        return cls(by_stock_code, resolve(first_by_name), resolve(first_by_nospace), cls.make_fingerprint(df))
+
+    @classmethod
+    def load_or_build(cls, df: 'pd.DataFrame', cache_dir) -> 'CorpCodeIndex':
+        path = cache_dir / cls.FILENAME
+        fingerprint = cls.make_fingerprint(df)
+        try:
+            with open(path, 'rb') as f:
+                version, index = pickle.load(f)
+            if version == cls.VERSION and index.fingerprint == fingerprint:
+                return index
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug("corp_code 인덱스 캐시를 읽지 못함 — 다시 생성: %s: %s", type(e).__name__, e)
+
+        index = cls.build(df)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            with open(tmp, 'wb') as f:
+                pickle.dump((cls.VERSION, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning("corp_code 인덱스 캐시 저장 실패: %s: %s", type(e).__name__, e)
+        return index
+
+    def lookup(self, company_name: str, stock_code: str = None) -> Optional[str]:
+        if stock_code:
+            corp_code = self.by_stock_code.get(normalize_stock_code(stock_code))
+            if corp_code:
+                return corp_code
+        corp_code = self.by_name.get(company_name)
+        if corp_code is None:
+            corp_code = self.by_name_nospace.get(company_name.replace(" ", ""))
+        return corp_code
+
+
+def _is_empty_frame(obj) -> bool:
+    """빈 DataFrame 여부 (pandas를 직접 import하지 않고 판별)"""
+    return getattr(obj, 'empty', False) is True
+
+
 class DartProcessor:
     def __init__(self, api_key: str):
         import shutil
         from pathlib import Path
+        import OpenDartReader
         
         cache_dir = Path.home() / '.OpenDart'
         
@@ -330,6 +1181,12 @@ class DartProcessor:
             if cache_dir.exists():
                 shutil.rmtree(cache_dir)
             self.dart = OpenDartReader(api_key)
+        
+        try:
+            self.corp_index = CorpCodeIndex.load_or_build(self.dart.corp_codes, cache_dir)
+        except Exception as e:
+            logger.warning("corp_code 인덱스 생성 실패 — 전체 검색으로 대체: %s: %s", type(e).__name__, e)
+            self.corp_index = None
 
     def clean_text(self, text: str) -> str:
         text = re.sub(r'[ \t]+', ' ', text)
@@ -344,15 +1201,20 @@ class DartProcessor:
 
     def find_listed_corp_code(self, company_name: str, stock_code: str = None) -> Optional[str]:
         """종목코드 또는 종목명으로 corp_code 찾기"""
+        if self.corp_index is not None:
+            try:
+                return self.corp_index.lookup(company_name, stock_code)
+            except Exception as e:
+                logger.warning("corp_code 조회 실패 (%s): %s: %s", company_name, type(e).__name__, e)
+                return None
+        
+        # 인덱스 생성 실패 시 corp_codes 전체 검색
         try:
             df = self.dart.corp_codes
             
             # 1. 종목코드로 먼저 찾기 (우선)
             if stock_code:
-                if stock_code.startswith('A') or stock_code.startswith('a'):
-                    clean_code = stock_code[1:].strip().zfill(6)
-                else:
-                    clean_code = stock_code.strip().zfill(6)
+                clean_code = normalize_stock_code(stock_code)
                 
                 # 안전한 비교를 위해 astype(str) 사용
                 matched = df[df['stock_code'].astype(str).str.strip() == clean_code]
@@ -374,24 +1236,21 @@ class DartProcessor:
             
             return candidates.iloc[0]['corp_code']
         except Exception as e:
+            logger.warning("corp_code 조회 실패 (%s): %s: %s", company_name, type(e).__name__, e)
             return None
 
-    def process(self, company_name: str, stock_code: str = None) -> Tuple[str, str, str]:
-        """종목 분석 (종목코드 지원)"""
-        code = self.find_listed_corp_code(company_name, stock_code)
-        if not code:
-            return "", "", "DART에 등록되지 않은 기업명입니다."
-            
+    def latest_report(self, code: str) -> Tuple[str, str, str]:
+        """최근 1년 정기 보고서 (report_nm, rcept_no, 오류메시지)"""
         try:
             start_date = (datetime.datetime.now() - datetime.timedelta(days=365)).strftime("%Y-%m-%d")
             # 1순위: 사업/분기/반기 보고서 조회
             reports = self.dart.list(code, start=start_date, kind='A', final=False)
             
-            if reports is None or (isinstance(reports, pd.DataFrame) and reports.empty):
+            if reports is None or _is_empty_frame(reports):
                 # 2순위: 전체 보고서 조회
                 reports = self.dart.list(code, start=start_date, final=False)
 
-            if reports is None or (isinstance(reports, pd.DataFrame) and reports.empty):
+            if reports is None or _is_empty_frame(reports):
                 return "", "", "최근 1년 내 조회된 공시가 없습니다."
                  
         except Exception as e:
@@ -405,17 +1264,17 @@ class DartProcessor:
 
         filtered.sort_values(by='rcept_dt', ascending=False, inplace=True)
         latest = filtered.iloc[0]
-        
-        rcp_no = latest.get('rcept_no')
-        report_nm = latest.get('report_nm')
+        return latest.get('report_nm'), latest.get('rcept_no'), ""
 
+    def business_docs(self, rcp_no: str) -> Tuple[List[Dict], str]:
+        """'사업의 내용' 하위문서 목록 (문서 목록, 오류메시지)"""
         try:
             sub_docs = self.dart.sub_docs(rcp_no)
         except Exception as e:
-            return report_nm, "", f"하위문서 목록 조회 실패: {e}"
+            return [], f"하위문서 목록 조회 실패: {e}"
             
         if sub_docs is None or sub_docs.empty:
-            return report_nm, "", "하위문서(목차)가 비어있음"
+            return [], "하위문서(목차)가 비어있음"
         
         business_docs = []
         in_business = False
@@ -441,62 +1300,168 @@ class DartProcessor:
                       business_docs.append({'title': row.get('title'), 'url': row.get('url')})
 
         if not business_docs:
-             return report_nm, "", "'사업의 내용' 섹션 없음"
+             return [], "'사업의 내용' 섹션 없음"
+        return business_docs, ""
 
-        full_text = []
-        for doc in business_docs:
-            try:
-                resp = requests.get(doc['url'], headers={'User-Agent': 'Mozilla/5.0'}, timeout=30)
-                if resp.status_code == 200:
-                    soup = BeautifulSoup(resp.text, 'html.parser')
-                    text = self.clean_text(soup.get_text(separator='\n'))
-                    if len(text) > 100:
-                        full_text.append(f"[{doc['title']}]\n{text}")
-            except:
-                pass
+    def doc_section(self, title: str, html: str) -> str:
+        """하위문서 HTML → '[제목]\n본문' (본문이 짧으면 빈 문자열)"""
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        text = self.clean_text(soup.get_text(separator='\n'))
+        if len(text) > 100:
+            return f"[{title}]\n{text}"
+        return ""
+
+    async def process_async(self, client: HTTPClient, company_name: str,
+                            stock_code: str = None) -> Tuple[str, str, str]:
+        """종목 분석 (종목코드 지원) — DART API 호출은 스레드로, 하위문서는 공유 세션으로 동시 다운로드"""
+        with metrics.timer('dart_api'):
+            code = await asyncio.to_thread(self.find_listed_corp_code, company_name, stock_code)
+            if not code:
+                return "", "", "DART에 등록되지 않은 기업명입니다."
+            
+            report_nm, rcp_no, err = await asyncio.to_thread(self.latest_report, code)
+            if err:
+                return "", "", err
+            
+            business_docs, err = await asyncio.to_thread(self.business_docs, rcp_no)
+            if err:
+                return report_nm, "", err
+        
+        async def fetch_section(doc) -> str:
+            return await client.fetch_cached(
+                doc['url'], lambda html: self.doc_section(doc['title'], html), offload=True, timer_name='dart_parse')
         
-        result = '\n\n'.join(full_text)
+        with metrics.timer('dart_docs'):
+            sections = await asyncio.gather(*[fetch_section(doc) for doc in business_docs])
+        result = '\n\n'.join(sec for sec in sections if sec)
         if not result:
             return report_nm, "", "본문 텍스트 추출 실패"
-             
+        
         return report_nm, result, ""
 
 
-async def run_news_pipeline(target: str, config: Config, regex_cache: RegexCache) -> Tuple[List[Dict], int]:
-    articles = await search_naver(target, config, regex_cache)
-    if not articles:
+_dart_processors: Dict[str, DartProcessor] = {}
+_dart_lock = threading.Lock()
+
+
+def get_dart_processor(api_key: str) -> DartProcessor:
+    """프로세스 전역 DartProcessor 공유 (OpenDartReader 초기화는 최초 1회)"""
+    with _dart_lock:
+        proc = _dart_processors.get(api_key)
+        if proc is None:
+            proc = _dart_processors[api_key] = DartProcessor(api_key)
+        return proc
+
+
+async def _refilter_previous(previous: List[Dict], target: str, config: Config, regex_cache: RegexCache,
+                             stage: ParseStage = None) -> Tuple[List[Dict], List[str]]:
+    """(현재 제목/본문 필터를 통과한 이전 기사, 탈락한 기사 URL)"""
+    async def reason_for(art):
+        reason = title_filter_reason(art['title'], target, config, regex_cache)
+        if reason or stage is None:
+            return reason or body_filter_reason(art['body'], target, config, regex_cache)
+        return await stage.filter_reason(art['body'], target)
+    
+    reasons = await asyncio.gather(*[reason_for(a) for a in previous])
+    kept, dropped = [], []
+    for art, reason in zip(previous, reasons):
+        if reason:
+            metrics.inc('articles_filtered_total', reason=reason)
+            dropped.append(art['link'])
+        else:
+            kept.append(art)
+    return kept, dropped
+
+
+async def run_news_pipeline(target: str, config: Config, regex_cache: RegexCache,
+                            semaphore: asyncio.Semaphore = None,
+                            naver_semaphore: asyncio.Semaphore = None,
+                            client: HTTPClient = None,
+                            stage: ParseStage = None,
+                            state: NewsStateStore = None) -> Tuple[List[Dict], int]:
+    """뉴스 수집 → 중복 제거 → 본문 추출/필터 (semaphore/client/stage는 여러 종목 동시 실행 시 공유)
+
+    stage가 없으면 파싱/필터를 이벤트 루프에서 바로 실행
+    INCREMENTAL_NEWS면 지난 수집 이후 기사만 검색/다운로드하고, 이전에 통과한 기사(본문 포함)와 합침
+    """
+    window_start = datetime.datetime.now() - datetime.timedelta(days=config.MONTHS_AGO * 30)
+    if state is None and config.INCREMENTAL_NEWS:
+        state = get_news_state(config.CACHE_DIR)
+    
+    since, skip_urls, previous = None, set(), []
+    if state is not None:
+        watermark = await asyncio.to_thread(state.get_watermark, target)
+        if watermark:
+            since = watermark - datetime.timedelta(hours=config.INCREMENTAL_OVERLAP_HOURS)
+            skip_urls = await asyncio.to_thread(state.seen_urls, target)
+            previous = await asyncio.to_thread(state.kept_articles, target, window_start)
+    
+    with metrics.timer('naver'):
+        searched = await search_naver(target, config, regex_cache, semaphore=naver_semaphore,
+                                      since=since, skip_urls=skip_urls)
+    metrics.inc('articles_total', len(searched), stage='searched')
+    dropped = []
+    if previous:
+        # 이전에 통과한 기사도 현재 필터로 다시 검사 (블랙리스트/기준이 바뀌었을 수 있음)
+        previous, dropped = await _refilter_previous(previous, target, config, regex_cache, stage)
+    if not searched and not previous:
+        if dropped:
+            await asyncio.to_thread(state.record, target, None, [], [], window_start, dropped)
         return [], 0
     
-    articles = deduplicate(articles, config.SIMILARITY_THRESHOLD)
+    # 이전에 통과한 기사를 앞에 두고 중복 제거 → 같은 사건의 새 기사는 본문을 받지 않음
+    previous_links = {a['link'] for a in previous}
+    with metrics.timer('dedup'):
+        articles = deduplicate(previous + searched, config.SIMILARITY_THRESHOLD, exact_below=config.DEDUP_EXACT_BELOW,
+                               num_perm=config.DEDUP_NUM_PERM, bands=config.DEDUP_BANDS,
+                               stop_df=config.DEDUP_STOP_DF)
+    metrics.inc('articles_filtered_total', len(previous) + len(searched) - len(articles), reason='near_duplicate')
+    # 이전 기사끼리의 중복도 제거된 목록을 사용
+    previous = [a for a in articles if a['link'] in previous_links]
+    articles = [a for a in articles if a['link'] not in previous_links]
     
-    semaphore = asyncio.Semaphore(config.MAX_CONCURRENT)
+    semaphore = semaphore or asyncio.Semaphore(config.MAX_CONCURRENT)
+    failed = set()
     
-    async with HTTPClient(config) as client:
-        async def process(art):
-            async with semaphore:
-                body = await extract_body(art['link'], client)
-                
-                if not body:
-                    return None
-                if len(body) < config.MIN_BODY_LENGTH:
-                    return None
-                if target not in body:
-                    return None
-                if target not in body[:config.BODY_HEAD_CHECK]:
-                    return None
-                if regex_cache.count_matches(body[:3000], exclude=target) >= config.MAX_OTHER_COMPANIES:
-                    return None
-                for bl in config.BODY_BLACKLIST:
-                    if bl in body:
-                        return None
-                
-                art['body'] = body
-                return art
-        
-        tasks = [process(art) for art in articles]
-        results = await asyncio.gather(*tasks)
-        valid = [r for r in results if r]
+    async def process(art):
+        async with client.slot(art['link'], semaphore):
+            with metrics.timer('article'):
+                body = await extract_body(art['link'], client, stage)
+            if not body:
+                failed.add(art['link'])
+            
+            if stage is None:
+                reason = body_filter_reason(body, target, config, regex_cache)
+            elif not body:
+                reason = 'no_body'
+            elif target not in body[:config.BODY_HEAD_CHECK]:
+                # 싼 검사는 여기서 먼저 — 워커로 보낼 본문 수를 줄임
+                reason = 'target_not_in_head'
+            else:
+                reason = await stage.filter_reason(body, target)
+            if reason:
+                metrics.inc('articles_filtered_total', reason=reason)
+                return None
+            
+            art['body'] = body
+            return art
+    
+    if client is None:
+        async with HTTPClient(config) as client:
+            results = await asyncio.gather(*[process(art) for art in articles])
+    else:
+        results = await asyncio.gather(*[process(art) for art in articles])
+    fresh = [r for r in results if r]
+    metrics.inc('articles_total', len(articles), stage='fetched')
+    metrics.inc('articles_total', len(fresh), stage='kept')
     
+    if state is not None:
+        newest = max((a['pub_date'] for a in searched), default=None)
+        # 본문을 못 받은 기사는 '본 것'으로 남기지 않음 — 겹침 구간 안이면 다음에 다시 시도
+        seen = [a for a in searched if a['link'] not in failed]
+        await asyncio.to_thread(state.record, target, newest, seen, fresh, window_start, dropped)
+    
+    valid = previous + fresh
     valid.sort(key=lambda x: x['pub_date'], reverse=True)
     return valid, len(valid)
-
@@ -1,19 +1,14 @@
 # app.py (Mobile-Friendly BBS Mode v2)
 import streamlit as st
-import asyncio
-import pandas as pd
-import time
 import warnings
 import math
+import os
 import html as html_lib
 from datetime import datetime
-from openai import AsyncOpenAI
-from io import BytesIO
-from database import Database
-from analyzer import (
-    Config, RegexCache, DartProcessor, 
-    run_news_pipeline
-)
+from database import Database, HIGHLIGHT_START, HIGHLIGHT_STOP
+from analyzer import Config
+from universe import load_company_universe
+from export import FORMATS, cached_export, export_path, export_signature
 
 warnings.filterwarnings('ignore', category=UserWarning, module='pandas')
 
@@ -112,82 +107,12 @@ def get_config():
         OPENAI_API_KEY=st.secrets.get("OPENAI_API_KEY")
     )
 config = get_config()
-openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
 
 @st.cache_resource
 def load_companies():
-    try:
-        try: df = pd.read_csv('krx_stocks.csv', encoding='cp949')
-        except: df = pd.read_csv('krx_stocks.csv', encoding='utf-8')
-        code_map = dict(zip(df['종목명'], df['종목코드']))
-        companies = df['종목명'].dropna().astype(str).str.strip().tolist()
-        return companies, RegexCache(companies), code_map
-    except: return [], None, {}
+    return load_company_universe('krx_stocks.csv', config.CACHE_DIR)
 ALL_COMPANIES, REGEX_CACHE, CODE_MAP = load_companies()
 
-# ═══════════════════════════════════════════
-# GPT 분석
-# ═══════════════════════════════════════════
-async def analyze_news_with_gpt(company_name: str, articles: list) -> str:
-    if not articles: return "-"
-    articles.sort(key=lambda x: x['pub_date'], reverse=True)
-    context = "".join(f"[{a['pub_date'].strftime('%Y.%m.%d')}] {a['title']}\n" for a in articles)
-    prompt = f"""당신은 주식 시장의 '모멘텀 전문 분석가'입니다. 
-        [작성 규칙]
-        1. "{company_name}"의 기업 가치(Valuation) 리레이팅을 유발할 수 있는 모든 모멘텀을 적을 것
-        ※ 모멘텀 :  '매출', '수출', '수주', '계약', '신제품', "양산", '캐파', 'M&A'
-        2. 반드시 "{company_name}" 회사와 직접 관련된 내용만 작성하며, 창작이 아닌 기사 속 내용만으로 작성할 것
-        3. 중복된 기사는 하나로 합치고, 구체적인 "숫자"나 "시기", "국가", "계약 상대방" 등이 언급된 경우 반드시 넣어주기 바랍니다.
-        4. 산업 전반의 동향, 다른 회사의 사례, 일반적인 시장 분석은 절대 포함하지 마십시오.
-        5. 문체: 개조식, 명사형 종결(~음, ~임, ~함), 인사말 및 미사여구 없는 핵심 내용만 작성할 것
-        
-        [출력 포맷]
-        1️⃣ 모멘텀 제목 (yyyy.mm.dd.)
-        - {company_name}의 모멘텀 관련 핵심 내용 요약
-        
-        2️⃣ 모멘텀 제목 (yyyy.mm.dd.)
-        - {company_name}의 모멘텀 관련 핵심 내용 요약
-
-{context}"""
-    try:
-        res = await openai_client.chat.completions.create(model="gpt-4o-mini", messages=[{"role":"user","content":prompt}], temperature=0.1)
-        return res.choices[0].message.content
-    except Exception as e: return f"Err: {e}"
-
-async def analyze_dart_with_gpt(company_name: str, report_nm: str, dart_text: str) -> str:
-    if not dart_text or len(dart_text) < 100: return "-"
-    prompt = f"""당신은 주식 시장의 '모멘텀 전문 분석가'입니다.
-        
-        [작성 규칙]
-        1. "{company_name}"의 기업 가치(Valuation) 리레이팅을 유발할 수 있는 모든 모멘텀을 적을 것
-        2. 신사업 진출, 신규 고객 확보, 증설, M&A, 퀄테스트 통과, 벤더 등록, 수출 지역 다변화 등 구체적인 근거를 포함할 것
-        3. 현황을 적는 것이 아닌, 기업 가치를 레벨업 시키는 핵심 성과 및 미래 기대감을 적을 것
-        4. 반드시 주어진 자료 내의 내용만으로 작성하며, 외부 지식을 가져오거나 없는 내용을 추론하지 말 것
-        5. 문체: 개조식, 명사형 종결(~음, ~임, ~함), 인사말 및 미사여구 없는 핵심 내용만 작성할 것
-        
-        [출력 포맷]
-        - 모멘텀 내용 1
-        
-        - 모멘텀 내용 2
-        
-        - 모멘텀 내용 3
-
-{dart_text[:30000]}"""
-    try:
-        res = await openai_client.chat.completions.create(model="gpt-4o-mini", messages=[{"role":"user","content":prompt}], temperature=0.1)
-        return res.choices[0].message.content
-    except Exception as e: return f"Err: {e}"
-
-async def analyze_company(company_name: str, stock_code: str = None, progress_callback=None):
-    if progress_callback: progress_callback(f"{company_name}..")
-    dart_proc = DartProcessor(config.DART_API_KEY)
-    r_nm, d_txt, d_err = dart_proc.process(company_name, stock_code)
-    d_res = await analyze_dart_with_gpt(company_name, r_nm, d_txt) if d_txt else "-"
-    arts, cnt = await run_news_pipeline(company_name, config, REGEX_CACHE)
-    n_res = await analyze_news_with_gpt(company_name, arts)
-    db.add_result(company_name=company_name, dart_report=r_nm or "-", dart_result=d_res, dart_error=d_err or "", news_count=cnt, news_result=n_res)
-    return True
-
 # ═══════════════════════════════════════════
 # 본문 HTML 렌더 (Streamlit 여백 간섭 완전 회피)
 # ═══════════════════════════════════════════
@@ -219,80 +144,123 @@ def render_post(row, prev_row=None, next_row=None):
 </div>"""
 
 
+def render_evidence(articles):
+    """근거 기사 목록 (날짜 + 제목 링크)"""
+    items = [f'<div style="padding:6px 8px 2px 8px;font-size:11px;color:#aaa;font-weight:600;">근거 기사 {len(articles)}건</div>']
+    for a in articles:
+        dt = a['pub_date'].strftime('%y.%m.%d') if a.get('pub_date') else ''
+        items.append(f'<div style="padding:2px 8px;font-size:12px;"><span style="color:#aaa;display:inline-block;width:60px;">{dt}</span>'
+                     f'<a href="{html_lib.escape(a["url"])}" target="_blank" style="color:#555;text-decoration:none;">{html_lib.escape(a["title"])}</a></div>')
+    return "".join(items)
+
+
+
+def render_snippet(snippet):
+    """검색어 일치 부분 발췌 (일치 단어 강조)"""
+    text = html_lib.escape(snippet).replace('\n', ' ')
+    text = text.replace(HIGHLIGHT_START, '<mark style="background:#fff3b0;padding:0;">').replace(HIGHLIGHT_STOP, '</mark>')
+    return f'<div style="padding:2px 8px 0 8px;font-size:12px;line-height:1.5;color:#777;">{text}</div>'
+
+
+
+def export_button(scope, label, file_name):
+    """Excel 내보내기 — 누를 때만 파일 생성, 대상 행이 그대로면 만들어 둔 파일 재사용"""
+    sig = export_signature(db, scope)
+    path = export_path(config.CACHE_DIR, scope, 'xlsx', sig)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            st.download_button(label, data=f.read(), file_name=file_name, mime=FORMATS['xlsx'], key=f"dl_{scope}")
+    elif st.button(f"{label} 만들기", key=f"mk_{scope}"):
+        with st.spinner("파일 생성 중..."):
+            cached_export(db, scope, 'xlsx', config.CACHE_DIR, sig)
+        st.rerun()
+
+
 # ==================== UI ====================
 
 tab1, tab2, tab3, tab4 = st.tabs(["수집", "결과", "보관", "삭제대상"])
 
 # ──── [1] 수집 ────
 with tab1:
-    if 'is_processing' not in st.session_state: st.session_state.is_processing = False
-    if 'pending_companies' not in st.session_state: st.session_state.pending_companies = []
-    if 'completed_companies' not in st.session_state: st.session_state.completed_companies = []
-
     c1, c2 = st.columns([8, 2])
     with c1:
         companies_input = st.text_area(
-            "Input",
-            value="" if st.session_state.is_processing else "",
-            height=80, label_visibility="collapsed",
+            "Input", height=80, label_visibility="collapsed",
             placeholder="종목명 입력 (엔터 구분)"
         )
     with c2:
-        if st.button("실행", use_container_width=True, disabled=st.session_state.is_processing):
-            if companies_input.strip():
-                st.session_state.pending_companies = [c.strip() for c in companies_input.split('\n') if c.strip()]
-                st.session_state.completed_companies = []
-                st.session_state.is_processing = True
-                st.rerun()
-
-    if st.session_state.is_processing and st.session_state.pending_companies:
-        total = len(st.session_state.pending_companies) + len(st.session_state.completed_companies)
-        done = len(st.session_state.completed_companies)
-        
-        with st.status(f"처리중 ({done}/{total})", expanded=True) as status:
-            # 이미 완료된 항목 표시
-            for name in st.session_state.completed_companies:
-                st.write(f"✅ {name}")
-            
-            # 현재 배치 처리
-            BATCH = 5
-            curr = st.session_state.pending_companies[:BATCH]
-            for c in curr:
-                st.write(f"⏳ {c} 처리중...")
-                asyncio.run(analyze_company(c, CODE_MAP.get(c)))
-                st.session_state.completed_companies.append(c)
-            
-            st.session_state.pending_companies = st.session_state.pending_companies[BATCH:]
-            
-            if st.session_state.pending_companies:
-                done_now = len(st.session_state.completed_companies)
-                status.update(label=f"처리중 ({done_now}/{total})")
-                time.sleep(0.3)
-                st.rerun()
-            else:
-                status.update(label=f"완료 ({total}/{total})", state="complete", expanded=False)
-                st.session_state.is_processing = False
-                st.session_state.completed_companies = []
-                st.rerun()
+        if st.button("실행", use_container_width=True):
+            names = [c.strip() for c in companies_input.split('\n') if c.strip()]
+            if names:
+                # 분석은 worker.py가 수행 — 여기서는 작업만 등록 (화면을 닫거나 새로고침해도 계속 진행)
+                added = db.enqueue_jobs(names, CODE_MAP)
+                skipped = len(dict.fromkeys(names)) - added
+                st.toast(f"{added}건 등록" + (f" · {skipped}건은 이미 대기/실행 중" if skipped else ""))
+
+    @st.fragment(run_every=config.JOB_POLL_INTERVAL)
+    def job_status():
+        """작업 큐 상태 — 이 영역만 주기적으로 다시 그림"""
+        counts = db.job_counts()
+        if not counts: return
+        active = counts.get('queued', 0) + counts.get('running', 0)
+        finished = counts.get('done', 0) + counts.get('failed', 0)
+        label = f"처리중 ({finished}/{finished + active})" if active else f"완료 ({finished})"
+        with st.status(label, state="running" if active else "complete", expanded=bool(active)):
+            for job in db.get_jobs(limit=100):
+                name = job['company_name']
+                if job['status'] == 'done':
+                    elapsed = (job['finished_at'] - job['started_at']).total_seconds() if job['started_at'] else 0
+                    st.write(f"✅ {name} ({elapsed:.0f}s)")
+                elif job['status'] == 'failed':
+                    st.write(f"❌ {name} — {job['error']}")
+                elif job['status'] == 'running':
+                    st.write(f"⏳ {name}" + (f" (재시도 {job['attempts'] - 1})" if job['attempts'] > 1 else ""))
+                else:
+                    st.write(f"⌛ {name} (대기)")
+        if counts.get('queued', 0) and not counts.get('running', 0):
+            st.caption("대기 중인 작업은 worker.py가 처리합니다 — 워커가 실행 중인지 확인하세요.")
+        if not active and st.button("기록 지우기"):
+            db.clear_finished_jobs()
+            st.rerun(scope="fragment")
+
+    job_status()
 
 # ──── [2] 결과 ────
 with tab2:
     if 'page' not in st.session_state: st.session_state.page = 1
-    all_res = db.get_all_results(limit=10000)
+    # page_cursors[p-1] = p페이지 직전 행 (키셋 페이지네이션 기준점, 1페이지는 None)
+    if 'page_cursors' not in st.session_state: st.session_state.page_cursors = [None]
+    if 'open_results' not in st.session_state: st.session_state.open_results = set()
 
     c_s, c_cnt = st.columns([8, 2])
     with c_s:
-        kw = st.text_input("검색", label_visibility="collapsed", placeholder="종목명 검색")
-    with c_cnt:
-        st.markdown(f"<div style='text-align:right;font-size:11px;color:#aaa;padding:8px 2px 0 0;'>{len(all_res)}건</div>", unsafe_allow_html=True)
-
-    targets = [r for r in all_res if kw in r['company_name']] if kw else all_res
+        kw = st.text_input("검색", label_visibility="collapsed", placeholder="종목명·요약 검색 (예: 수주 미국)")
+    if st.session_state.get('result_kw') != kw:
+        st.session_state.result_kw = kw
+        st.session_state.page = 1
+        st.session_state.page_cursors = [None]
 
     PER_PAGE = 50
-    total_pg = math.ceil(len(targets) / PER_PAGE) if targets else 1
-    if st.session_state.page > total_pg: st.session_state.page = 1
-    start = (st.session_state.page - 1) * PER_PAGE
-    view_data = targets[start:start + PER_PAGE]
+    searching = bool(kw.strip())
+    if searching:
+        # 종목명 + 뉴스/공시 요약 전문 검색 — 관련도순, 페이지 번호로 이동
+        page_rows, total_cnt = db.search(kw, limit=PER_PAGE + 1, offset=(st.session_state.page - 1) * PER_PAGE)
+        before = None
+        if not page_rows and st.session_state.page > 1:
+            st.session_state.page = 1
+            st.rerun()
+    else:
+        total_cnt = db.get_count()
+        if st.session_state.page > len(st.session_state.page_cursors):
+            st.session_state.page = 1
+            st.session_state.page_cursors = [None]
+        before = st.session_state.page_cursors[st.session_state.page - 1]
+        # 다음 페이지 첫 행까지 1건 더 조회 (▼다음 표시용)
+        page_rows = db.get_results_page(limit=PER_PAGE + 1, after=before)
+    total_pg = math.ceil(total_cnt / PER_PAGE) if total_cnt else 1
+    with c_cnt:
+        st.markdown(f"<div style='text-align:right;font-size:11px;color:#aaa;padding:8px 2px 0 0;'>{total_cnt}건</div>", unsafe_allow_html=True)
+    view_data = page_rows[:PER_PAGE]
 
     # 헤더
     st.markdown('<div style="display:flex;justify-content:space-between;padding:4px;border-bottom:2px solid #bbb;">'
@@ -303,13 +271,15 @@ with tab2:
         st.caption("데이터 없음")
     else:
         for i, row in enumerate(view_data):
-            gidx = start + i
             dt = row['created_at']
             if isinstance(dt, str): dt = datetime.strptime(dt, '%Y-%m-%d %H:%M:%S')
             mark = " ★" if row.get('is_bookmarked') else ""
             dc_mark = " 🗑" if row.get('is_delete_candidate') else ""
+            is_open = row['id'] in st.session_state.open_results
 
-            with st.expander(f"**{row['company_name']}**{mark}{dc_mark}　·　{dt.strftime('%m.%d %H:%M')}"):
+            if searching and row.get('snippet'):
+                st.markdown(render_snippet(row['snippet']), unsafe_allow_html=True)
+            with st.expander(f"**{row['company_name']}**{mark}{dc_mark}　·　{dt.strftime('%m.%d %H:%M')}", expanded=is_open):
                 # 버튼 (왼쪽 정렬, 나머지 공간은 빈칸)
                 b1, b2, b3, _ = st.columns([1.5, 1.5, 1.5, 7])
                 with b1:
@@ -321,32 +291,43 @@ with tab2:
                 with b3:
                     if st.button("삭제", key=f"del_{row['id']}"): db.delete_result(row['id']); st.rerun()
 
-                prev_r = targets[gidx - 1] if gidx > 0 else None
-                next_r = targets[gidx + 1] if gidx < len(targets) - 1 else None
-                st.markdown(render_post(row, prev_r, next_r), unsafe_allow_html=True)
+                # 본문(dart/news)은 펼친 행만 개별 조회
+                if not is_open:
+                    if st.button("본문 보기", key=f"open_{row['id']}"):
+                        st.session_state.open_results.add(row['id']); st.rerun()
+                else:
+                    full = db.get_result(row['id'])
+                    if full:
+                        prev_r = view_data[i - 1] if i > 0 else before
+                        next_r = page_rows[i + 1] if i + 1 < len(page_rows) else None
+                        st.markdown(render_post(full, prev_r, next_r), unsafe_allow_html=True)
+                        evidence = db.get_analysis_articles(row['id'])
+                        if evidence:
+                            st.markdown(render_evidence(evidence), unsafe_allow_html=True)
 
     if total_pg > 1:
         cp, cc, cn = st.columns([2, 4, 2])
         with cp:
             if st.session_state.page > 1 and st.button("◀ 이전", key="pg_prev"):
-                st.session_state.page -= 1; st.rerun()
+                st.session_state.page -= 1
+                if not searching: del st.session_state.page_cursors[st.session_state.page:]
+                st.rerun()
         with cc:
             st.markdown(f"<div style='text-align:center;font-size:12px;color:#aaa;padding-top:8px;'>{st.session_state.page}/{total_pg}</div>", unsafe_allow_html=True)
         with cn:
-            if st.session_state.page < total_pg and st.button("다음 ▶", key="pg_next"):
-                st.session_state.page += 1; st.rerun()
+            if st.session_state.page < total_pg and view_data and st.button("다음 ▶", key="pg_next"):
+                if not searching:
+                    del st.session_state.page_cursors[st.session_state.page:]
+                    st.session_state.page_cursors.append(view_data[-1])
+                st.session_state.page += 1
+                st.rerun()
 
 # ──── [3] 보관 ────
 with tab3:
     bk_list = db.get_bookmarked_results()
 
     if bk_list:
-        df = pd.DataFrame(bk_list)
-        out = BytesIO()
-        with pd.ExcelWriter(out, engine='openpyxl') as writer: df.to_excel(writer, index=False)
-        out.seek(0)
-        st.download_button("Excel", data=out, file_name="saved.xlsx",
-                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        export_button('bookmarked', "Excel", "saved.xlsx")
 
     st.markdown('<div style="display:flex;justify-content:space-between;padding:4px;border-bottom:2px solid #bbb;">'
                 '<span style="font-size:11px;color:#999;font-weight:600;">종목명</span>'
@@ -372,14 +353,7 @@ with tab4:
     with dc1:
         if dc_list:
             # 기업명만 Excel 다운로드
-            dc_names = sorted(set(r['company_name'] for r in dc_list))
-            df_dc = pd.DataFrame({'기업명': dc_names})
-            out_dc = BytesIO()
-            with pd.ExcelWriter(out_dc, engine='openpyxl') as writer:
-                df_dc.to_excel(writer, index=False)
-            out_dc.seek(0)
-            st.download_button("Excel (기업명)", data=out_dc, file_name="delete_candidates.xlsx",
-                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            export_button('delete_candidates', "Excel (기업명)", "delete_candidates.xlsx")
     with dc2:
         if dc_list:
             if st.button("일괄 삭제", type="primary"):
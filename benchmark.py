@@ -0,0 +1,1215 @@
+# benchmark.py
+"""오프라인 성능 벤치마크 (네트워크/API 키 불필요)
+
+사용법:
+    python benchmark.py regex [--titles 2000] [--bodies 200]
+    python benchmark.py dedup [--sizes 100,300,1000]
+    python benchmark.py clean [--corpus DIR] [--samples 2000]
+    python benchmark.py extract [--corpus DIR] [--pages 300]
+    python benchmark.py stage [--pages 400] [--workers 4] [--latency 0.05]
+    python benchmark.py importtime [--baseline importtime.json] [--save-baseline importtime.json]
+    python benchmark.py record --synthetic 10            # 합성 fixture 생성 (bench_fixtures/)
+    python benchmark.py record 삼성전자 에코프로비엠       # 실제 API 응답 기록 (API 키/네트워크 필요)
+    python benchmark.py pipeline [--latency 0.05] [--baseline pipeline.json] [--save-baseline pipeline.json]
+
+회귀 검사 (기준 결과는 bench_baselines/ 에 커밋 — 나빠지면 종료 코드 1):
+    python benchmark.py --seed 7 record --synthetic 4     # 시드가 같으면 항상 같은 fixture (fingerprint a29b3aad295f0fe4)
+    python benchmark.py pipeline --baseline bench_baselines/pipeline.json
+    python benchmark.py importtime --baseline bench_baselines/importtime.json
+    처리량/RSS/import 시간은 측정한 기기 기준 — 다른 기기에서는 같은 명령에 --save-baseline 으로 먼저 기준을 다시 만들 것
+    (통과 기사 수는 기기와 무관하게 같아야 함)
+"""
+import argparse
+import asyncio
+import csv
+import datetime
+import email.utils
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+import metrics
+from analyzer import (Config, DartProcessor, HTTPClient, ParseStage, RateLimiter, RegexCache, clean_body_final,
+                      deduplicate, extract_article_text, get_dart_processor, get_naver_limiter, parse_article_html,
+                      parse_date, run_news_pipeline, similarity)
+
+
+# ═══════════════════════════════════════════
+# 공통 유틸
+# ═══════════════════════════════════════════
+FILLER_WORDS = [
+    "올해", "하반기", "실적", "전망", "글로벌", "시장", "확대", "본격", "발표", "협력",
+    "기술", "개발", "생산", "라인", "증설", "북미", "유럽", "고객사", "점유율", "성장",
+    "신규", "체결", "규모", "억원", "달러", "기대", "분기", "최대", "공개", "추진",
+]
+
+
+def load_company_names(path: str = 'krx_stocks.csv') -> List[str]:
+    for enc in ('cp949', 'utf-8'):
+        try:
+            with open(path, encoding=enc, newline='') as f:
+                return [row['종목명'].strip() for row in csv.DictReader(f) if row.get('종목명')]
+        except UnicodeDecodeError:
+            continue
+    return []
+
+
+def make_text(rng: random.Random, companies: List[str], length: int, mention_rate: float = 0.05) -> str:
+    parts = []
+    size = 0
+    while size < length:
+        if rng.random() < mention_rate:
+            word = rng.choice(companies) + rng.choice(["", "은", "의", "가", "과", "전자", "株", ",", "."])
+        else:
+            word = rng.choice(FILLER_WORDS)
+        parts.append(word)
+        size += len(word) + 1
+    return " ".join(parts)[:length]
+
+
+def timeit(fn: Callable[[], object], repeat: int = 3) -> float:
+    """최소 실행 시간(초)"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+# ═══════════════════════════════════════════
+# [regex] RegexCache 다중 패턴 매처
+# ═══════════════════════════════════════════
+class LegacyRegexCache:
+    """기존 구현 (종목별 정규식 순차 검색) — 비교 기준"""
+    def __init__(self, companies: List[str]):
+        self.companies = companies
+        self.patterns = {}
+        for company in companies:
+            pattern = f"{re.escape(company)}(?=[ 은는이가을를의와과로서에.,\"'\n\r]|$|[^가-힣a-zA-Z0-9])"
+            self.patterns[company] = re.compile(pattern)
+
+    def count_matches(self, text: str, exclude: str = None) -> int:
+        count = 0
+        for company, pattern in self.patterns.items():
+            if company == exclude:
+                continue
+            if pattern.search(text):
+                count += 1
+                if count >= 10:
+                    break
+        return count
+
+    def find_any(self, text: str, exclude: str = None) -> bool:
+        for company, pattern in self.patterns.items():
+            if company == exclude:
+                continue
+            if pattern.search(text):
+                return True
+        return False
+
+
+def bench_regex(args) -> int:
+    companies = load_company_names(args.csv)
+    rng = random.Random(args.seed)
+    titles = [make_text(rng, companies, rng.randint(20, 60), 0.15) for _ in range(args.titles)]
+    bodies = [make_text(rng, companies, 3000, 0.02) for _ in range(args.bodies)]
+    excludes = [rng.choice(companies) for _ in range(max(len(titles), len(bodies)))]
+
+    t0 = time.perf_counter(); legacy = LegacyRegexCache(companies); t_legacy_build = time.perf_counter() - t0
+    t0 = time.perf_counter(); fast = RegexCache(companies); t_fast_build = time.perf_counter() - t0
+
+    mismatches = 0
+    for i, t in enumerate(titles):
+        mismatches += legacy.find_any(t, excludes[i]) != fast.find_any(t, excludes[i])
+    for i, b in enumerate(bodies):
+        mismatches += legacy.count_matches(b, excludes[i]) != fast.count_matches(b, excludes[i])
+
+    def run_titles(cache):
+        return lambda: [cache.find_any(t, excludes[i]) for i, t in enumerate(titles)]
+
+    def run_bodies(cache):
+        return lambda: [cache.count_matches(b, excludes[i]) for i, b in enumerate(bodies)]
+
+    rows = [
+        ("build", t_legacy_build, t_fast_build),
+        (f"find_any x{len(titles)}", timeit(run_titles(legacy), args.repeat), timeit(run_titles(fast), args.repeat)),
+        (f"count_matches x{len(bodies)}", timeit(run_bodies(legacy), args.repeat), timeit(run_bodies(fast), args.repeat)),
+    ]
+
+    print(f"companies={len(companies)} titles={len(titles)} bodies={len(bodies)}")
+    print(f"{'case':<24}{'legacy(s)':>12}{'new(s)':>12}{'speedup':>10}")
+    for name, old, new in rows:
+        print(f"{name:<24}{old:>12.4f}{new:>12.4f}{old / new if new else float('inf'):>9.1f}x")
+    print(f"mismatches={mismatches}")
+    return 1 if mismatches else 0
+
+
+# ═══════════════════════════════════════════
+# [dedup] 제목 근접 중복 제거
+# ═══════════════════════════════════════════
+HEADLINE_SYLLABLES = "가나다라마바사아자차카타파하강남동서산수전기화학공업제약바이오반도체배터리소재장비수주계약공급출시양산투자인수진출매출수출증설협력개발글로벌시장미국유럽일본중동"
+
+
+def make_headlines(rng: random.Random, company: str, n: int) -> List[str]:
+    """동일 사건을 여러 매체가 조금씩 바꿔 쓴 제목 묶음을 흉내낸 합성 헤드라인"""
+    def word():
+        return "".join(rng.choice(HEADLINE_SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+    titles = []
+    while len(titles) < n:
+        story = [word() for _ in range(rng.randint(4, 7))]
+        amount = f"{rng.randint(10, 9000)}억원"
+        for _ in range(rng.randint(1, 4)):
+            words = list(story)
+            r = rng.random()
+            if r < 0.3:
+                words.pop(rng.randrange(len(words)))
+            elif r < 0.5:
+                words.insert(rng.randrange(len(words)), word())
+            head = rng.choice([f"{company},", company, f"[단독] {company}", f"[속보] {company}"])
+            tail = rng.choice(["", " (종합)", " …주가 관심", f" {amount}"])
+            titles.append(f"{head} {' '.join(words)}{tail}")
+    return titles[:n]
+
+
+def legacy_deduplicate(articles, threshold):
+    """기존 구현 (같은 날짜 보관 제목 전체와 SequenceMatcher 비교)"""
+    from collections import defaultdict
+    seen_urls = set()
+    by_date = defaultdict(list)
+    unique = []
+    for art in articles:
+        if art['link'] in seen_urls:
+            continue
+        date_key = art['pub_date'].strftime('%Y-%m-%d')
+        if any(similarity(art['title'], e['title']) >= threshold for e in by_date[date_key]):
+            continue
+        seen_urls.add(art['link'])
+        by_date[date_key].append(art)
+        unique.append(art)
+    return unique
+
+
+def bench_dedup(args) -> int:
+    rng = random.Random(args.seed)
+    day = datetime.datetime(2025, 1, 2, 9, 0)
+    print(f"threshold={args.threshold} exact_below={args.exact_below} num_perm={args.num_perm} "
+          f"bands={args.bands} stop_df={args.stop_df}")
+    print(f"{'size':>6}{'legacy(s)':>12}{'new(s)':>12}{'speedup':>10}{'kept(old/new)':>16}{'agreement':>12}")
+    worst = 1.0
+    for size in [int(x) for x in args.sizes.split(',')]:
+        titles = make_headlines(rng, "에코프로비엠", size)
+        articles = [{'title': t, 'link': f"https://news.example/{i}", 'pub_date': day} for i, t in enumerate(titles)]
+
+        t0 = time.perf_counter(); old = legacy_deduplicate(articles, args.threshold); t_old = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        new = deduplicate(articles, args.threshold, exact_below=args.exact_below,
+                          num_perm=args.num_perm, bands=args.bands, stop_df=args.stop_df)
+        t_new = time.perf_counter() - t0
+
+        old_links = {a['link'] for a in old}
+        new_links = {a['link'] for a in new}
+        agree = sum((a['link'] in old_links) == (a['link'] in new_links) for a in articles) / len(articles)
+        worst = min(worst, agree)
+        print(f"{size:>6}{t_old:>12.4f}{t_new:>12.4f}{t_old / t_new if t_new else float('inf'):>9.1f}x"
+              f"{f'{len(old)}/{len(new)}':>16}{agree:>11.2%}")
+    return 0 if worst >= args.min_agreement else 1
+
+
+# ═══════════════════════════════════════════
+# [clean] 본문 정제 (clean_body_final)
+# ═══════════════════════════════════════════
+def legacy_clean_body_final(text: str) -> str:
+    """기존 구현 (패턴별 re.search + 슬라이스 복사) — 골든 출력 기준"""
+    if not text:
+        return ""
+    email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', text)
+    if email_match:
+        text = text[:email_match.start()].strip()
+    cutoff_patterns = [
+        r'관련\s*기사', r'다른\s*기사', r'추천\s*기사', r'인기\s*기사',
+        r'더\s*보기', r'See more', r'Tag\s*#', r'#바이오',
+        r'저작권자', r'무단\s*전재', r'재배포\s*금지',
+        r'Copyright', r'All rights reserved', r'개인정보\s*보호',
+        r'구독\s*신청', r'뉴스\s*스탠드', r'좋아요\s*슬퍼요',
+        r'기사\s*제보', r'댓글\s*작성', r'많이\s*본\s*뉴스',
+        r'지금\s*뜨는', r'공유하기', r'URL\s*복사',
+        r'글자\s*크기', r'기사\s*듣기', r'인쇄하기', r'읽기모드',
+    ]
+    cutoff_start = len(text) * 3 // 10
+    for pattern in cutoff_patterns:
+        match = re.search(pattern, text[cutoff_start:], re.IGNORECASE)
+        if match:
+            text = text[:cutoff_start + match.start()].strip()
+    noise_patterns = [
+        r'기자\s*=', r'특파원\s*=', r'©|ⓒ',
+        r'사진\s*=', r'출처\s*:', r'자료\s*:',
+        r'\d{2,4}-\d{2,4}-\d{4}', r'FAX|Fax|fax',
+    ]
+    clean_lines = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or len(line) < 15:
+            continue
+        if any(re.search(p, line) for p in noise_patterns):
+            continue
+        clean_lines.append(line)
+    text = '\n'.join(clean_lines)
+    text = re.sub(r'\n{2,}', '\n', text)
+    return text.strip()
+
+
+CLEAN_MARKERS = [
+    "관련기사", "관련 기사", "다른  기사", "더보기", "see MORE", "Tag #반도체", "#바이오", "저작권자 ⓒ",
+    "무단전재 및 재배포 금지", "COPYRIGHT", "all rights reserved", "개인정보 보호", "구독신청",
+    "뉴스스탠드", "좋아요 슬퍼요", "기사제보", "댓글 작성", "많이 본 뉴스", "지금 뜨는", "공유하기",
+    "URL 복사", "글자 크기", "기사 듣기", "인쇄하기", "읽기모드", "기사 제보", "더 보기", "Tag\n#",
+]
+CLEAN_NOISE = [
+    "(서울=연합뉴스) 홍길동 기자 = ", "워싱턴 특파원 =", "사진=회사 제공", "출처: 금융감독원 전자공시",
+    "자료 : 한국거래소", "문의 02-1234-5678", "FAX 02-000-0000", "ⓒ 뉴스", "reporter@news.co.kr",
+]
+
+
+def make_article_text(rng: random.Random, companies: List[str]) -> str:
+    """본문/잡음 줄/차단 문구/앞뒤 공백이 섞인 get_text() 결과 흉내"""
+    lines = [" " * rng.randint(0, 3) for _ in range(rng.randint(0, 4))]
+    for _ in range(rng.randint(3, 40)):
+        r = rng.random()
+        if r < 0.08:
+            lines.append(rng.choice(CLEAN_MARKERS))
+        elif r < 0.14:
+            lines.append(rng.choice(CLEAN_NOISE) + make_text(rng, companies, rng.randint(5, 40)))
+        elif r < 0.18:
+            lines.append(rng.choice(CLEAN_MARKERS) + rng.choice(CLEAN_MARKERS))
+        elif r < 0.25:
+            lines.append(" " * rng.randint(0, 4))
+        else:
+            line = make_text(rng, companies, rng.randint(5, 200), 0.05)
+            if rng.random() < 0.1:
+                pos = rng.randrange(len(line) + 1)
+                line = line[:pos] + rng.choice(CLEAN_MARKERS) + line[pos:]
+            lines.append(line)
+    return rng.choice(["\n", "\n\n", " \n\t"]).join(lines)
+
+
+def load_corpus_texts(corpus_dir: str) -> List[str]:
+    """저장된 기사 HTML(*.html) → 정제 전 본문 텍스트"""
+    texts = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, '**', '*.html'), recursive=True)):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        for enc in ('utf-8', 'cp949'):
+            try:
+                texts.append(extract_article_text(raw.decode(enc)))
+                break
+            except UnicodeDecodeError:
+                continue
+    return texts
+
+
+def bench_clean(args) -> int:
+    rng = random.Random(args.seed)
+    companies = load_company_names(args.csv) or ["삼성전자"]
+    texts = [make_article_text(rng, companies) for _ in range(args.samples)]
+    source = f"synthetic={len(texts)}"
+    if args.corpus:
+        corpus = load_corpus_texts(args.corpus)
+        texts.extend(corpus)
+        source += f" corpus={len(corpus)}"
+
+    mismatches = 0
+    for text in texts:
+        if legacy_clean_body_final(text) != clean_body_final(text):
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"MISMATCH: {text[:120]!r}")
+
+    mb = sum(len(t.encode('utf-8')) for t in texts) / 1e6
+    t_old = timeit(lambda: [legacy_clean_body_final(t) for t in texts], args.repeat)
+    t_new = timeit(lambda: [clean_body_final(t) for t in texts], args.repeat)
+
+    print(f"{source} size={mb:.2f}MB")
+    print(f"{'impl':<10}{'time(s)':>10}{'MB/s':>10}")
+    print(f"{'legacy':<10}{t_old:>10.4f}{mb / t_old:>10.1f}")
+    print(f"{'new':<10}{t_new:>10.4f}{mb / t_new:>10.1f}   ({t_old / t_new:.1f}x)")
+    print(f"mismatches={mismatches}")
+    return 1 if mismatches else 0
+
+
+# ═══════════════════════════════════════════
+# [extract] 기사 HTML 본문 추출 (lxml)
+# ═══════════════════════════════════════════
+def legacy_parse_article_html(html: str) -> str:
+    """기존 구현 (BeautifulSoup html.parser + CSS 선택자 순차 시도) — 비교 기준"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    selectors = [
+        'div#dic_area', 'div#articleBodyContents', 'div.article_body',
+        'div#article-view-content-div', 'div.news_cnt_detail_wrap',
+        'article.article-body', 'div#newsct_article', 'div.article-body',
+        'article', 'div#content',
+    ]
+    body_elem = None
+    for sel in selectors:
+        body_elem = soup.select_one(sel)
+        if body_elem:
+            break
+    if not body_elem:
+        body_elem = soup.find('body') or soup
+    for tag in body_elem.find_all(['script', 'style', 'header', 'footer',
+                                   'nav', 'aside', 'form', 'iframe', 'button']):
+        tag.decompose()
+    return clean_body_final(body_elem.get_text(separator='\n'))
+
+
+# (호스트, 본문 컨테이너 여는 태그, 닫는 태그)
+PAGE_TEMPLATES = [
+    ("n.news.naver.com", '<article id="dic_area" class="go_trans _article_content">', '</article>'),
+    ("www.hankyung.com", '<div class="article-body" id="articletxt">', '</div>'),
+    ("www.mk.co.kr", '<div class="news_cnt_detail_wrap" itemprop="articleBody">', '</div>'),
+    ("www.etnews.com", '<div id="article-view-content-div">', '</div>'),
+    ("biz.chosun.com", '<section class="article-body">', '</section>'),
+    ("www.thebell.co.kr", '<div class="viewSection">', '</div>'),
+]
+
+
+def make_article_page(rng: random.Random, companies: List[str], template: Tuple[str, str, str]) -> str:
+    """포털/언론사 기사 페이지 흉내 (스크립트, 메뉴, 관련기사, 광고 등 포함)"""
+    host, open_tag, close_tag = template
+    script = "<script>window.__ad=" + "".join(rng.choice("abcdef0123") for _ in range(2000)) + ";</script>"
+    nav = "<nav><ul>" + "".join(f'<li><a href="/s/{i}">{rng.choice(FILLER_WORDS)}</a></li>' for i in range(80)) + "</ul></nav>"
+    paragraphs = []
+    for _ in range(rng.randint(6, 25)):
+        para = make_text(rng, companies, rng.randint(80, 400), 0.03)
+        r = rng.random()
+        if r < 0.15:
+            para += f'<span class="ad"><script>ad({rng.randint(1, 99)})</script></span>{make_text(rng, companies, 40)}'
+        elif r < 0.25:
+            para += f'<!-- ad slot {rng.randint(1, 9)} -->{make_text(rng, companies, 30)}'
+        elif r < 0.3:
+            para += f'<iframe src="/ad"></iframe>&nbsp;&lt;{rng.choice(FILLER_WORDS)}&gt;'
+        paragraphs.append(para)
+    body = "<br><br>\n".join(paragraphs)
+    credit = f"<p>홍길동 기자 hong@{host.split('.', 1)[-1]}</p>"
+    related = "<aside><h3>관련기사</h3>" + "".join(
+        f"<a>{make_text(rng, companies, 30)}</a>" for _ in range(10)) + "</aside>"
+    footer = "<footer>저작권자 ⓒ 무단전재 및 재배포 금지 " + "Copyright All rights reserved " * 3 + "</footer>"
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{make_text(rng, companies, 40)}</title>"
+            f"<style>{'.a{color:red}' * 300}</style>{script * 3}</head><body><header>{nav}</header>"
+            f"<div id='wrap'>{open_tag}{body}{credit}{close_tag}{related}</div>{script}{footer}</body></html>")
+
+
+def bench_extract(args) -> int:
+    rng = random.Random(args.seed)
+    companies = load_company_names(args.csv) or ["삼성전자"]
+    pages = []
+    for _ in range(args.pages):
+        template = rng.choice(PAGE_TEMPLATES)
+        pages.append((f"https://{template[0]}/article/{rng.randint(1, 10**6)}", make_article_page(rng, companies, template)))
+    source = f"synthetic={len(pages)}"
+    if args.corpus:
+        paths = sorted(glob.glob(os.path.join(args.corpus, '**', '*.html'), recursive=True))
+        for path in paths:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            try:
+                html = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                html = raw.decode('cp949', errors='ignore')
+            # 디렉터리 이름을 호스트로 사용 (예: corpus/n.news.naver.com/123.html)
+            pages.append((f"https://{os.path.basename(os.path.dirname(path))}/{os.path.basename(path)}", html))
+        source += f" corpus={len(paths)}"
+
+    agree = sum(legacy_parse_article_html(html) == parse_article_html(html, url) for url, html in pages)
+
+    def peak_kb(fn) -> float:
+        peak = 0
+        tracemalloc.start()
+        for url, html in pages:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn(url, html)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+        return peak / 1024
+
+    impls = [
+        ("bs4", lambda url, html: legacy_parse_article_html(html)),
+        ("lxml", lambda url, html: parse_article_html(html, url)),
+    ]
+    mb = sum(len(html.encode('utf-8')) for _, html in pages) / 1e6
+    print(f"{source} size={mb:.1f}MB")
+    print(f"{'impl':<8}{'pages/s':>10}{'peak(KB/page)':>16}")
+    rates = []
+    for name, fn in impls:
+        t = timeit(lambda: [fn(url, html) for url, html in pages], args.repeat)
+        rates.append(len(pages) / t)
+        print(f"{name:<8}{rates[-1]:>10.1f}{peak_kb(fn):>16.0f}")
+    print(f"speedup={rates[1] / rates[0]:.1f}x identical={agree}/{len(pages)} ({agree / len(pages):.1%})")
+    print("(메모리는 tracemalloc 기준 — lxml(libxml2) 내부 C 할당은 포함되지 않음)")
+    return 0 if agree / len(pages) >= args.min_agreement else 1
+
+
+# ═══════════════════════════════════════════
+# [stage] 다운로드(비동기) → 파싱/필터(워커) 처리량
+# ═══════════════════════════════════════════
+async def run_stage(kind: str, workers: int, pages: List[Tuple[str, str]], target: str,
+                    regex_cache: RegexCache, concurrency: int, latency: float) -> Tuple[float, int]:
+    config = Config("", "", "", "")
+    stage = ParseStage(config, regex_cache, executor=kind, workers=workers)
+    sem = asyncio.Semaphore(concurrency)
+    # 워커 기동 시간은 제외
+    await stage.parse("<html></html>")
+
+    async def one(url, html):
+        async with sem:
+            await asyncio.sleep(latency)  # 네트워크 대기 흉내
+            body = await stage.parse(html, url)
+            return await stage.check(body, target)
+
+    t0 = time.perf_counter()
+    kept = sum(await asyncio.gather(*[one(url, html) for url, html in pages]))
+    elapsed = time.perf_counter() - t0
+    await asyncio.to_thread(stage.close)
+    return elapsed, kept
+
+
+def bench_stage(args) -> int:
+    rng = random.Random(args.seed)
+    companies = load_company_names(args.csv) or ["삼성전자"]
+    target = companies[0]
+    pages = []
+    for _ in range(args.pages):
+        template = rng.choice(PAGE_TEMPLATES)
+        pages.append((f"https://{template[0]}/article/{rng.randint(1, 10**6)}",
+                      make_article_page(rng, [target] * 5 + companies[1:6], template)))
+    regex_cache = RegexCache(companies)
+
+    print(f"pages={len(pages)} concurrency={args.concurrency} latency={args.latency}s cores={os.cpu_count()}")
+    print(f"{'executor':<10}{'workers':>8}{'pages/s':>10}{'kept':>6}")
+    kept_counts = set()
+    for kind in args.executors.split(','):
+        workers = 1 if kind == 'inline' else args.workers
+        elapsed, kept = asyncio.run(run_stage(kind, workers, pages, target, regex_cache,
+                                              args.concurrency, args.latency))
+        kept_counts.add(kept)
+        print(f"{kind:<10}{workers:>8}{len(pages) / elapsed:>10.1f}{kept:>6}")
+    return 0 if len(kept_counts) == 1 else 1
+
+
+# ═══════════════════════════════════════════
+# [importtime] 모듈 import 비용 회귀 검사
+# ═══════════════════════════════════════════
+# 모듈별 import 시간 상한(ms) — 새 프로세스에서 측정한 누적 시간
+IMPORT_BUDGETS_MS = {
+    'cache': 60,
+    'analyzer': 400,
+    'universe': 400,
+    'database': 450,
+    'export': 450,
+    'pipeline': 500,
+    'worker': 500,
+    'cli': 500,
+}
+# 첫 사용 시점에 로드해야 하는 무거운 의존성 — 위 모듈 import만으로 올라오면 실패
+LAZY_MODULES = ('pandas', 'OpenDartReader', 'bs4', 'requests', 'aiohttp', 'openai', 'openpyxl')
+
+
+def measure_import(module: str) -> Tuple[float, List[str]]:
+    """새 인터프리터에서 `import module` — (누적 import 시간 ms, 함께 로드된 LAZY_MODULES)"""
+    code = f"import sys, {module}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} 실패: {proc.stderr.strip().splitlines()[-1]}")
+    # 'import time: self [us] | cumulative | imported package'
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = int(parts[1])
+    return cumulative / 1000, [m for m in proc.stdout.strip().split(',') if m]
+
+
+def bench_importtime(args) -> int:
+    modules = args.modules.split(',') if args.modules else list(IMPORT_BUDGETS_MS)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print(f"{'module':<12}{'ms':>9}{'budget':>9}{'baseline':>10}  eager")
+    results, failed = {}, False
+    for module in modules:
+        samples = [measure_import(module) for _ in range(args.repeat)]
+        ms = min(t for t, _ in samples)
+        eager = sorted(set().union(*(loaded for _, loaded in samples)))
+        results[module] = round(ms, 1)
+        budget = IMPORT_BUDGETS_MS.get(module, float('inf')) * args.budget_scale
+        base = baseline.get(module)
+        # 기준 대비 허용 폭: 비율 + 고정(ms) — 작은 모듈의 측정 잡음 흡수
+        limit = min(budget, base * (1 + args.tolerance) + 10) if base else budget
+        ok = ms <= limit and not eager
+        failed |= not ok
+        print(f"{module:<12}{ms:>9.1f}{budget:>9.0f}{base if base else '-':>10}  "
+              f"{','.join(eager) or '-'}{'' if ok else '  ← FAIL'}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return 1 if failed else 0
+
+
+# ═══════════════════════════════════════════
+# [record] / [pipeline] 기록된 응답으로 뉴스·DART 파이프라인 재생
+# ═══════════════════════════════════════════
+# bench_fixtures/
+#   manifest.json                 기록 시각, 종목(→종목코드), 키워드, 기간
+#   naver/<종목명>.json           키워드 → 네이버 검색 API 응답 페이지 목록 (원본 JSON 그대로)
+#   articles/index.json           기사 URL → {file, content_type, status}
+#   articles/<sha1(URL)>.html     기사 원본 바이트
+#   dart/<종목명>.json            corp_code / 정기보고서 / '사업의 내용' 하위문서 목록 (오류 포함)
+#   dart/<rcept_no>/<n>.html      하위문서 원본
+FIXTURES_VERSION = 1
+NAVER_PATH = '/v1/search/news.json'
+
+
+def fixture_name(company: str) -> str:
+    # 파일 이름에 쓸 수 없는 문자만 치환
+    return re.sub(r'[\\/:*?"<>|]', '_', company) + '.json'
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+class FixtureWriter:
+    def __init__(self, root: str):
+        self.root = root
+        for sub in ('naver', 'articles', 'dart'):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+        self.index: Dict[str, Dict] = {}
+
+    def _write(self, rel: str, data: bytes):
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def _write_json(self, rel: str, obj):
+        self._write(rel, json.dumps(obj, ensure_ascii=False, indent=1).encode('utf-8'))
+
+    def article(self, url: str, content: bytes, content_type: str, status: int = 200):
+        file = url_key(url) + '.html'
+        self._write(os.path.join('articles', file), content)
+        self.index[url] = {'file': file, 'content_type': content_type, 'status': status}
+
+    def naver(self, company: str, pages: Dict[str, List[Dict]]):
+        self._write_json(os.path.join('naver', fixture_name(company)), pages)
+
+    def dart(self, company: str, record: Dict, docs: List[Tuple[str, bytes]]):
+        """record: corp_code / report_nm / rcept_no / error, docs: (제목, 하위문서 HTML)"""
+        record = dict(record, docs=[])
+        for i, (title, content) in enumerate(docs):
+            file = f"{record['rcept_no']}/{i}.html"
+            self._write(os.path.join('dart', file), content)
+            record['docs'].append({'title': title, 'file': file})
+        self._write_json(os.path.join('dart', fixture_name(company)), record)
+
+    def finish(self, companies: Dict[str, str], config: Config, source: str):
+        self._write_json(os.path.join('articles', 'index.json'), self.index)
+        self._write_json('manifest.json', {
+            'version': FIXTURES_VERSION, 'source': source,
+            'recorded_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'months_ago': config.MONTHS_AGO, 'keywords': config.KEYWORDS, 'companies': companies,
+        })
+
+
+class FixtureCorpus:
+    """bench_fixtures 읽기 — 재생 시각에 맞춰 pubDate를 옮김 (기록이 오래돼도 수집 기간 안에 들어오도록)"""
+    def __init__(self, root: str):
+        self.root = root
+        with open(os.path.join(root, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != FIXTURES_VERSION:
+            raise ValueError(f"{root}: 지원하지 않는 fixture 버전 {self.manifest.get('version')}")
+        with open(os.path.join(root, 'articles', 'index.json'), encoding='utf-8') as f:
+            self.articles: Dict[str, Dict] = json.load(f)
+        self.files = {entry['file']: entry for entry in self.articles.values()}
+        # 날짜 단위로만 옮김 — 시각까지 옮기면 기사가 달력 날짜 경계를 넘나들어(중복 제거는 날짜별) 실행 시각마다 결과가 달라짐
+        recorded = datetime.datetime.fromisoformat(self.manifest['recorded_at'])
+        self.shift = datetime.timedelta(days=(datetime.date.today() - recorded.date()).days)
+        self.hosts = sorted({urlsplit(url).hostname or '' for url in self.articles})
+
+    @property
+    def companies(self) -> Dict[str, str]:
+        return self.manifest['companies']
+
+    def fingerprint(self) -> str:
+        """기록 내용 해시 — 기록 시각은 제외 (같은 시드의 합성 fixture는 언제 만들어도 같은 값)"""
+        manifest = {k: v for k, v in self.manifest.items() if k != 'recorded_at'}
+        digest = hashlib.sha256(json.dumps(manifest, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        with open(os.path.join(self.root, 'articles', 'index.json'), 'rb') as f:
+            digest.update(f.read())
+        return digest.hexdigest()[:16]
+
+    def load(self, sub: str, company: str) -> Dict:
+        try:
+            with open(os.path.join(self.root, sub, fixture_name(company)), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def path(self, sub: str, rel: str) -> Optional[str]:
+        """fixture 디렉터리 밖을 가리키는 경로는 None"""
+        base = os.path.realpath(os.path.join(self.root, sub))
+        path = os.path.realpath(os.path.join(base, rel))
+        return path if path.startswith(base + os.sep) and os.path.isfile(path) else None
+
+
+class FixtureServer:
+    """네이버 검색 API / 기사 / DART 하위문서 재생 HTTP 서버
+
+    distinct_hosts면 기사 매체마다 다른 루프백 주소(127.0.x.y)를 배정 — 호스트별 슬롯과 선택자 힌트가 실제처럼 동작
+    (루프백 대역 전체를 쓸 수 없는 OS에서는 모두 127.0.0.1)
+    """
+    def __init__(self, corpus: FixtureCorpus, latency: float = 0.0, distinct_hosts: bool = True):
+        self.corpus = corpus
+        self.latency = latency
+        self._naver: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        main = self._serve('127.0.0.1')
+        self.base_url = f"http://127.0.0.1:{main.server_port}"
+        self.host_urls: Dict[str, str] = {}
+        for i, host in enumerate(corpus.hosts if distinct_hosts else []):
+            n = i + 1
+            ip = f"127.0.{n // 250}.{n % 250 + 1}"
+            try:
+                self.host_urls[host] = f"http://{ip}:{self._serve(ip).server_port}"
+            except OSError:
+                break
+
+    def _serve(self, ip: str):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive (실제 서버처럼 연결 재사용)
+
+            def do_GET(self):
+                fixture.respond(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((ip, 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def article_url(self, url: str) -> str:
+        base = self.host_urls.get(urlsplit(url).hostname or '', self.base_url)
+        return f"{base}/a/{url_key(url)}.html"
+
+    def _replay_item(self, item: Dict) -> Dict:
+        item = dict(item)
+        try:
+            pub = email.utils.parsedate_to_datetime(item['pubDate'])
+            item['pubDate'] = email.utils.format_datetime(pub + self.corpus.shift)
+        except (KeyError, TypeError, ValueError):
+            pass
+        for field in ('originallink', 'link'):
+            if item.get(field):
+                item[field] = self.article_url(item[field])
+        return item
+
+    def naver_response(self, query: str, start: int) -> Dict:
+        m = re.fullmatch(r'"(.+)" "(.+)"', query)
+        if not m:
+            return {'items': []}
+        with self._lock:
+            pages = self._naver.get(m.group(1))
+            if pages is None:
+                pages = self._naver[m.group(1)] = self.corpus.load('naver', m.group(1))
+        keyword_pages = pages.get(m.group(2), [])
+        page = (start - 1) // 100
+        if page >= len(keyword_pages):
+            return {'items': []}
+        data = keyword_pages[page]
+        return dict(data, items=[self._replay_item(item) for item in data.get('items', [])])
+
+    def respond(self, req):
+        parts = urlsplit(req.path)
+        if self.latency:
+            time.sleep(self.latency)
+        status, ctype, body = 404, 'text/plain', b'not recorded'
+        if parts.path == NAVER_PATH:
+            params = parse_qs(parts.query)
+            data = self.naver_response(params.get('query', [''])[0], int(params.get('start', ['1'])[0]))
+            status, ctype, body = 200, 'application/json; charset=utf-8', json.dumps(data, ensure_ascii=False).encode()
+        elif parts.path.startswith('/a/'):
+            entry = self.corpus.files.get(parts.path[3:])
+            path = entry and self.corpus.path('articles', entry['file'])
+            if path:
+                with open(path, 'rb') as f:
+                    status, ctype, body = entry.get('status', 200), entry.get('content_type') or 'text/html', f.read()
+        elif parts.path.startswith('/dart/'):
+            path = self.corpus.path('dart', parts.path[6:])
+            if path:
+                with open(path, 'rb') as f:
+                    status, ctype, body = 200, 'text/html; charset=utf-8', f.read()
+        req.send_response(status)
+        req.send_header('Content-Type', ctype)
+        req.send_header('Content-Length', str(len(body)))
+        req.end_headers()
+        req.wfile.write(body)
+
+
+def _serve_fixtures(root: str, latency: float, distinct_hosts: bool, conn):
+    server = FixtureServer(FixtureCorpus(root), latency, distinct_hosts)
+    conn.send((server.base_url, len(server.host_urls)))
+    conn.close()
+    threading.Event().wait()
+
+
+@contextmanager
+def fixture_server(root: str, latency: float, distinct_hosts: bool) -> Iterator[Tuple[str, int]]:
+    """별도 프로세스에서 재생 서버 실행 — 측정 대상 프로세스의 GIL/메모리와 분리. (base_url, 매체 주소 수)"""
+    ctx = multiprocessing.get_context('spawn')
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_serve_fixtures, args=(root, latency, distinct_hosts, child), daemon=True)
+    proc.start()
+    try:
+        try:
+            if not parent.poll(60):
+                raise EOFError
+            yield parent.recv()
+        except EOFError:
+            raise RuntimeError("fixture 재생 서버를 시작하지 못했습니다") from None
+    finally:
+        proc.terminate()
+        proc.join()
+
+
+class FixtureDartProcessor(DartProcessor):
+    """OpenDART API 응답(corp_code / 보고서 목록 / 하위문서 목록)만 기록으로 대체 — 하위문서 다운로드·파싱은 실제 코드"""
+    def __init__(self, corpus: FixtureCorpus, base_url: str):
+        self.dart = None
+        self.corp_index = None
+        self.base_url = base_url
+        self.records = {name: corpus.load('dart', name) for name in corpus.companies}
+        self._by_code = {r['corp_code']: r for r in self.records.values() if r.get('corp_code')}
+        self._by_rcept = {r['rcept_no']: r for r in self.records.values() if r.get('rcept_no')}
+
+    def find_listed_corp_code(self, company_name: str, stock_code: str = None) -> Optional[str]:
+        return self.records.get(company_name, {}).get('corp_code') or None
+
+    def latest_report(self, code: str) -> Tuple[str, str, str]:
+        rec = self._by_code[code]
+        if not rec.get('rcept_no'):
+            return "", "", rec.get('error') or "최근 1년 내 조회된 공시가 없습니다."
+        return rec['report_nm'], rec['rcept_no'], ""
+
+    def business_docs(self, rcp_no: str) -> Tuple[List[Dict], str]:
+        rec = self._by_rcept[rcp_no]
+        docs = [{'title': d['title'], 'url': f"{self.base_url}/dart/{d['file']}"} for d in rec.get('docs', [])]
+        return docs, "" if docs else (rec.get('error') or "'사업의 내용' 섹션 없음")
+
+
+# --- 기록 ---
+async def record_naver_keyword(session, config: Config, limiter: RateLimiter, company: str, keyword: str,
+                               cutoff: datetime.datetime) -> List[Dict]:
+    """_search_keyword와 같은 페이징 — 응답 JSON을 그대로 보관"""
+    pages = []
+    query = quote(f'"{company}" "{keyword}"')
+    for start in range(1, 1001, 100):
+        data = None
+        for attempt in range(config.RETRY_COUNT):
+            await limiter.acquire()
+            async with session.get(f"{config.NAVER_SEARCH_URL}?query={query}&display=100&start={start}&sort=date") as resp:
+                if resp.status == 429:
+                    limiter.backoff(0.5 * (2 ** attempt))
+                    continue
+                resp.raise_for_status()
+                data = await resp.json()
+                break
+        if not data:
+            break
+        pages.append(data)
+        items = data.get('items', [])
+        dates = [parse_date(item.get('pubDate', '')) for item in items]
+        if not items or any(d is None or d < cutoff for d in dates):
+            break
+    return pages
+
+
+async def record_article(session, sem: asyncio.Semaphore, writer: FixtureWriter, url: str, max_bytes: int):
+    async with sem:
+        try:
+            async with session.get(url) as resp:
+                content = await resp.content.read(max_bytes)
+                writer.article(url, content, resp.headers.get('Content-Type', ''), resp.status)
+        except Exception as e:
+            # 기록하지 않은 기사는 재생 시 404 — 실제 다운로드 실패와 같은 경로
+            print(f"  기사 기록 실패 {url}: {type(e).__name__}")
+
+
+def record_dart(config: Config, company: str, stock_code: Optional[str]) -> Tuple[Dict, List[Tuple[str, bytes]]]:
+    import requests
+    dart = get_dart_processor(config.DART_API_KEY)
+    record = {'corp_code': '', 'report_nm': '', 'rcept_no': '', 'error': ''}
+    docs = []
+    record['corp_code'] = dart.find_listed_corp_code(company, stock_code) or ''
+    if record['corp_code']:
+        record['report_nm'], record['rcept_no'], record['error'] = dart.latest_report(record['corp_code'])
+    if record['rcept_no']:
+        doc_list, record['error'] = dart.business_docs(record['rcept_no'])
+        for doc in doc_list:
+            resp = requests.get(doc['url'], headers={'User-Agent': 'Mozilla/5.0'}, timeout=30)
+            if resp.status_code == 200:
+                docs.append((doc['title'], resp.content))
+    return record, docs
+
+
+async def record_live(writer: FixtureWriter, config: Config, companies: Dict[str, str], max_articles: int,
+                      concurrency: int, with_dart: bool):
+    import aiohttp
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=config.MONTHS_AGO * 30)
+    limiter = get_naver_limiter(config)
+    naver_headers = {"X-Naver-Client-Id": config.CLIENT_ID, "X-Naver-Client-Secret": config.CLIENT_SECRET}
+    web_headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+    timeout = aiohttp.ClientTimeout(total=config.REQUEST_TIMEOUT)
+    sem = asyncio.Semaphore(concurrency)
+    async with aiohttp.ClientSession(headers=naver_headers) as naver, \
+            aiohttp.ClientSession(headers=web_headers, timeout=timeout) as web:
+        for name, stock_code in companies.items():
+            pages = dict(zip(config.KEYWORDS, await asyncio.gather(*[
+                record_naver_keyword(naver, config, limiter, name, keyword, cutoff) for keyword in config.KEYWORDS])))
+            writer.naver(name, pages)
+            links = [item.get('originallink') or item.get('link')
+                     for keyword_pages in pages.values() for page in keyword_pages for item in page.get('items', [])]
+            links = [url for url in dict.fromkeys(links) if url][:max_articles]
+            await asyncio.gather(*[record_article(web, sem, writer, url, config.FETCH_MAX_BYTES) for url in links])
+            if with_dart:
+                writer.dart(name, *await asyncio.to_thread(record_dart, config, name, stock_code))
+            print(f"{name}: 검색 {sum(len(p) for p in pages.values())}페이지, 기사 {len(links)}건")
+
+
+def record_synthetic(writer: FixtureWriter, config: Config, companies: List[str], rng: random.Random,
+                     articles_per_company: int):
+    """합성 코퍼스 — 키워드마다 같은 기사 풀에서 일부를 돌려줌 (실제 검색처럼 키워드 간 중복 발생)
+
+    기사 시각은 기록일 자정 기준 — 같은 시드면 하루 중 언제 기록해도 날짜 구성이 같음
+    (재생 시 날짜 단위로 옮기므로 수집 기간 끝의 이틀은 비워 둠 — 자정을 넘겨 기록해도 기간 안)
+    """
+    now = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    window = (config.MONTHS_AGO * 30 - 2) * 24 * 3600
+    for name in companies:
+        others = [c for c in rng.sample(companies, min(5, len(companies))) if c != name]
+        pool = []
+        for title in make_headlines(rng, name, articles_per_company):
+            template = rng.choice(PAGE_TEMPLATES)
+            url = f"https://{template[0]}/article/{rng.randint(1, 10**9)}"
+            pub = now - datetime.timedelta(seconds=rng.randint(0, window))
+            pool.append({'title': title.replace(name, f"<b>{name}</b>", 1), 'originallink': url, 'link': url,
+                         'description': '', 'pubDate': email.utils.format_datetime(pub.astimezone())})
+            if rng.random() < 0.9:  # 나머지는 다운로드 실패(404)
+                writer.article(url, make_article_page(rng, [name] * 5 + others, template).encode('utf-8'),
+                               'text/html; charset=utf-8')
+        pages = {}
+        for keyword in config.KEYWORDS:
+            items = rng.sample(pool, rng.randint(0, len(pool) // 2))
+            items.sort(key=lambda item: email.utils.parsedate_to_datetime(item['pubDate']), reverse=True)
+            pages[keyword] = [{'total': len(items), 'start': i + 1, 'display': 100, 'items': items[i:i + 100]}
+                              for i in range(0, len(items), 100)]
+        writer.naver(name, pages)
+        docs = [(f"{i + 1}. {rng.choice(FILLER_WORDS)} {rng.choice(FILLER_WORDS)}",
+                 f"<html><body><h3>{name}</h3><p>{make_text(rng, [name] + others, rng.randint(3000, 20000))}</p>"
+                 f"</body></html>".encode('utf-8')) for i in range(rng.randint(2, 6))]
+        writer.dart(name, {'corp_code': f"{rng.randint(0, 99999999):08d}", 'report_nm': "사업보고서 (합성)",
+                           'rcept_no': f"{now:%Y%m%d}{rng.randint(0, 999999):06d}", 'error': ''}, docs)
+
+
+def bench_record(args) -> int:
+    if args.synthetic:
+        config = Config("", "", "", "")
+        companies = load_company_names(args.csv) or ["삼성전자"]
+        rng = random.Random(args.seed)
+        names = rng.sample(companies, min(args.synthetic, len(companies)))
+        companies = {name: '' for name in names}
+        writer = FixtureWriter(args.out)
+        record_synthetic(writer, config, names, rng, args.articles)
+        writer.finish(companies, config, 'synthetic')
+    else:
+        from pipeline import config_from_secrets, load_secrets
+        from universe import load_company_universe
+        if not args.companies:
+            print("기록할 종목명을 지정하세요 (또는 --synthetic N)")
+            return 2
+        config = config_from_secrets(load_secrets())
+        _, _, code_map = load_company_universe(args.csv, config.CACHE_DIR)
+        companies = {name: code_map.get(name, '') for name in args.companies}
+        writer = FixtureWriter(args.out)
+        asyncio.run(record_live(writer, config, companies, args.articles, args.concurrency, not args.no_dart))
+        writer.finish(companies, config, 'live')
+    print(f"{args.out}: 종목 {len(companies)}개, 기사 {len(writer.index)}건")
+    return 0
+
+
+# --- 재생 ---
+def peak_rss_mb() -> float:
+    """이 프로세스의 최대 RSS(MB) — resource 모듈이 없는 OS는 0"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    scale = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss: macOS는 바이트, Linux는 KB
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6, 1)
+
+
+def worker_peak_rss_mb(stage: ParseStage) -> float:
+    """파싱 워커 프로세스 중 최대 RSS(MB) — /proc의 VmHWM (Linux 외에는 0)"""
+    # forkserver 워커는 손자 프로세스라 RUSAGE_CHILDREN에 잡히지 않음 → 종료 전에 pid별로 읽음
+    peak = 0.0
+    for pid in list(getattr(stage.executor, '_processes', None) or {}):
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        peak = max(peak, int(line.split()[1]) / 1024)
+        except OSError:
+            pass
+    return round(peak, 1)
+
+
+async def run_offline_pipeline(corpus: FixtureCorpus, base_url: str, config: Config, regex_cache: RegexCache,
+                               companies: List[str], concurrency: int, with_dart: bool) -> Tuple[List[Dict], float]:
+    """AnalysisEngine.analyze_company에서 GPT/DB를 뺀 경로 (뉴스 + DART 동시 진행) — (종목별 결과, 파싱 워커 최대 RSS)"""
+    dart = FixtureDartProcessor(corpus, base_url) if with_dart else None
+    naver_sem = asyncio.Semaphore(config.NAVER_CONCURRENCY)
+    article_sem = asyncio.Semaphore(config.MAX_CONCURRENT)
+    batch_sem = asyncio.Semaphore(concurrency)
+    stage = ParseStage(config, regex_cache)
+    await stage.parse("<html></html>")  # 워커 기동 시간은 제외
+
+    async def dart_stage(name: str) -> Tuple[str, str, str]:
+        with metrics.timer('dart'):
+            return await dart.process_async(client, name, corpus.companies.get(name))
+
+    async def one(name: str) -> Dict:
+        async with batch_sem:
+            with metrics.trace() as tr, metrics.timer('company'):
+                jobs = [run_news_pipeline(name, config, regex_cache, semaphore=article_sem,
+                                          naver_semaphore=naver_sem, client=client, stage=stage)]
+                if dart:
+                    jobs.append(dart_stage(name))
+                results = await asyncio.gather(*jobs)
+        return {'company': name, 'kept': results[0][1], 'dart_chars': len(results[1][1]) if dart else 0,
+                'trace': tr.as_dict()}
+
+    try:
+        async with HTTPClient(config) as client:
+            events = await asyncio.gather(*[one(name) for name in companies])
+        return events, worker_peak_rss_mb(stage)
+    finally:
+        await asyncio.to_thread(stage.close)
+
+
+# 단계별 p95를 기준과 비교할 최소 호출 수
+MIN_STAGE_SAMPLES = 30
+
+
+def compare_pipeline_baseline(result: Dict, base: Dict, tolerance: float) -> List[str]:
+    changed = [k for k in ('fixtures', 'companies', 'executor', 'latency') if base.get(k) != result[k]]
+    if changed:
+        print(f"주의: 기준과 설정이 다름 ({', '.join(changed)}) — 비교 결과는 참고용")
+    problems = []
+    if base.get('fixtures') == result['fixtures'] and base.get('articles_kept') != result['articles_kept']:
+        problems.append(f"통과 기사 수 {base.get('articles_kept')} → {result['articles_kept']} (같은 fixture)")
+    if result['articles_per_sec'] < base.get('articles_per_sec', 0) * (1 - tolerance):
+        problems.append(f"articles/s {base['articles_per_sec']} → {result['articles_per_sec']}")
+    for stage, s in result['stages'].items():
+        b = base.get('stages', {}).get(stage)
+        # 호출 수가 적은 단계의 p95는 사실상 최댓값 — 비교하지 않음 (전체 속도는 articles/s로 확인)
+        if not b or min(s['count'], b['count']) < MIN_STAGE_SAMPLES:
+            continue
+        # 짧은 단계의 측정 잡음은 고정 허용치(5ms)로 흡수
+        if s['p95'] > b['p95'] * (1 + tolerance) + 0.005:
+            problems.append(f"{stage} p95 {b['p95']:.3f}s → {s['p95']:.3f}s")
+    for key in ('peak_rss_mb', 'peak_rss_workers_mb'):
+        if base.get(key) and result[key] > base[key] * (1 + tolerance):
+            problems.append(f"{key} {base[key]}MB → {result[key]}MB")
+    return problems
+
+
+def bench_pipeline(args) -> int:
+    if not os.path.exists(os.path.join(args.fixtures, 'manifest.json')):
+        print(f"{args.fixtures}에 fixture가 없습니다 — 먼저 `python benchmark.py --seed 7 record --synthetic 4` "
+              f"또는 `python benchmark.py record <종목명>...`")
+        return 2
+    corpus = FixtureCorpus(args.fixtures)
+    companies = args.companies.split(',') if args.companies else list(corpus.companies)
+    if corpus.manifest.get('keywords') != Config("", "", "", "").KEYWORDS:
+        print("주의: 기록 시점과 KEYWORDS가 다름 — 기록되지 않은 키워드는 빈 결과")
+    regex_cache = RegexCache(load_company_names(args.csv) or list(corpus.companies))
+
+    runs = []
+    with fixture_server(args.fixtures, args.latency, not args.single_host) as (base_url, hosts):
+        config = Config("bench", "bench", "", "")
+        config.NAVER_SEARCH_URL = base_url + NAVER_PATH
+        config.MONTHS_AGO = corpus.manifest.get('months_ago', config.MONTHS_AGO)
+        config.INCREMENTAL_NEWS = False
+        config.USE_CONTENT_CACHE = False
+        if args.executor:
+            config.PARSE_EXECUTOR = args.executor
+        if args.workers:
+            config.PARSE_WORKERS = args.workers
+        if args.naver_rps is not None:
+            config.NAVER_RPS = args.naver_rps
+        print(f"fixtures={args.fixtures} ({corpus.manifest.get('source')}, {corpus.fingerprint()}) "
+              f"companies={len(companies)} hosts={hosts or 1} latency={args.latency}s "
+              f"executor={config.PARSE_EXECUTOR} concurrency={args.concurrency}")
+        for _ in range(args.repeat):
+            metrics.REGISTRY.reset()
+            t0 = time.perf_counter()
+            events, rss_workers = asyncio.run(run_offline_pipeline(corpus, base_url, config, regex_cache, companies,
+                                                                   args.concurrency, not args.no_dart))
+            wall = time.perf_counter() - t0
+            articles = metrics.REGISTRY.counter_values('articles_total', 'stage')
+            runs.append((wall, events, articles, metrics.REGISTRY.stage_summary(),
+                         metrics.REGISTRY.counter_values('articles_filtered_total', 'reason'), rss_workers))
+
+    wall, events, articles, stages, filtered, _ = min(runs, key=lambda r: r[0])
+    rss_self, rss_workers = peak_rss_mb(), max(r[5] for r in runs)
+    fetched = articles.get('fetched', 0)
+    result = {
+        'fixtures': corpus.fingerprint(), 'companies': len(companies), 'executor': config.PARSE_EXECUTOR,
+        'latency': args.latency, 'wall': round(wall, 3),
+        'articles_searched': articles.get('searched', 0), 'articles_fetched': fetched,
+        'articles_kept': articles.get('kept', 0), 'articles_per_sec': round(fetched / wall, 1) if wall else 0.0,
+        'peak_rss_mb': rss_self, 'peak_rss_workers_mb': rss_workers,
+        'stages': {stage: {k: s[k] for k in ('count', 'p50', 'p95', 'max')} for stage, s in stages.items()},
+        'filtered': filtered,
+    }
+    print(f"wall={wall:.2f}s (best of {len(runs)}) 검색 {result['articles_searched']} → 다운로드 {fetched} → "
+          f"통과 {result['articles_kept']}  {result['articles_per_sec']} articles/s  "
+          f"{len(companies) / wall * 60:.0f} 종목/분")
+    print(f"peak RSS: {rss_self}MB" + (f" (파싱 워커 최대 {rss_workers}MB)" if rss_workers else ""))
+    print(metrics.REGISTRY.stage_table())
+    print("걸러진 기사: " + ', '.join(f"{k} {v:.0f}" for k, v in sorted(filtered.items(), key=lambda kv: -kv[1])))
+    slowest = sorted(events, key=lambda e: -e['trace']['timings'].get('company', {}).get('seconds', 0))[:3]
+    for e in slowest:
+        top = list(e['trace']['timings'].items())[:4]
+        print(f"  느린 종목 {e['company']}: " + ', '.join(f"{k} {v['seconds']:.2f}s" for k, v in top))
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            problems = compare_pipeline_baseline(result, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        failed = bool(problems)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    return 1 if failed else 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="stock-analyzer 오프라인 벤치마크")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('regex', help="RegexCache 다중 패턴 매처 vs 기존 종목별 정규식")
+    p.add_argument('--csv', default='krx_stocks.csv')
+    p.add_argument('--titles', type=int, default=2000)
+    p.add_argument('--bodies', type=int, default=200)
+    p.set_defaults(func=bench_regex)
+
+    p = sub.add_parser('dedup', help="근접 중복 제거 (MinHash/LSH) vs 기존 전수 SequenceMatcher")
+    p.add_argument('--sizes', default='100,300,1000', help="하루 기사 수 (쉼표 구분)")
+    p.add_argument('--threshold', type=float, default=0.6)
+    p.add_argument('--exact-below', type=int, default=40)
+    p.add_argument('--num-perm', type=int, default=16)
+    p.add_argument('--bands', type=int, default=16)
+    p.add_argument('--stop-df', type=float, default=0.5)
+    p.add_argument('--min-agreement', type=float, default=0.98)
+    p.set_defaults(func=bench_dedup)
+
+    p = sub.add_parser('clean', help="clean_body_final 골든 출력 비교 + 처리량(MB/s)")
+    p.add_argument('--csv', default='krx_stocks.csv')
+    p.add_argument('--corpus', default=None, help="저장된 기사 HTML 디렉터리 (*.html, 하위 폴더 포함)")
+    p.add_argument('--samples', type=int, default=2000, help="합성 본문 개수")
+    p.set_defaults(func=bench_clean)
+
+    p = sub.add_parser('extract', help="기사 본문 추출 lxml vs 기존 BeautifulSoup (pages/s, 메모리 피크)")
+    p.add_argument('--csv', default='krx_stocks.csv')
+    p.add_argument('--corpus', default=None, help="저장된 기사 HTML 디렉터리 (<호스트>/<파일>.html)")
+    p.add_argument('--pages', type=int, default=300, help="합성 페이지 개수")
+    p.add_argument('--min-agreement', type=float, default=0.95, help="정제 결과가 같아야 하는 최소 비율")
+    p.set_defaults(func=bench_extract)
+
+    p = sub.add_parser('stage', help="ParseStage 실행기별 처리량 (inline/thread/process)")
+    p.add_argument('--csv', default='krx_stocks.csv')
+    p.add_argument('--pages', type=int, default=400)
+    p.add_argument('--executors', default='inline,thread,process')
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    p.add_argument('--concurrency', type=int, default=10, help="동시 다운로드 수 (MAX_CONCURRENT)")
+    p.add_argument('--latency', type=float, default=0.05, help="다운로드 1건당 대기(초)")
+    p.set_defaults(func=bench_stage)
+
+    p = sub.add_parser('importtime', help="모듈 import 시간 / 지연 로드 회귀 검사 (실패 시 종료 코드 1)")
+    p.add_argument('--modules', default=None, help="검사할 모듈 (쉼표 구분, 기본: 전체)")
+    p.add_argument('--budget-scale', type=float, default=1.0, help="느린 환경에서 상한 배율")
+    p.add_argument('--baseline', default=None, help="이전 측정 결과(JSON) — 기준보다 느려지면 실패")
+    p.add_argument('--tolerance', type=float, default=0.25, help="기준 대비 허용 증가율")
+    p.add_argument('--save-baseline', default=None, help="이번 측정 결과를 JSON으로 저장")
+    p.set_defaults(func=bench_importtime)
+
+    p = sub.add_parser('record', help="파이프라인 재생용 fixture 기록 (네이버 검색 응답 / 기사 HTML / DART 하위문서)")
+    p.add_argument('companies', nargs='*', help="기록할 종목명 (실제 API 호출)")
+    p.add_argument('--synthetic', type=int, default=0, help="네트워크 없이 N개 종목의 합성 fixture 생성")
+    p.add_argument('--out', default='bench_fixtures')
+    p.add_argument('--csv', default='krx_stocks.csv')
+    p.add_argument('--articles', type=int, default=150, help="종목당 기사 수 (실제 기록은 상한)")
+    p.add_argument('--concurrency', type=int, default=10, help="기사 동시 다운로드 수")
+    p.add_argument('--no-dart', action='store_true', help="DART 기록 생략")
+    p.set_defaults(func=bench_record)
+
+    p = sub.add_parser('pipeline', help="기록된 fixture로 뉴스+DART 파이프라인 재생 (articles/s, 단계별 p50/p95, 최대 RSS)")
+    p.add_argument('--fixtures', default='bench_fixtures')
+    p.add_argument('--csv', default='krx_stocks.csv')
+    p.add_argument('--companies', default=None, help="재생할 종목 (쉼표 구분, 기본: 전체)")
+    p.add_argument('--concurrency', type=int, default=10, help="동시 분석 종목 수 (BATCH_CONCURRENCY)")
+    p.add_argument('--executor', default=None, choices=['inline', 'thread', 'process'], help="PARSE_EXECUTOR")
+    p.add_argument('--workers', type=int, default=0, help="PARSE_WORKERS (0: 코어 수)")
+    p.add_argument('--latency', type=float, default=0.0, help="재생 서버 응답 지연(초) — 네트워크 흉내")
+    p.add_argument('--naver-rps', type=float, default=None, help="NAVER_RPS (0: 제한 없음)")
+    p.add_argument('--no-dart', action='store_true', help="DART 단계 생략")
+    p.add_argument('--single-host', action='store_true', help="모든 매체를 127.0.0.1 하나로 재생")
+    p.add_argument('--baseline', default=None, help="이전 결과(JSON) — 처리량/단계 p95/RSS가 나빠지면 실패")
+    p.add_argument('--tolerance', type=float, default=0.25, help="기준 대비 허용 악화율")
+    p.add_argument('--save-baseline', default=None, help="이번 결과를 JSON으로 저장")
+    p.set_defaults(func=bench_pipeline)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
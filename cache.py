@@ -0,0 +1,352 @@
+# cache.py
+"""로컬 디스크 캐시 (SQLite)"""
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Set
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.stock_analyzer')
+
+
+class SQLiteStore:
+    """스레드 공유 SQLite 연결 (WAL, autocommit)"""
+    SCHEMA = ""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def execute(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedContent(NamedTuple):
+    body: str
+    fetched_at: float
+    etag: str
+    last_modified: str
+
+
+class ContentCache(SQLiteStore):
+    """URL별 정제 본문 캐시
+
+    - ttl 이내 항목은 네트워크 없이 그대로 사용
+    - ttl이 지난 항목은 ETag/Last-Modified로 조건부 요청 (304면 재사용)
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (백그라운드 스레드)
+    - 조회 시각(accessed_at)은 모아서 TOUCH_BATCH건마다 한 번에 기록
+    - 키는 호출 측이 정함 (URL + 추출 로직 버전 — make_key)
+    """
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS content (
+            url TEXT PRIMARY KEY,
+            body TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            etag TEXT DEFAULT '',
+            last_modified TEXT DEFAULT '',
+            size INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_content_accessed ON content(accessed_at);
+    '''
+    EVICT_EVERY = 50
+    TOUCH_BATCH = 64
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_bytes: int = 512 * 1024 * 1024):
+        super().__init__(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self._touches: Dict[str, float] = {}
+        self._touch_lock = threading.Lock()
+        self._evicting = False
+        self._evict_requested = False
+
+    @staticmethod
+    def make_key(url: str, version: str = '') -> str:
+        """추출 로직 버전이 바뀌면 다른 키 — 이전 로직으로 만든 결과는 LRU로 자연 소멸"""
+        return f"{url}#v{version}" if version else url
+
+    def get(self, url: str) -> Optional[CachedContent]:
+        rows = self.execute('SELECT body, fetched_at, etag, last_modified FROM content WHERE url = ?', (url,))
+        if not rows:
+            return None
+        with self._touch_lock:
+            self._touches[url] = time.time()
+            flush = len(self._touches) >= self.TOUCH_BATCH
+        if flush:
+            self.flush_touches()
+        return CachedContent(*rows[0])
+
+    def flush_touches(self):
+        """모아 둔 조회 시각을 한 번에 기록"""
+        with self._touch_lock:
+            touches, self._touches = self._touches, {}
+        if touches:
+            with self._lock:
+                self._conn.executemany('UPDATE content SET accessed_at = ? WHERE url = ?',
+                                       [(at, url) for url, at in touches.items()])
+
+    def is_fresh(self, entry: CachedContent) -> bool:
+        return time.time() - entry.fetched_at < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CachedContent]) -> Dict[str, str]:
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def put(self, url: str, body: str, etag: str = '', last_modified: str = ''):
+        now = time.time()
+        self.execute(
+            'INSERT OR REPLACE INTO content (url, body, fetched_at, accessed_at, etag, last_modified, size) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (url, body, now, now, etag or '', last_modified or '', len(body.encode('utf-8')) + len(url)))
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict_in_background()
+
+    def touch(self, url: str):
+        """304 Not Modified — 재검증 시각 갱신"""
+        now = time.time()
+        self.execute('UPDATE content SET fetched_at = ?, accessed_at = ? WHERE url = ?', (now, now, url))
+
+    def total_bytes(self) -> int:
+        return self.execute('SELECT COALESCE(SUM(size), 0) FROM content')[0][0]
+
+    def close(self):
+        self.flush_touches()
+        super().close()
+
+    def evict_in_background(self):
+        """evict()를 데몬 스레드에서 실행 (실행 중에 다시 요청되면 끝난 뒤 한 번 더)"""
+        with self._touch_lock:
+            self._evict_requested = True
+            if self._evicting:
+                return
+            self._evicting = True
+
+        def run():
+            while True:
+                with self._touch_lock:
+                    if not self._evict_requested:
+                        self._evicting = False
+                        return
+                    self._evict_requested = False
+                try:
+                    self.evict()
+                except sqlite3.Error:
+                    pass  # 닫힌 캐시 등 — 다음 요청 때 다시 시도
+
+        threading.Thread(target=run, name='content-cache-evict', daemon=True).start()
+
+    def evict(self):
+        """용량 초과 시 LRU 순으로 max_bytes의 90%까지 삭제"""
+        self.flush_touches()
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        target = total - int(self.max_bytes * 0.9)
+        victims = []
+        freed = 0
+        for url, size in self.execute('SELECT url, size FROM content ORDER BY accessed_at'):
+            victims.append((url,))
+            freed += size
+            if freed >= target:
+                break
+        with self._lock:
+            self._conn.executemany('DELETE FROM content WHERE url = ?', victims)
+
+
+class ResponseCache(SQLiteStore):
+    """GPT 응답 캐시 — 키: sha256(모델, 프롬프트 버전, 프롬프트)
+
+    - 프롬프트 템플릿을 고치면 버전을 올려 기존 응답을 자동 무효화
+    - ttl이 지난 응답은 미스로 처리하고 다음 put에서 덮어씀
+    - clear()로 전체(또는 특정 모델) 삭제
+    """
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            version TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            hits INTEGER DEFAULT 0
+        );
+    '''
+
+    def __init__(self, path: str, ttl: float = 90 * 24 * 3600):
+        super().__init__(path)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, version: str, prompt: str) -> str:
+        h = hashlib.sha256()
+        for part in (model, version, prompt):
+            h.update(part.encode('utf-8'))
+            h.update(b'\x00')
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        rows = self.execute('SELECT response, created_at FROM responses WHERE key = ?', (key,))
+        if not rows or time.time() - rows[0][1] >= self.ttl:
+            self.misses += 1
+            return None
+        self.execute('UPDATE responses SET hits = hits + 1 WHERE key = ?', (key,))
+        self.hits += 1
+        return rows[0][0]
+
+    def put(self, key: str, model: str, version: str, response: str):
+        self.execute(
+            'INSERT OR REPLACE INTO responses (key, model, version, response, created_at) VALUES (?, ?, ?, ?, ?)',
+            (key, model, version, response, time.time()))
+
+    def clear(self, model: str = None) -> int:
+        """삭제된 응답 수 반환"""
+        sql, params = ('DELETE FROM responses WHERE model = ?', (model,)) if model else ('DELETE FROM responses', ())
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': self.execute('SELECT COUNT(*) FROM responses')[0][0]}
+
+
+class NewsStateStore(SQLiteStore):
+    """종목별 증분 뉴스 수집 상태
+
+    - watermarks: 마지막 수집에서 본 가장 최근 기사 시각 (다음 검색은 여기까지만 페이징)
+    - seen_urls: 이미 검토한 기사 URL (필터에서 탈락한 것 포함 — 다시 받지 않음)
+    - kept_articles: 필터를 통과한 기사와 본문 (다음 요약에 다시 사용)
+    """
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS watermarks (
+            company TEXT PRIMARY KEY,
+            newest_pub TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS seen_urls (
+            company TEXT NOT NULL,
+            url TEXT NOT NULL,
+            pub_date TEXT NOT NULL,
+            PRIMARY KEY (company, url)
+        );
+        CREATE TABLE IF NOT EXISTS kept_articles (
+            company TEXT NOT NULL,
+            url TEXT NOT NULL,
+            title TEXT NOT NULL,
+            date TEXT,
+            pub_date TEXT NOT NULL,
+            body TEXT NOT NULL,
+            PRIMARY KEY (company, url)
+        );
+    '''
+
+    def get_watermark(self, company: str) -> Optional[datetime.datetime]:
+        rows = self.execute('SELECT newest_pub FROM watermarks WHERE company = ?', (company,))
+        return datetime.datetime.fromisoformat(rows[0][0]) if rows else None
+
+    def seen_urls(self, company: str) -> Set[str]:
+        return {r[0] for r in self.execute('SELECT url FROM seen_urls WHERE company = ?', (company,))}
+
+    def kept_articles(self, company: str, since: datetime.datetime) -> List[Dict]:
+        rows = self.execute(
+            'SELECT url, title, date, pub_date, body FROM kept_articles WHERE company = ? AND pub_date >= ?',
+            (company, since.isoformat()))
+        return [{'link': url, 'title': title, 'date': date,
+                 'pub_date': datetime.datetime.fromisoformat(pub_date), 'body': body}
+                for url, title, date, pub_date, body in rows]
+
+    def record(self, company: str, newest: Optional[datetime.datetime], seen: List[Dict], kept: List[Dict],
+               window_start: datetime.datetime, dropped: List[str] = ()):
+        """이번 수집 결과 반영 + 수집 기간(window_start) 밖의 기록 / 다시 검사해 탈락한 기사(dropped) 정리 — 한 트랜잭션"""
+        with self._lock:
+            conn = self._conn
+            conn.execute('BEGIN')
+            try:
+                conn.executemany('INSERT OR IGNORE INTO seen_urls (company, url, pub_date) VALUES (?, ?, ?)',
+                                 [(company, a['link'], a['pub_date'].isoformat()) for a in seen])
+                conn.executemany(
+                    'INSERT OR REPLACE INTO kept_articles (company, url, title, date, pub_date, body) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    [(company, a['link'], a['title'], a.get('date', ''), a['pub_date'].isoformat(), a['body'])
+                     for a in kept])
+                if newest:
+                    conn.execute(
+                        'INSERT INTO watermarks (company, newest_pub, updated_at) VALUES (?, ?, ?) '
+                        'ON CONFLICT(company) DO UPDATE SET '
+                        'newest_pub = MAX(newest_pub, excluded.newest_pub), updated_at = excluded.updated_at',
+                        (company, newest.isoformat(), time.time()))
+                conn.executemany('DELETE FROM kept_articles WHERE company = ? AND url = ?',
+                                 [(company, url) for url in dropped])
+                cutoff = window_start.isoformat()
+                conn.execute('DELETE FROM seen_urls WHERE company = ? AND pub_date < ?', (company, cutoff))
+                conn.execute('DELETE FROM kept_articles WHERE company = ? AND pub_date < ?', (company, cutoff))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def reset(self, company: str = None):
+        """증분 상태 삭제 — 다음 수집은 전체 기간"""
+        for table in ('watermarks', 'seen_urls', 'kept_articles'):
+            if company:
+                self.execute(f'DELETE FROM {table} WHERE company = ?', (company,))
+            else:
+                self.execute(f'DELETE FROM {table}')
+
+
+_content_caches: Dict[str, ContentCache] = {}
+_response_caches: Dict[str, ResponseCache] = {}
+_news_states: Dict[str, NewsStateStore] = {}
+_cache_lock = threading.Lock()
+
+
+def get_content_cache(cache_dir: str, ttl: float, max_bytes: int) -> ContentCache:
+    """프로세스 전역 본문 캐시 공유"""
+    path = os.path.join(cache_dir, 'content.db')
+    with _cache_lock:
+        cache = _content_caches.get(path)
+        if cache is None:
+            cache = _content_caches[path] = ContentCache(path, ttl, max_bytes)
+        return cache
+
+
+def get_response_cache(cache_dir: str, ttl: float) -> ResponseCache:
+    """프로세스 전역 GPT 응답 캐시 공유"""
+    path = os.path.join(cache_dir, 'responses.db')
+    with _cache_lock:
+        cache = _response_caches.get(path)
+        if cache is None:
+            cache = _response_caches[path] = ResponseCache(path, ttl)
+        return cache
+
+
+def get_news_state(cache_dir: str) -> NewsStateStore:
+    """프로세스 전역 증분 뉴스 상태 공유"""
+    path = os.path.join(cache_dir, 'news.db')
+    with _cache_lock:
+        store = _news_states.get(path)
+        if store is None:
+            store = _news_states[path] = NewsStateStore(path)
+        return store
@@ -0,0 +1,197 @@
+# cli.py
+"""종목 일괄 분석 (UI 없이 실행 — cron 등)
+
+사용법:
+    python cli.py 삼성전자 000660                        # 종목명 또는 종목코드
+    python cli.py --file names.txt --concurrency 20     # 한 줄에 하나
+    python cli.py --all --checkpoint runs/nightly.jsonl --resume
+    python cli.py --all --enqueue                       # 직접 실행하지 않고 작업 큐에 등록 (worker.py가 처리)
+    python cli.py --file names.txt --metrics-out m.json # 단계별 소요 시간/카운터를 JSON으로 저장
+
+체크포인트(JSONL): 종목이 끝날 때마다 결과 1줄 추가.
+--resume이면 체크포인트에서 성공한 종목은 건너뛰고 나머지(실패 포함)만 다시 분석한다.
+각 줄의 trace에 종목별 단계 소요 시간이 들어가고, 종료 시 단계별 p50/p95 표를 출력한다.
+종료 코드: 모두 성공 0, 실패가 있으면 1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import metrics
+from analyzer import Config, RegexCache, normalize_stock_code
+from database import Database
+from metrics import log
+from pipeline import AnalysisEngine, config_from_secrets, load_secrets
+from universe import load_company_universe
+
+
+def resolve_targets(tokens: List[str], companies: List[str], code_map: Dict[str, str]) -> Tuple[List[str], List[str]]:
+    """종목명/종목코드 → 종목명 (순서 유지, 중복 제거) — 목록에 없는 이름은 그대로 두고 별도 반환"""
+    names = set(companies)
+    by_code = {normalize_stock_code(code): name for name, code in code_map.items() if code}
+    targets, unknown = [], []
+    for token in tokens:
+        token = token.strip()
+        if not token:
+            continue
+        name = token if token in names else by_code.get(normalize_stock_code(token))
+        if name is None:
+            # 종목 목록에 없어도 뉴스 검색은 가능 — 경고만 하고 분석
+            unknown.append(token)
+            name = token
+        targets.append(name)
+    return list(dict.fromkeys(targets)), unknown
+
+
+def read_checkpoint(path: str) -> Dict[str, Dict]:
+    """종목별 마지막 기록 (중단으로 잘린 줄은 무시)"""
+    records = {}
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[rec['company']] = rec
+    return records
+
+
+def summarize(events: List[Dict], wall: float) -> str:
+    ok = [e for e in events if e['ok']]
+    failed = [e for e in events if not e['ok']]
+    lines = [f"완료 {len(ok)} / 실패 {len(failed)} / 전체 {len(events)} — {wall:.0f}s, "
+             f"{len(events) / wall * 60 if wall else 0:.1f}종목/분"]
+    if ok:
+        times = sorted(e['elapsed'] for e in ok)
+        lines.append(f"종목당 소요: 중앙값 {times[len(times) // 2]:.1f}s, "
+                     f"p95 {times[min(len(times) - 1, int(len(times) * 0.95))]:.1f}s, 최대 {times[-1]:.1f}s, "
+                     f"기사 {sum(e['news_count'] for e in ok)}건")
+    if failed:
+        # 오류 유형(예외 이름)별 집계
+        by_kind: Dict[str, List[str]] = {}
+        for e in failed:
+            by_kind.setdefault(e['error'].split(':', 1)[0] or '?', []).append(e['company'])
+        lines.append("실패 유형:")
+        for kind, names in sorted(by_kind.items(), key=lambda kv: -len(kv[1])):
+            lines.append(f"  {kind} {len(names)}건: {', '.join(names[:10])}{' …' if len(names) > 10 else ''}")
+    stages = metrics.REGISTRY.stage_table()
+    if stages:
+        lines += ["단계별 소요 시간(초):", stages]
+    return '\n'.join(lines)
+
+
+async def run_cli(config: Config, regex_cache: RegexCache, db: Database, targets: List[str],
+                  code_map: Dict[str, str], checkpoint: str = None) -> List[Dict]:
+    """끝나는 순서대로 진행 상황 출력 + 체크포인트 기록"""
+    events = []
+    out = None
+    if checkpoint:
+        os.makedirs(os.path.dirname(os.path.abspath(checkpoint)), exist_ok=True)
+        out = open(checkpoint, 'a', encoding='utf-8')
+    try:
+        async with AnalysisEngine(config, regex_cache, db) as engine:
+            async for event in engine.run_batch(targets, code_map):
+                events.append(event)
+                if out:
+                    out.write(json.dumps({**event, 'at': datetime.now().isoformat(timespec='seconds')},
+                                         ensure_ascii=False) + '\n')
+                    out.flush()
+                mark = f"✓ {event['company']} ({event['elapsed']:.0f}s, 기사 {event['news_count']}건)" if event['ok'] \
+                    else f"✗ {event['company']} — {event['error']}"
+                log(f"[{len(events)}/{len(targets)}] {mark}", logging.INFO if event['ok'] else logging.WARNING,
+                    event='company_done' if event['ok'] else 'company_failed', company=event['company'],
+                    elapsed=round(event['elapsed'], 3), news_count=event['news_count'], error=event['error'],
+                    trace=event.get('trace'))
+    finally:
+        if out:
+            out.close()
+    return events
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="stock-analyzer 종목 일괄 분석")
+    parser.add_argument('targets', nargs='*', help="종목명 또는 종목코드")
+    parser.add_argument('--file', help="종목명/종목코드 목록 파일 (한 줄에 하나, #으로 시작하면 무시)")
+    parser.add_argument('--all', action='store_true', help="krx_stocks.csv 전체")
+    parser.add_argument('--csv', default='krx_stocks.csv')
+    parser.add_argument('--concurrency', type=int, default=None, help="동시 분석 종목 수 (기본: BATCH_CONCURRENCY)")
+    parser.add_argument('--limit', type=int, default=None, help="앞에서부터 N개만")
+    parser.add_argument('--checkpoint', default=None, help="진행 기록 JSONL 파일")
+    parser.add_argument('--resume', action='store_true', help="체크포인트에서 성공한 종목 건너뛰기")
+    parser.add_argument('--enqueue', action='store_true', help="작업 큐에 등록만 하고 종료")
+    parser.add_argument('--dry-run', action='store_true', help="대상 목록만 출력")
+    parser.add_argument('--json-logs', action='store_true', help="로그를 한 줄에 JSON 1개로 출력")
+    parser.add_argument('--metrics-port', type=int, default=None, help="실행 중 이 포트에서 /metrics (Prometheus) 제공")
+    parser.add_argument('--metrics-out', default=None, help="종료 시 계측 값(metrics.snapshot)을 저장할 JSON 파일")
+    args = parser.parse_args(argv)
+    if args.resume and not args.checkpoint:
+        parser.error("--resume에는 --checkpoint가 필요합니다")
+    metrics.configure_logging(args.json_logs)
+
+    secrets = load_secrets()
+    config = config_from_secrets(secrets)
+    if args.concurrency:
+        config.BATCH_CONCURRENCY = args.concurrency
+    companies, regex_cache, code_map = load_company_universe(args.csv, config.CACHE_DIR)
+    if regex_cache is None:
+        log(f"{args.csv}를 읽을 수 없습니다.")
+        return 2
+
+    tokens = list(args.targets)
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            tokens += [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    if args.all:
+        tokens += companies
+    targets, unknown = resolve_targets(tokens, companies, code_map)
+    if unknown:
+        log(f"종목 목록에 없음 (이름으로 분석): {', '.join(unknown[:20])}{' …' if len(unknown) > 20 else ''}")
+    if args.resume:
+        done = {name for name, rec in read_checkpoint(args.checkpoint).items() if rec.get('ok')}
+        skipped = [t for t in targets if t in done]
+        targets = [t for t in targets if t not in done]
+        if skipped:
+            log(f"체크포인트에서 완료된 {len(skipped)}개 건너뜀")
+    if args.limit:
+        targets = targets[:args.limit]
+    if not targets:
+        log("분석할 종목이 없습니다.")
+        return 0
+    if args.dry_run:
+        print('\n'.join(targets))
+        return 0
+
+    # 동시 분석 수만큼 DB 연결이 필요할 수 있음
+    db = Database(secrets.get("DATABASE_URL"), maxconn=max(10, config.BATCH_CONCURRENCY + 2))
+    try:
+        if args.enqueue:
+            added = db.enqueue_jobs(targets, code_map)
+            log(f"작업 큐 등록 {added}건 (이미 대기/실행 중 {len(targets) - added}건)")
+            return 0
+        if args.metrics_port:
+            metrics.start_http_server(args.metrics_port)
+        log(f"분석 시작 — {len(targets)}개 종목, 동시 {config.BATCH_CONCURRENCY}건")
+        started = time.perf_counter()
+        try:
+            events = asyncio.run(run_cli(config, regex_cache, db, targets, code_map, args.checkpoint))
+        except KeyboardInterrupt:
+            log("중단됨" + (f" — --resume으로 이어서 실행: {args.checkpoint}" if args.checkpoint else ""))
+            return 130
+        print(summarize(events, time.perf_counter() - started), flush=True)
+        return 0 if all(e['ok'] for e in events) else 1
+    finally:
+        db.close()
+        if args.metrics_out:
+            with open(args.metrics_out, 'w', encoding='utf-8') as f:
+                json.dump(metrics.REGISTRY.snapshot(), f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
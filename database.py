@@ -1,259 +1,687 @@
 # database.py
 import psycopg2
-from psycopg2.extras import RealDictCursor
-import pandas as pd
+import psycopg2.pool
+from psycopg2.extras import RealDictCursor, execute_values
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import os
 
+# 결과 전체 컬럼 (검색용 search_tsv 제외)
+RESULT_COLUMNS = ('id, company_name, dart_report, dart_result, dart_error, news_count, news_result, '
+                  'created_at, status, is_bookmarked, is_delete_candidate')
+# 목록용 요약 컬럼 (대용량 TEXT 본문 제외)
+SUMMARY_COLUMNS = ('id, company_name, dart_report, news_count, created_at, status, '
+                   'is_bookmarked, is_delete_candidate')
+# 세션 타임존 (created_at 등 TIMESTAMP 기본값 기준)
+SESSION_TIMEZONE = 'Asia/Seoul'
+
+
+def like_pattern(keyword: str) -> str:
+    """부분 일치 LIKE 패턴 (%, _ 는 문자 그대로 검색)"""
+    escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+# ts_headline 강조 구분자 (화면에서 <mark>로 치환)
+HIGHLIGHT_START, HIGHLIGHT_STOP = '\u00ab', '\u00bb'
+HEADLINE_OPTIONS = (f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, '
+                    'MaxFragments=2, MaxWords=20, MinWords=8, FragmentDelimiter=" … "')
+
+
+def tsquery_terms(keyword: str) -> str:
+    """검색어 → to_tsquery 문자열 — 단어별 접두 일치(수주 → 수주를/수주액), 모든 단어 AND"""
+    words = [w for w in re.findall(r"[^\s&|!():*<>'\\]+", keyword) if re.search(r'\w', w)]
+    return ' & '.join(f"'{w}':*" for w in words)
+
+
 class Database:
-    def __init__(self, connection_string: str = None):
+    def __init__(self, connection_string: str = None, minconn: int = None, maxconn: int = 10,
+                 acquire_timeout: float = 30.0, validate_idle: float = 30.0):
         self.connection_string = connection_string or os.environ.get('DATABASE_URL')
         if not self.connection_string:
             raise ValueError("DATABASE_URL이 설정되지 않았습니다.")
+        # psycopg2 풀은 쉬는 연결이 minconn개 이상이면 반납된 연결을 닫음 → 기본은 maxconn개 모두 유지
+        if minconn is None:
+            minconn = maxconn
+        
+        # 타임존은 접속 옵션으로 지정 — 연결마다 SET/commit 왕복 없음
+        # PgBouncer(transaction 모드)는 options 시작 파라미터를 거부 → 대여할 때마다 SET TIME ZONE으로 대체
+        self.set_timezone_on_checkout = False
+        try:
+            self.pool = psycopg2.pool.ThreadedConnectionPool(
+                minconn, maxconn, self.connection_string, options=f'-c timezone={SESSION_TIMEZONE}')
+        except psycopg2.OperationalError as e:
+            if 'options' not in str(e):
+                raise
+            self.pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, self.connection_string)
+            self.set_timezone_on_checkout = True
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.acquire_timeout = acquire_timeout
+        # 이보다 오래 쉬던 연결은 대여 전에 SELECT 1로 확인 (서버/방화벽이 끊은 연결 걸러냄)
+        self.validate_idle = validate_idle
+        # ThreadedConnectionPool은 소진 시 즉시 예외 → 세마포어로 대기시킴
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._stats_lock = threading.Lock()
+        self._stats = {'acquired': 0, 'in_use': 0, 'timeouts': 0, 'discarded': 0, 'validated': 0,
+                       'wait_total': 0.0, 'wait_max': 0.0}
+        # 풀에 쉬고 있는 연결 수 (풀은 처음에 minconn개를 열어 둠) / 연결별 마지막 반납 시각
+        self._idle = minconn
+        self._returned_at: Dict[int, float] = {}
+        self._pool_opened_at = time.monotonic()
         
         self.init_db()
     
-    def get_connection(self):
-        """데이터베이스 연결"""
-        conn = psycopg2.connect(self.connection_string)
-        cursor = conn.cursor()
-        cursor.execute("SET timezone = 'Asia/Seoul'")
-        conn.commit()
-        cursor.close()
-        return conn
+    def _checkout(self):
+        """풀에서 연결 1개 — 확인에 실패한 연결은 버리고 한 번 더 받음"""
+        for attempt in range(2):
+            conn = self.pool.getconn()
+            with self._stats_lock:
+                # 풀은 쉬는 연결이 있으면 그것부터 돌려줌 — 없으면 방금 새로 연 연결
+                from_idle = self._idle > 0
+                self._idle = max(0, self._idle - 1)
+                returned_at = self._returned_at.pop(id(conn), None)
+            if returned_at is None:
+                # 한 번도 반납되지 않은 연결: 풀 생성 때 열어 둔 것이면 그때부터 쉬던 것, 아니면 확인 불필요
+                returned_at = self._pool_opened_at if from_idle else time.monotonic()
+            idle_for = time.monotonic() - returned_at
+            try:
+                if conn.closed:
+                    raise psycopg2.InterfaceError("connection already closed")
+                if self.set_timezone_on_checkout:
+                    with conn.cursor() as cursor:
+                        cursor.execute('SET TIME ZONE %s', (SESSION_TIMEZONE,))
+                elif idle_for >= self.validate_idle:
+                    with conn.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                    with self._stats_lock:
+                        self._stats['validated'] += 1
+                return conn
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                self._discard(conn)
+                if attempt:
+                    raise
+    
+    def _discard(self, conn):
+        self.pool.putconn(conn, close=True)
+        with self._stats_lock:
+            self._stats['discarded'] += 1
+    
+    def _checkin(self, conn):
+        self.pool.putconn(conn)
+        # 풀은 쉬는 연결이 이미 minconn개면 반납 즉시 닫음
+        if not conn.closed:
+            with self._stats_lock:
+                self._idle += 1
+                self._returned_at[id(conn)] = time.monotonic()
+    
+    @contextmanager
+    def connection(self):
+        """풀에서 연결 대여 → 정상 종료 시 commit, 예외 시 rollback 후 반납"""
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._stats_lock:
+                self._stats['timeouts'] += 1
+            raise psycopg2.pool.PoolError(f"DB 연결 대기 시간 초과 ({self.acquire_timeout}s)")
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self._stats['acquired'] += 1
+            self._stats['in_use'] += 1
+            self._stats['wait_total'] += waited
+            self._stats['wait_max'] = max(self._stats['wait_max'], waited)
+        
+        conn = None
+        broken = False
+        try:
+            conn = self._checkout()
+            yield conn
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # 서버가 끊은 연결은 풀에 되돌리지 않음
+            broken = True
+            raise
+        except Exception:
+            if conn is not None and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if conn is not None:
+                if broken or conn.closed:
+                    self._discard(conn)
+                else:
+                    self._checkin(conn)
+            with self._stats_lock:
+                self._stats['in_use'] -= 1
+            self._slots.release()
+    
+    @contextmanager
+    def cursor(self, dict_rows: bool = False):
+        """connection() + 커서"""
+        with self.connection() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor) if dict_rows else conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+    
+    def pool_stats(self) -> Dict:
+        """풀 크기 / 사용 중·쉬는 연결 / 대기 시간 지표"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['idle'] = self._idle
+        stats['wait_avg'] = stats['wait_total'] / stats['acquired'] if stats['acquired'] else 0.0
+        stats.update(minconn=self.minconn, maxconn=self.maxconn)
+        return stats
+    
+    def close(self):
+        """풀의 모든 연결 종료"""
+        self.pool.closeall()
     
     def init_db(self):
         """데이터베이스 초기화"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analysis_results (
-                id SERIAL PRIMARY KEY,
-                company_name TEXT NOT NULL,
-                dart_report TEXT,
-                dart_result TEXT,
-                dart_error TEXT,
-                news_count INTEGER,
-                news_result TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status TEXT DEFAULT '완료',
-                is_bookmarked BOOLEAN DEFAULT FALSE,
-                is_delete_candidate BOOLEAN DEFAULT FALSE
-            )
-        ''')
-        
-        # 기존 테이블 대응: 컬럼 없으면 추가
-        try:
+        with self.cursor() as cursor:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS analysis_results (
+                    id SERIAL PRIMARY KEY,
+                    company_name TEXT NOT NULL,
+                    dart_report TEXT,
+                    dart_result TEXT,
+                    dart_error TEXT,
+                    news_count INTEGER,
+                    news_result TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    status TEXT DEFAULT '완료',
+                    is_bookmarked BOOLEAN DEFAULT FALSE,
+                    is_delete_candidate BOOLEAN DEFAULT FALSE
+                )
+            ''')
+            
+            # 기존 테이블 대응: 컬럼 없으면 추가
             cursor.execute('''
                 ALTER TABLE analysis_results 
                 ADD COLUMN IF NOT EXISTS is_bookmarked BOOLEAN DEFAULT FALSE
             ''')
-        except:
-            pass
-        try:
             cursor.execute('''
                 ALTER TABLE analysis_results 
                 ADD COLUMN IF NOT EXISTS is_delete_candidate BOOLEAN DEFAULT FALSE
             ''')
-        except:
-            pass
-        
-        # 인덱스 생성
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_company_name 
-            ON analysis_results(company_name)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_created_at 
-            ON analysis_results(created_at DESC)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_bookmarked 
-            ON analysis_results(is_bookmarked)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_delete_candidate 
-            ON analysis_results(is_delete_candidate)
-        ''')
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+            
+            # 전문 검색: 종목명(A) > 뉴스 요약(B) > 공시 요약(C) 가중치 tsvector
+            cursor.execute('''
+                ALTER TABLE analysis_results 
+                ADD COLUMN IF NOT EXISTS search_tsv tsvector GENERATED ALWAYS AS (
+                    setweight(to_tsvector('simple', coalesce(company_name, '')), 'A') ||
+                    setweight(to_tsvector('simple', coalesce(news_result, '')), 'B') ||
+                    setweight(to_tsvector('simple', coalesce(dart_result, '')), 'C')
+                ) STORED
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_search_tsv 
+                ON analysis_results USING gin (search_tsv)
+            ''')
+            # 종목명 부분 일치(LIKE '%kw%')용 trigram 인덱스 — 확장 설치 권한이 없으면 생략
+            cursor.execute('SAVEPOINT trgm')
+            try:
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_company_name_trgm 
+                    ON analysis_results USING gin (company_name gin_trgm_ops)
+                ''')
+                cursor.execute('RELEASE SAVEPOINT trgm')
+                self.has_trgm = True
+            except psycopg2.Error:
+                cursor.execute('ROLLBACK TO SAVEPOINT trgm')
+                self.has_trgm = False
+            
+            # 수집 기사 (URL 단위 1행) + 종목-기사 수집 이력 + 분석 결과별 근거 기사
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS articles (
+                    url TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    pub_date TIMESTAMP,
+                    body TEXT,
+                    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS company_articles (
+                    company_name TEXT NOT NULL,
+                    url TEXT NOT NULL REFERENCES articles(url) ON DELETE CASCADE,
+                    pub_date TIMESTAMP,
+                    PRIMARY KEY (company_name, url)
+                )
+            ''')
+            # 같은 기사가 여러 분석의 근거가 될 수 있음 (증분 수집은 이전 기사를 매번 다시 포함)
+            cursor.execute("SELECT to_regclass('analysis_articles') IS NULL")
+            new_link_table = cursor.fetchone()[0]
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS analysis_articles (
+                    analysis_id INTEGER NOT NULL REFERENCES analysis_results(id) ON DELETE CASCADE,
+                    url TEXT NOT NULL REFERENCES articles(url) ON DELETE CASCADE,
+                    pub_date TIMESTAMP,
+                    PRIMARY KEY (analysis_id, url)
+                )
+            ''')
+            if new_link_table:
+                # 이전 스키마(company_articles.analysis_id)의 연결 이관 — 마지막 분석에 남아 있던 것만 복구 가능
+                cursor.execute('''
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'company_articles' AND column_name = 'analysis_id'
+                ''')
+                if cursor.fetchone():
+                    cursor.execute('''
+                        INSERT INTO analysis_articles (analysis_id, url, pub_date)
+                        SELECT analysis_id, url, pub_date FROM company_articles WHERE analysis_id IS NOT NULL
+                        ON CONFLICT DO NOTHING
+                    ''')
+            
+            # 분석 작업 큐 (worker.py가 가져가 처리)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS analysis_jobs (
+                    id SERIAL PRIMARY KEY,
+                    company_name TEXT NOT NULL,
+                    stock_code TEXT,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    analysis_id INTEGER REFERENCES analysis_results(id) ON DELETE SET NULL,
+                    worker_id TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP,
+                    heartbeat_at TIMESTAMP,
+                    finished_at TIMESTAMP
+                )
+            ''')
+            
+            # 인덱스 생성
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_company_articles_pub 
+                ON company_articles(company_name, pub_date DESC)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_company_name 
+                ON analysis_results(company_name)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_created_at 
+                ON analysis_results(created_at DESC)
+            ''')
+            # 목록 키셋 페이지네이션 (created_at, id)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_created_id 
+                ON analysis_results(created_at DESC, id DESC)
+            ''')
+            # 대기 작업 조회 + 같은 종목 중복 등록 방지
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_jobs_queued 
+                ON analysis_jobs(id) WHERE status = 'queued'
+            ''')
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active 
+                ON analysis_jobs(company_name) WHERE status IN ('queued', 'running')
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_bookmarked 
+                ON analysis_results(is_bookmarked)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_delete_candidate 
+                ON analysis_results(is_delete_candidate)
+            ''')
     
     def add_result(self, company_name: str, dart_report: str, dart_result: str, 
-                   dart_error: str, news_count: int, news_result: str):
-        """분석 결과 추가"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO analysis_results 
-            (company_name, dart_report, dart_result, dart_error, news_count, news_result)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        ''', (company_name, dart_report, dart_result, dart_error, news_count, news_result))
+                   dart_error: str, news_count: int, news_result: str,
+                   articles: List[Dict] = None) -> int:
+        """분석 결과 추가 (+ 근거 기사 저장) — 새 결과 id 반환"""
+        with self.cursor() as cursor:
+            cursor.execute('''
+                INSERT INTO analysis_results 
+                (company_name, dart_report, dart_result, dart_error, news_count, news_result)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                RETURNING id
+            ''', (company_name, dart_report, dart_result, dart_error, news_count, news_result))
+            analysis_id = cursor.fetchone()[0]
+            if articles:
+                self._save_articles(cursor, company_name, analysis_id, articles)
+        
+        return analysis_id
+    
+    def _save_articles(self, cursor, company_name: str, analysis_id: int, articles: List[Dict]):
+        """기사 / 종목 수집 이력 / 분석 근거 일괄 upsert (execute_values — 행마다 왕복하지 않음)"""
+        # 같은 문장에서 같은 키를 두 번 갱신할 수 없으므로 URL 중복 제거
+        by_url = {a['link']: a for a in articles if a.get('link')}
+        execute_values(cursor, '''
+            INSERT INTO articles (url, title, pub_date, body) VALUES %s
+            ON CONFLICT (url) DO UPDATE SET
+                title = EXCLUDED.title, pub_date = EXCLUDED.pub_date,
+                body = EXCLUDED.body, fetched_at = CURRENT_TIMESTAMP
+            WHERE articles.body IS DISTINCT FROM EXCLUDED.body
+        ''', [(url, a['title'], a.get('pub_date'), a.get('body')) for url, a in by_url.items()], page_size=500)
+        execute_values(cursor, '''
+            INSERT INTO company_articles (company_name, url, pub_date) VALUES %s
+            ON CONFLICT (company_name, url) DO NOTHING
+        ''', [(company_name, url, a.get('pub_date')) for url, a in by_url.items()], page_size=500)
+        execute_values(cursor, '''
+            INSERT INTO analysis_articles (analysis_id, url, pub_date) VALUES %s
+            ON CONFLICT (analysis_id, url) DO NOTHING
+        ''', [(analysis_id, url, a.get('pub_date')) for url, a in by_url.items()], page_size=500)
+    
+    def get_company_articles(self, company_name: str, since: datetime = None, limit: int = 200,
+                             with_body: bool = False) -> List[Dict]:
+        """종목의 과거 수집 기사 (최신순)"""
+        columns = 'a.url, a.title, ca.pub_date' + (', a.body' if with_body else '')
+        sql = f'''
+            SELECT {columns} FROM company_articles ca JOIN articles a ON a.url = ca.url
+            WHERE ca.company_name = %s
+        '''
+        params = [company_name]
+        if since:
+            sql += ' AND ca.pub_date >= %s'
+            params.append(since)
+        sql += ' ORDER BY ca.pub_date DESC LIMIT %s'
+        params.append(limit)
+        
+        with self.cursor(dict_rows=True) as cursor:
+            cursor.execute(sql, params)
+            results = cursor.fetchall()
         
-        conn.commit()
-        cursor.close()
-        conn.close()
-    
-    def get_all_results(self, limit: int = 100, offset: int = 0) -> List[Dict]:
-        """전체 결과 조회 (최신순)"""
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        return [dict(row) for row in results]
+    
+    def get_analysis_articles(self, analysis_id: int) -> List[Dict]:
+        """분석 결과 1건의 근거 기사 (본문 제외, 최신순)"""
+        with self.cursor(dict_rows=True) as cursor:
+            cursor.execute('''
+                SELECT a.url, a.title, aa.pub_date FROM analysis_articles aa JOIN articles a ON a.url = aa.url
+                WHERE aa.analysis_id = %s
+                ORDER BY aa.pub_date DESC
+            ''', (analysis_id,))
+            results = cursor.fetchall()
         
-        cursor.execute('''
-            SELECT * FROM analysis_results 
-            ORDER BY created_at DESC 
-            LIMIT %s OFFSET %s
-        ''', (limit, offset))
+        return [dict(row) for row in results]
+    
+    def get_results_page(self, limit: int = 50, after: Optional[Dict] = None) -> List[Dict]:
+        """목록 한 페이지 (요약 컬럼만, 최신순)
+
+        after: 직전 페이지 마지막 행 — (created_at, id) 키셋으로 이어서 조회 (OFFSET 없음)
+        """
+        params = []
+        sql = f'SELECT {SUMMARY_COLUMNS} FROM analysis_results'
+        if after:
+            sql += ' WHERE (created_at, id) < (%s, %s)'
+            params += [after['created_at'], after['id']]
+        sql += ' ORDER BY created_at DESC, id DESC LIMIT %s'
+        params.append(limit)
+        
+        with self.cursor(dict_rows=True) as cursor:
+            cursor.execute(sql, params)
+            results = cursor.fetchall()
         
-        results = cursor.fetchall()
+        return [dict(row) for row in results]
+    
+    def search(self, keyword: str, limit: int = 50, offset: int = 0) -> Tuple[List[Dict], int]:
+        """종목명 + 뉴스/공시 요약 전문 검색 (관련도순) — (페이지 행, 전체 건수)
+
+        - 단어는 모두 포함(AND), 단어별 접두 일치
+        - 행마다 snippet: 일치 부분을 HIGHLIGHT_START/STOP으로 감싼 요약 발췌
+        - 종목명 부분 일치(pg_trgm 사용 가능 시)도 결과에 포함하고 가장 높게 정렬
+        """
+        terms = tsquery_terms(keyword)
+        if not terms:
+            return [], 0
+        match, name_score = 'search_tsv @@ q.query', '0'
+        if self.has_trgm:
+            match += ' OR company_name ILIKE %(name)s'
+            name_score = 'CASE WHEN company_name ILIKE %(name)s THEN 1 ELSE 0 END'
+        # 발췌(ts_headline)는 비싸므로 현재 페이지 행에만 계산
+        sql = f'''
+            WITH q AS (SELECT to_tsquery('simple', %(terms)s) AS query)
+            SELECT r.*, ts_headline('simple', coalesce(r.news_result, '') || ' ' || coalesce(r.dart_result, ''),
+                                    q.query, %(headline)s) AS snippet
+            FROM (
+                SELECT {SUMMARY_COLUMNS}, news_result, dart_result,
+                       ts_rank_cd(search_tsv, q.query) + {name_score} AS rank,
+                       COUNT(*) OVER () AS total
+                FROM analysis_results, q
+                WHERE {match}
+                ORDER BY rank DESC, created_at DESC, id DESC
+                LIMIT %(limit)s OFFSET %(offset)s
+            ) r, q
+            ORDER BY r.rank DESC, r.created_at DESC, r.id DESC
+        '''
+        params = {'terms': terms, 'name': like_pattern(keyword.strip()), 'headline': HEADLINE_OPTIONS,
+                  'limit': limit, 'offset': offset}
+        
+        with self.cursor(dict_rows=True) as cursor:
+            cursor.execute(sql, params)
+            results = cursor.fetchall()
+        
+        rows = []
+        total = 0
+        for row in results:
+            row = dict(row)
+            total = row.pop('total')
+            row.pop('news_result')
+            row.pop('dart_result')
+            rows.append(row)
+        if not rows and offset:
+            total = self.count_search(keyword)
+        return rows, total
+    
+    def count_search(self, keyword: str) -> int:
+        """search()와 같은 조건의 전체 건수"""
+        terms = tsquery_terms(keyword)
+        if not terms:
+            return 0
+        sql = "SELECT COUNT(*) FROM analysis_results WHERE search_tsv @@ to_tsquery('simple', %s)"
+        params = [terms]
+        if self.has_trgm:
+            sql += ' OR company_name ILIKE %s'
+            params.append(like_pattern(keyword.strip()))
+        with self.cursor() as cursor:
+            cursor.execute(sql, params)
+            count = cursor.fetchone()[0]
         
-        cursor.close()
-        conn.close()
+        return count
+    
+    def get_result(self, result_id: int) -> Optional[Dict]:
+        """결과 1건 (본문 포함)"""
+        with self.cursor(dict_rows=True) as cursor:
+            cursor.execute(f'SELECT {RESULT_COLUMNS} FROM analysis_results WHERE id = %s', (result_id,))
+            row = cursor.fetchone()
         
-        return [dict(row) for row in results]
+        return dict(row) if row else None
     
     def get_bookmarked_results(self) -> List[Dict]:
         """북마크된 결과만 조회"""
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cursor.execute('''
-            SELECT * FROM analysis_results 
-            WHERE is_bookmarked = TRUE
-            ORDER BY created_at DESC
-        ''')
-        
-        results = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with self.cursor(dict_rows=True) as cursor:
+            cursor.execute(f'''
+                SELECT {RESULT_COLUMNS} FROM analysis_results 
+                WHERE is_bookmarked = TRUE
+                ORDER BY created_at DESC
+            ''')
+            results = cursor.fetchall()
         
         return [dict(row) for row in results]
     
     def toggle_bookmark(self, result_id: int):
         """북마크 토글"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE analysis_results 
-            SET is_bookmarked = NOT is_bookmarked 
-            WHERE id = %s
-        ''', (result_id,))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with self.cursor() as cursor:
+            cursor.execute('''
+                UPDATE analysis_results 
+                SET is_bookmarked = NOT is_bookmarked 
+                WHERE id = %s
+            ''', (result_id,))
     
     def toggle_delete_candidate(self, result_id: int):
         """삭제대상 토글"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE analysis_results 
-            SET is_delete_candidate = NOT is_delete_candidate 
-            WHERE id = %s
-        ''', (result_id,))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with self.cursor() as cursor:
+            cursor.execute('''
+                UPDATE analysis_results 
+                SET is_delete_candidate = NOT is_delete_candidate 
+                WHERE id = %s
+            ''', (result_id,))
     
     def get_delete_candidates(self) -> List[Dict]:
         """삭제대상 결과만 조회"""
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cursor.execute('''
-            SELECT * FROM analysis_results 
-            WHERE is_delete_candidate = TRUE
-            ORDER BY created_at DESC
-        ''')
-        
-        results = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        with self.cursor(dict_rows=True) as cursor:
+            cursor.execute(f'''
+                SELECT {RESULT_COLUMNS} FROM analysis_results 
+                WHERE is_delete_candidate = TRUE
+                ORDER BY created_at DESC
+            ''')
+            results = cursor.fetchall()
         
         return [dict(row) for row in results]
     
     def bulk_delete_candidates(self):
         """삭제대상 일괄 삭제"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM analysis_results WHERE is_delete_candidate = TRUE')
-        deleted = cursor.rowcount
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with self.cursor() as cursor:
+            cursor.execute('DELETE FROM analysis_results WHERE is_delete_candidate = TRUE')
+            deleted = cursor.rowcount
         
         return deleted
     
-    def search_results(self, keyword: str) -> List[Dict]:
-        """종목명 검색"""
-        conn = self.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cursor.execute('''
-            SELECT * FROM analysis_results 
-            WHERE company_name LIKE %s
-            ORDER BY created_at DESC
-        ''', (f'%{keyword}%',))
-        
-        results = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
-        return [dict(row) for row in results]
-    
     def delete_result(self, result_id: int):
         """결과 삭제"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM analysis_results WHERE id = %s', (result_id,))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with self.cursor() as cursor:
+            cursor.execute('DELETE FROM analysis_results WHERE id = %s', (result_id,))
     
     def get_count(self) -> int:
         """전체 결과 개수"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM analysis_results')
-        count = cursor.fetchone()[0]
-        
-        cursor.close()
-        conn.close()
+        with self.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM analysis_results')
+            count = cursor.fetchone()[0]
         
         return count
     
     def get_analyzed_companies(self) -> List[str]:
         """분석 완료된 종목명 목록"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.cursor() as cursor:
+            cursor.execute('SELECT DISTINCT company_name FROM analysis_results')
+            companies = [row[0] for row in cursor.fetchall()]
+        
+        return companies
+    
+    @contextmanager
+    def stream(self, sql: str, params=None, itersize: int = 2000):
+        """서버측(named) 커서 — 순회하면 itersize행씩 나눠 받음 (결과 전체를 메모리에 올리지 않음)"""
+        with self.connection() as conn:
+            cursor = conn.cursor(name=f'stream_{uuid.uuid4().hex}')
+            cursor.itersize = itersize
+            try:
+                cursor.execute(sql, params)
+                yield cursor
+            finally:
+                cursor.close()
+    
+    # ──── 분석 작업 큐 ────
+    
+    def enqueue_jobs(self, companies: List[str], code_map: Dict[str, str] = None) -> int:
+        """분석 작업 등록 — 이미 대기/실행 중인 종목은 건너뜀, 등록된 수 반환"""
+        code_map = code_map or {}
+        rows = [(name, code_map.get(name)) for name in dict.fromkeys(companies)]
+        if not rows:
+            return 0
+        with self.cursor() as cursor:
+            inserted = execute_values(cursor, '''
+                INSERT INTO analysis_jobs (company_name, stock_code) VALUES %s
+                ON CONFLICT (company_name) WHERE status IN ('queued', 'running') DO NOTHING
+                RETURNING id
+            ''', rows, fetch=True)
+        
+        return len(inserted)
+    
+    def claim_jobs(self, worker_id: str, limit: int) -> List[Dict]:
+        """대기 작업을 최대 limit개 가져와 running으로 표시 (SKIP LOCKED — 워커 여러 개 동시 실행 가능)"""
+        with self.cursor(dict_rows=True) as cursor:
+            cursor.execute('''
+                UPDATE analysis_jobs SET status = 'running', worker_id = %s, attempts = attempts + 1,
+                    started_at = CURRENT_TIMESTAMP, heartbeat_at = CURRENT_TIMESTAMP, error = NULL
+                WHERE id IN (
+                    SELECT id FROM analysis_jobs WHERE status = 'queued'
+                    ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, company_name, stock_code, attempts
+            ''', (worker_id, limit))
+            results = cursor.fetchall()
+        
+        return sorted((dict(row) for row in results), key=lambda r: r['id'])
+    
+    def heartbeat_jobs(self, job_ids: List[int]):
+        """실행 중 작업의 생존 신호 갱신"""
+        if not job_ids:
+            return
+        with self.cursor() as cursor:
+            cursor.execute('''
+                UPDATE analysis_jobs SET heartbeat_at = CURRENT_TIMESTAMP
+                WHERE id = ANY(%s) AND status = 'running'
+            ''', (list(job_ids),))
+    
+    def finish_job(self, job_id: int, ok: bool, error: str = '', analysis_id: int = None):
+        """작업 완료/실패 기록"""
+        with self.cursor() as cursor:
+            cursor.execute('''
+                UPDATE analysis_jobs SET status = %s, error = %s, analysis_id = %s,
+                    finished_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            ''', ('done' if ok else 'failed', error or None, analysis_id, job_id))
+    
+    def release_jobs(self, job_ids: List[int]):
+        """워커 종료 시 끝내지 못한 작업을 다시 대기열로 (시도 횟수 원복)"""
+        if not job_ids:
+            return
+        with self.cursor() as cursor:
+            cursor.execute('''
+                UPDATE analysis_jobs SET status = 'queued', worker_id = NULL, attempts = GREATEST(attempts - 1, 0)
+                WHERE id = ANY(%s) AND status = 'running'
+            ''', (list(job_ids),))
+    
+    def requeue_stale_jobs(self, stale_after: float, max_attempts: int) -> int:
+        """생존 신호가 stale_after초 넘게 끊긴 작업(워커 비정상 종료) 재등록 — 재시도 한도 초과 시 failed"""
+        with self.cursor() as cursor:
+            cursor.execute('''
+                UPDATE analysis_jobs SET
+                    status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'queued' END,
+                    error = CASE WHEN attempts >= %s THEN '워커 응답 없음 (재시도 한도 초과)' ELSE error END,
+                    finished_at = CASE WHEN attempts >= %s THEN CURRENT_TIMESTAMP ELSE finished_at END,
+                    worker_id = NULL
+                WHERE status = 'running' AND heartbeat_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+            ''', (max_attempts, max_attempts, max_attempts, stale_after))
+            count = cursor.rowcount
         
-        cursor.execute('SELECT DISTINCT company_name FROM analysis_results')
-        companies = [row[0] for row in cursor.fetchall()]
+        return count
+    
+    def get_jobs(self, limit: int = 100) -> List[Dict]:
+        """최근 작업 목록 (대기/실행 중 먼저, 최신순)"""
+        with self.cursor(dict_rows=True) as cursor:
+            cursor.execute('''
+                SELECT id, company_name, status, attempts, error, analysis_id, worker_id,
+                       created_at, started_at, heartbeat_at, finished_at
+                FROM analysis_jobs
+                ORDER BY status IN ('queued', 'running') DESC, id DESC
+                LIMIT %s
+            ''', (limit,))
+            results = cursor.fetchall()
         
-        cursor.close()
-        conn.close()
+        return [dict(row) for row in results]
+    
+    def job_counts(self) -> Dict[str, int]:
+        """상태별 작업 수"""
+        with self.cursor() as cursor:
+            cursor.execute('SELECT status, COUNT(*) FROM analysis_jobs GROUP BY status')
+            counts = dict(cursor.fetchall())
         
-        return companies
+        return counts
     
-    def to_dataframe(self) -> pd.DataFrame:
-        """DataFrame 변환 (엑셀 다운로드용)"""
-        conn = self.get_connection()
-        df = pd.read_sql_query('SELECT * FROM analysis_results ORDER BY created_at DESC', conn)
-        conn.close()
-        return df
+    def clear_finished_jobs(self) -> int:
+        """완료/실패 작업 기록 삭제"""
+        with self.cursor() as cursor:
+            cursor.execute("DELETE FROM analysis_jobs WHERE status IN ('done', 'failed')")
+            deleted = cursor.rowcount
+        
+        return deleted
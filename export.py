@@ -0,0 +1,151 @@
+# export.py
+"""분석 결과 내보내기 (Excel/CSV)
+
+- 서버측 커서로 나눠 읽어 파일에 바로 기록 — 행 수와 무관하게 메모리 사용 일정
+- Excel은 openpyxl write-only 모드 (행을 메모리에 쌓지 않고 시트 XML로 바로 기록)
+- 요청할 때만 생성, 대상 행 구성(서명)이 같으면 이전에 만든 파일 재사용
+
+사용법:
+    python export.py --scope all --format csv -o results.csv
+"""
+import argparse
+import csv
+import glob
+import hashlib
+import os
+import sys
+import tempfile
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from cache import DEFAULT_CACHE_DIR
+from database import Database, RESULT_COLUMNS
+
+# 출력 형식을 바꾸면 올릴 것 — 이전 캐시 파일은 더 이상 사용되지 않음
+EXPORT_VERSION = 1
+EXCEL_MAX_CELL = 32767  # Excel 셀 최대 글자 수
+
+FORMATS: Dict[str, str] = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+}
+
+
+class ExportSpec(NamedTuple):
+    header: Tuple[str, ...]
+    select: str
+    where: str
+    order: str
+    signature: str  # 캐시 키 — 행마다 내보내는 값 중 바뀔 수 있는 것 (분석 결과 본문은 수정되지 않음)
+
+
+# 결과 행: id + 보관/삭제대상 표시 (둘 다 내보내는 열)
+RESULT_SIGNATURE = "id::text || ':' || COALESCE(is_bookmarked, FALSE)::int || COALESCE(is_delete_candidate, FALSE)::int"
+
+EXPORTS: Dict[str, ExportSpec] = {
+    'all': ExportSpec(tuple(c.strip() for c in RESULT_COLUMNS.split(',')), RESULT_COLUMNS,
+                      'TRUE', 'created_at DESC, id DESC', RESULT_SIGNATURE),
+    'bookmarked': ExportSpec(tuple(c.strip() for c in RESULT_COLUMNS.split(',')), RESULT_COLUMNS,
+                             'is_bookmarked = TRUE', 'created_at DESC, id DESC', RESULT_SIGNATURE),
+    # 삭제대상 탭: 기업명만 — 보관 표시를 바꿔도 파일은 그대로
+    'delete_candidates': ExportSpec(('기업명',), 'DISTINCT company_name',
+                                    'is_delete_candidate = TRUE', 'company_name', 'company_name'),
+}
+
+
+def export_signature(db: Database, scope: str) -> str:
+    """범위(scope)가 내보내는 값(spec.signature) 구성의 해시 — 그 값이 바뀔 때만 달라짐"""
+    spec = EXPORTS[scope]
+    with db.cursor() as cursor:
+        cursor.execute(f'''
+            SELECT COUNT(DISTINCT {spec.signature}),
+                   COALESCE(md5(string_agg(DISTINCT {spec.signature}, ',' ORDER BY {spec.signature})), '')
+            FROM analysis_results WHERE {spec.where}
+        ''')
+        count, digest = cursor.fetchone()
+    return hashlib.sha256(f"{EXPORT_VERSION}:{scope}:{count}:{digest}".encode()).hexdigest()[:16]
+
+
+def export_path(cache_dir: str, scope: str, fmt: str, signature: str) -> str:
+    return os.path.join(cache_dir, 'exports', f"{scope}-{signature}.{fmt}")
+
+
+def write_xlsx(path: str, header: Iterable[str], rows: Iterable[tuple]):
+    # openpyxl은 Excel 파일을 만들 때만 로드
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    def cell(value):
+        if isinstance(value, str):
+            # 제어문자는 xlsx에 기록할 수 없음
+            return ILLEGAL_CHARACTERS_RE.sub('', value)[:EXCEL_MAX_CELL]
+        return value
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(header))
+    for row in rows:
+        ws.append([cell(v) for v in row])
+    wb.save(path)
+
+
+def write_csv(path: str, header: Iterable[str], rows: Iterable[tuple]):
+    # utf-8-sig: Excel에서 바로 열어도 한글이 깨지지 않음
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(header))
+        writer.writerows(rows)
+
+
+WRITERS = {'xlsx': write_xlsx, 'csv': write_csv}
+
+
+def write_export(db: Database, scope: str, fmt: str, path: str, chunk_size: int = 2000) -> str:
+    """scope 행을 스트리밍으로 읽어 path에 기록 (임시 파일에 쓴 뒤 교체 — 중간 실패 시 기존 파일 유지)"""
+    spec = EXPORTS[scope]
+    sql = f'SELECT {spec.select} FROM analysis_results WHERE {spec.where} ORDER BY {spec.order}'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.export-', suffix=f'.{fmt}', dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        with db.stream(sql, itersize=chunk_size) as cursor:
+            WRITERS[fmt](tmp, spec.header, cursor)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return path
+
+
+def cached_export(db: Database, scope: str, fmt: str = 'xlsx', cache_dir: str = DEFAULT_CACHE_DIR,
+                  signature: Optional[str] = None) -> str:
+    """내보내기 파일 경로 — 같은 서명의 파일이 있으면 그대로, 없으면 생성 후 이전 파일 정리"""
+    signature = signature or export_signature(db, scope)
+    path = export_path(cache_dir, scope, fmt, signature)
+    if not os.path.exists(path):
+        write_export(db, scope, fmt, path)
+        for old in glob.glob(export_path(cache_dir, scope, fmt, '*')):
+            if old != path:
+                os.remove(old)
+    return path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="분석 결과 내보내기")
+    parser.add_argument('--scope', choices=sorted(EXPORTS), default='all')
+    parser.add_argument('--format', choices=sorted(FORMATS), default='xlsx')
+    parser.add_argument('-o', '--output', default=None, help="출력 파일 (기본: results-<scope>.<format>)")
+    parser.add_argument('--chunk-size', type=int, default=2000, help="서버측 커서에서 한 번에 받을 행 수")
+    args = parser.parse_args(argv)
+
+    db = Database(os.environ.get('DATABASE_URL'))
+    try:
+        path = write_export(db, args.scope, args.format,
+                            args.output or f"results-{args.scope}.{args.format}", args.chunk_size)
+    finally:
+        db.close()
+    print(f"{path} ({os.path.getsize(path) / 1024:.0f} KB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
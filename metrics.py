@@ -0,0 +1,282 @@
+# metrics.py
+"""파이프라인 계측 — 단계별 소요 시간 / 카운터 / 히스토그램
+
+- 프로세스 전역 REGISTRY (스레드 안전) — timer(), observe(), inc()
+- trace(): 블록 안(여기서 만든 태스크/스레드 포함)에서 기록된 값을 종목별로도 합산 — 느린 종목이 어디서 시간을 썼는지
+- 내보내기: snapshot() (JSON), to_prometheus() (텍스트 포맷), start_http_server() (/metrics, /metrics.json)
+- 로그: configure_logging(json_format=True)면 한 줄에 JSON 1개 (log()의 키워드 인자가 필드로 들어감)
+"""
+import contextvars
+import datetime
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger('stock_analyzer')
+
+PREFIX = 'stock_analyzer_'
+# 히스토그램 버킷 상한 (초)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# 백분위는 최근 N개 표본 기준
+RESERVOIR_SIZE = 2048
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, object]) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, value: float):
+        i = 0
+        while i < len(BUCKETS) and value > BUCKETS[i]:
+            i += 1
+        self.buckets[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def summary(self) -> Dict[str, float]:
+        return {'count': self.count, 'sum': round(self.sum, 4), 'max': round(self.max, 4),
+                'p50': round(self.percentile(0.5), 4), 'p95': round(self.percentile(0.95), 4),
+                'p99': round(self.percentile(0.99), 4)}
+
+
+class Trace:
+    """종목 1건 동안의 단계별 시간 합계 / 카운터"""
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add_time(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self.timings.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def add_count(self, name: str, value: float):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self) -> Dict:
+        """{'timings': {단계: {'seconds', 'calls'}}, 'counters': {...}} — 동시 실행 구간은 시간이 겹쳐 합산됨"""
+        with self._lock:
+            return {'timings': {stage: {'seconds': round(total, 3), 'calls': calls}
+                                for stage, (total, calls) in sorted(self.timings.items(), key=lambda kv: -kv[1][0])},
+                    'counters': dict(self.counters)}
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('metrics_trace', default=None)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[LabelKey, float] = {}
+        self.histograms: Dict[LabelKey, Histogram] = {}
+        self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        tr = _current_trace.get()
+        if tr is not None:
+            tr.add_count(_format_key(key), value)
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(value)
+
+    def observe_stage(self, stage: str, seconds: float):
+        self.observe('stage_seconds', seconds, stage=stage)
+        tr = _current_trace.get()
+        if tr is not None:
+            tr.add_time(stage, seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - started)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = {_format_key(k): v for k, v in sorted(self.counters.items())}
+            histograms = {_format_key(k): h.summary() for k, h in sorted(self.histograms.items())}
+        return {'uptime': round(time.time() - self.started_at, 1), 'counters': counters, 'histograms': histograms}
+
+    def stage_summary(self) -> Dict[str, Dict[str, float]]:
+        """단계별 {'count', 'sum', 'max', 'p50', 'p95', 'p99'} — 총 소요 시간 큰 순"""
+        with self._lock:
+            rows = [(dict(labels).get('stage', ''), h.summary()) for (name, labels), h in self.histograms.items()
+                    if name == 'stage_seconds']
+        return dict(sorted(rows, key=lambda r: -r[1]['sum']))
+
+    def counter_values(self, name: str, label: str) -> Dict[str, float]:
+        """카운터 name의 label 값별 합계 (예: counter_values('articles_filtered_total', 'reason'))"""
+        out: Dict[str, float] = {}
+        with self._lock:
+            for (key_name, labels), value in self.counters.items():
+                if key_name == name:
+                    value_label = dict(labels).get(label, '')
+                    out[value_label] = out.get(value_label, 0) + value
+        return out
+
+    def stage_table(self) -> str:
+        """단계별 소요 시간 요약 (사람이 읽는 표)"""
+        rows = self.stage_summary()
+        if not rows:
+            return ''
+        lines = [f"{'stage':<16}{'calls':>8}{'p50':>9}{'p95':>9}{'max':>9}{'total':>10}"]
+        for stage, s in rows.items():
+            lines.append(f"{stage:<16}{s['count']:>8}{s['p50']:>9.3f}{s['p95']:>9.3f}{s['max']:>9.3f}{s['sum']:>10.2f}")
+        return '\n'.join(lines)
+
+    def to_prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식"""
+        out = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((k, (list(h.buckets), h.count, h.sum)) for k, h in self.histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                out.append(f"# TYPE {PREFIX}{name} counter")
+            out.append(f"{PREFIX}{name}{_prom_labels(labels)} {value}")
+        for (name, labels), (buckets, count, total) in histograms:
+            if name not in typed:
+                typed.add(name)
+                out.append(f"# TYPE {PREFIX}{name} histogram")
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (float('inf'),), buckets):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                out.append(f"{PREFIX}{name}_bucket{_prom_labels(labels + (('le', le),))} {cumulative}")
+            out.append(f"{PREFIX}{name}_sum{_prom_labels(labels)} {total}")
+            out.append(f"{PREFIX}{name}_count{_prom_labels(labels)} {count}")
+        return '\n'.join(out) + '\n'
+
+
+def _format_key(key: LabelKey) -> str:
+    name, labels = key
+    return name + ('{' + ','.join(f"{k}={v}" for k, v in labels) + '}' if labels else '')
+
+
+def _prom_labels(labels) -> str:
+    if not labels:
+        return ''
+    esc = lambda v: v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{esc(v)}"' for k, v in labels) + '}'
+
+
+REGISTRY = Registry()
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+
+
+@contextmanager
+def trace() -> Iterator[Trace]:
+    """이 블록의 단계별 시간/카운터를 따로 모음 (asyncio 태스크·to_thread는 컨텍스트를 복사하므로 함께 집계)"""
+    tr = Trace()
+    token = _current_trace.set(tr)
+    try:
+        yield tr
+    finally:
+        _current_trace.reset(token)
+
+
+# ═══════════════════════════════════════════
+# 로그
+# ═══════════════════════════════════════════
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {'ts': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+                'level': record.levelname, 'logger': record.name, 'msg': record.getMessage()}
+        data.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def configure_logging(json_format: bool = False, level: int = logging.INFO):
+    """stock_analyzer.* 로거 출력 설정 (CLI/워커용)"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if json_format
+                         else logging.Formatter('[%(asctime)s] %(message)s', '%Y-%m-%d %H:%M:%S'))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def log(message: str, level: int = logging.INFO, **fields):
+    """사람이 읽는 메시지 + (JSON 로그일 때) 구조화 필드"""
+    logger.log(level, message, extra={'fields': fields})
+
+
+# ═══════════════════════════════════════════
+# HTTP 노출
+# ═══════════════════════════════════════════
+def start_http_server(port: int, host: str = '0.0.0.0', registry: Optional[Registry] = None):
+    """백그라운드 스레드에서 /metrics (Prometheus) · /metrics.json 제공 — ThreadingHTTPServer 반환"""
+    # http.server는 포트를 열 때만 로드 (가져오기 시간 절약)
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    registry = registry or REGISTRY
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            if path == '/metrics':
+                body, ctype = registry.to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+            elif path == '/metrics.json':
+                body, ctype = json.dumps(registry.snapshot(), ensure_ascii=False).encode('utf-8'), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', ctype)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # 스크레이프마다 접근 로그를 남기지 않음
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
@@ -0,0 +1,255 @@
+# pipeline.py
+"""종목 분석 파이프라인 (DART + 뉴스 + GPT 요약 → DB 저장)
+
+Streamlit 없이도 사용 가능 — 여러 종목을 하나의 이벤트 루프에서 동시에 분석한다.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11 — 환경변수만 사용
+    tomllib = None
+
+import metrics
+from analyzer import Config, RegexCache, HTTPClient, ParseStage, get_dart_processor, run_news_pipeline
+from cache import ResponseCache, get_response_cache
+from database import Database
+
+logger = logging.getLogger('stock_analyzer.pipeline')
+
+GPT_MODEL = "gpt-4o-mini"
+GPT_TEMPERATURE = 0.1
+# 프롬프트 템플릿을 수정하면 올릴 것 — 이전 버전으로 캐시된 응답은 더 이상 사용되지 않음
+PROMPT_VERSION = "1"
+
+SECRET_KEYS = ('NAVER_CLIENT_ID', 'NAVER_CLIENT_SECRET', 'DART_API_KEY', 'OPENAI_API_KEY', 'DATABASE_URL')
+
+
+# ═══════════════════════════════════════════
+# 설정 (Streamlit 밖에서 실행할 때)
+# ═══════════════════════════════════════════
+def load_secrets(path: str = os.path.join('.streamlit', 'secrets.toml')) -> Dict[str, str]:
+    """Streamlit secrets.toml + 환경변수 (환경변수 우선)"""
+    secrets = {}
+    if tomllib and os.path.exists(path):
+        with open(path, 'rb') as f:
+            secrets.update(tomllib.load(f))
+    for key in SECRET_KEYS:
+        if os.environ.get(key):
+            secrets[key] = os.environ[key]
+    return secrets
+
+
+def config_from_secrets(secrets: Dict[str, str]) -> Config:
+    return Config(
+        CLIENT_ID=secrets.get("NAVER_CLIENT_ID"),
+        CLIENT_SECRET=secrets.get("NAVER_CLIENT_SECRET"),
+        DART_API_KEY=secrets.get("DART_API_KEY"),
+        OPENAI_API_KEY=secrets.get("OPENAI_API_KEY")
+    )
+
+
+# ═══════════════════════════════════════════
+# GPT 프롬프트
+# ═══════════════════════════════════════════
+def build_news_prompt(company_name: str, articles: list) -> str:
+    context = "".join(f"[{a['pub_date'].strftime('%Y.%m.%d')}] {a['title']}\n" for a in articles)
+    return f"""당신은 주식 시장의 '모멘텀 전문 분석가'입니다. 
+        [작성 규칙]
+        1. "{company_name}"의 기업 가치(Valuation) 리레이팅을 유발할 수 있는 모든 모멘텀을 적을 것
+        ※ 모멘텀 :  '매출', '수출', '수주', '계약', '신제품', "양산", '캐파', 'M&A'
+        2. 반드시 "{company_name}" 회사와 직접 관련된 내용만 작성하며, 창작이 아닌 기사 속 내용만으로 작성할 것
+        3. 중복된 기사는 하나로 합치고, 구체적인 "숫자"나 "시기", "국가", "계약 상대방" 등이 언급된 경우 반드시 넣어주기 바랍니다.
+        4. 산업 전반의 동향, 다른 회사의 사례, 일반적인 시장 분석은 절대 포함하지 마십시오.
+        5. 문체: 개조식, 명사형 종결(~음, ~임, ~함), 인사말 및 미사여구 없는 핵심 내용만 작성할 것
+        
+        [출력 포맷]
+        1️⃣ 모멘텀 제목 (yyyy.mm.dd.)
+        - {company_name}의 모멘텀 관련 핵심 내용 요약
+        
+        2️⃣ 모멘텀 제목 (yyyy.mm.dd.)
+        - {company_name}의 모멘텀 관련 핵심 내용 요약
+
+{context}"""
+
+
+def build_dart_prompt(company_name: str, dart_text: str) -> str:
+    return f"""당신은 주식 시장의 '모멘텀 전문 분석가'입니다.
+        
+        [작성 규칙]
+        1. "{company_name}"의 기업 가치(Valuation) 리레이팅을 유발할 수 있는 모든 모멘텀을 적을 것
+        2. 신사업 진출, 신규 고객 확보, 증설, M&A, 퀄테스트 통과, 벤더 등록, 수출 지역 다변화 등 구체적인 근거를 포함할 것
+        3. 현황을 적는 것이 아닌, 기업 가치를 레벨업 시키는 핵심 성과 및 미래 기대감을 적을 것
+        4. 반드시 주어진 자료 내의 내용만으로 작성하며, 외부 지식을 가져오거나 없는 내용을 추론하지 말 것
+        5. 문체: 개조식, 명사형 종결(~음, ~임, ~함), 인사말 및 미사여구 없는 핵심 내용만 작성할 것
+        
+        [출력 포맷]
+        - 모멘텀 내용 1
+        
+        - 모멘텀 내용 2
+        
+        - 모멘텀 내용 3
+
+{dart_text[:30000]}"""
+
+
+# ═══════════════════════════════════════════
+# 분석 엔진
+# ═══════════════════════════════════════════
+class AnalysisEngine:
+    """여러 종목을 동시에 분석 (네이버/기사/DART/OpenAI 별도 동시성 제한)
+
+    사용법:
+        async with AnalysisEngine(config, regex_cache, db) as engine:
+            async for event in engine.run_batch(names, code_map):
+                ...
+    """
+    def __init__(self, config: Config, regex_cache: RegexCache, db: Database,
+                 gpt_cache: Optional[ResponseCache] = None):
+        self.config = config
+        self.regex_cache = regex_cache
+        self.db = db
+        if gpt_cache is None and config.USE_GPT_CACHE:
+            gpt_cache = get_response_cache(config.CACHE_DIR, config.GPT_CACHE_TTL)
+        self.gpt_cache = gpt_cache
+        self.openai_client = None
+        self.http = None
+        self.parse_stage = None
+        self._stack = None
+
+    async def __aenter__(self):
+        # 세마포어/클라이언트는 현재 이벤트 루프에 묶이므로 실행마다 새로 생성
+        from openai import AsyncOpenAI  # 무거운 SDK는 실제 실행 시에만 로드
+        c = self.config
+        # 중간 단계에서 실패해도 이미 연 자원은 역순으로 정리
+        async with AsyncExitStack() as stack:
+            self.openai_client = AsyncOpenAI(api_key=c.OPENAI_API_KEY)
+            stack.push_async_callback(self._close_openai)
+            self.naver_sem = asyncio.Semaphore(c.NAVER_CONCURRENCY)
+            self.article_sem = asyncio.Semaphore(c.MAX_CONCURRENT)
+            self.dart_sem = asyncio.Semaphore(c.DART_CONCURRENCY)
+            self.openai_sem = asyncio.Semaphore(c.OPENAI_CONCURRENCY)
+            # 기사 본문과 DART 하위문서가 같은 커넥션 풀을 사용
+            self.http = await stack.enter_async_context(HTTPClient(c))
+            stack.callback(setattr, self, 'http', None)
+            # 기사 파싱/필터는 워커 풀에서 — 배치 실행 동안 1번만 띄움
+            self.parse_stage = ParseStage(c, self.regex_cache)
+            stack.push_async_callback(self._close_parse_stage)
+            self._stack = stack.pop_all()
+        return self
+
+    async def __aexit__(self, *args):
+        stack, self._stack = self._stack, None
+        if stack:
+            await stack.__aexit__(*args)
+
+    async def _close_openai(self):
+        client, self.openai_client = self.openai_client, None
+        await client.close()
+
+    async def _close_parse_stage(self):
+        stage, self.parse_stage = self.parse_stage, None
+        await asyncio.to_thread(stage.close)
+
+    async def _chat(self, prompt: str) -> str:
+        """동일 입력(모델 + 프롬프트 버전 + 프롬프트)이면 캐시된 응답 반환, 오류 응답은 캐시하지 않음"""
+        key = ResponseCache.make_key(f"{GPT_MODEL}@{GPT_TEMPERATURE}", PROMPT_VERSION, prompt)
+        if self.gpt_cache:
+            cached = await asyncio.to_thread(self.gpt_cache.get, key)
+            if cached is not None:
+                metrics.inc('gpt_cache_total', result='hit')
+                return cached
+            metrics.inc('gpt_cache_total', result='miss')
+
+        async with self.openai_sem:
+            try:
+                with metrics.timer('openai'):
+                    res = await self.openai_client.chat.completions.create(
+                        model=GPT_MODEL, messages=[{"role": "user", "content": prompt}], temperature=GPT_TEMPERATURE)
+                content = res.choices[0].message.content
+                metrics.inc('openai_requests_total', result='ok')
+                usage = getattr(res, 'usage', None)
+                if usage is not None:
+                    metrics.inc('openai_tokens_total', usage.prompt_tokens or 0, kind='prompt')
+                    metrics.inc('openai_tokens_total', usage.completion_tokens or 0, kind='completion')
+            except Exception as e:
+                metrics.inc('openai_requests_total', result=type(e).__name__)
+                logger.warning("OpenAI 호출 실패: %s: %s", type(e).__name__, e)
+                return f"Err: {e}"
+
+        if self.gpt_cache and content:
+            await asyncio.to_thread(self.gpt_cache.put, key, GPT_MODEL, PROMPT_VERSION, content)
+        return content
+
+    async def analyze_news_with_gpt(self, company_name: str, articles: list) -> str:
+        if not articles: return "-"
+        articles.sort(key=lambda x: x['pub_date'], reverse=True)
+        return await self._chat(build_news_prompt(company_name, articles))
+
+    async def analyze_dart_with_gpt(self, company_name: str, report_nm: str, dart_text: str) -> str:
+        if not dart_text or len(dart_text) < 100: return "-"
+        return await self._chat(build_dart_prompt(company_name, dart_text))
+
+    async def _dart_stage(self, company_name: str, stock_code: Optional[str]) -> Tuple[str, str, str]:
+        async with self.dart_sem:
+            with metrics.timer('dart'):
+                dart = await asyncio.to_thread(get_dart_processor, self.config.DART_API_KEY)
+                r_nm, d_txt, d_err = await dart.process_async(self.http, company_name, stock_code)
+        d_res = await self.analyze_dart_with_gpt(company_name, r_nm, d_txt) if d_txt else "-"
+        return r_nm, d_res, d_err
+
+    async def _news_stage(self, company_name: str) -> Tuple[List[Dict], str]:
+        with metrics.timer('news'):
+            arts, _ = await run_news_pipeline(company_name, self.config, self.regex_cache,
+                                              semaphore=self.article_sem, naver_semaphore=self.naver_sem,
+                                              client=self.http, stage=self.parse_stage)
+        n_res = await self.analyze_news_with_gpt(company_name, arts)
+        return arts, n_res
+
+    async def analyze_company(self, company_name: str, stock_code: str = None) -> Dict:
+        """종목 1개 분석 후 DB 저장 — DART와 뉴스 단계는 동시에 진행
+
+        event['trace']: 이 종목의 단계별 소요 시간/요청 수 (metrics.Trace.as_dict)
+        """
+        started = time.perf_counter()
+        event = {'company': company_name, 'ok': False, 'error': '', 'news_count': 0}
+        with metrics.trace() as tr:
+            try:
+                (r_nm, d_res, d_err), (arts, n_res) = await asyncio.gather(
+                    self._dart_stage(company_name, stock_code), self._news_stage(company_name))
+                # 근거 기사(URL/날짜/본문)도 함께 저장
+                with metrics.timer('db_write'):
+                    analysis_id = await asyncio.to_thread(
+                        self.db.add_result, company_name=company_name, dart_report=r_nm or "-", dart_result=d_res,
+                        dart_error=d_err or "", news_count=len(arts), news_result=n_res, articles=arts)
+                event.update(ok=True, news_count=len(arts), analysis_id=analysis_id)
+            except Exception as e:
+                event['error'] = f"{type(e).__name__}: {e}"
+                logger.warning("%s 분석 실패: %s", company_name, event['error'], exc_info=True)
+            event['elapsed'] = time.perf_counter() - started
+            metrics.REGISTRY.observe_stage('company', event['elapsed'])
+            metrics.inc('companies_total', result='ok' if event['ok'] else 'error')
+        event['trace'] = tr.as_dict()
+        return event
+
+    async def run_batch(self, companies: List[str], code_map: Dict[str, str] = None) -> AsyncIterator[Dict]:
+        """종목 목록을 BATCH_CONCURRENCY 만큼 동시에 분석하고, 끝나는 순서대로 이벤트 반환"""
+        code_map = code_map or {}
+        batch_sem = asyncio.Semaphore(self.config.BATCH_CONCURRENCY)
+
+        async def run_one(name):
+            async with batch_sem:
+                return await self.analyze_company(name, code_map.get(name))
+
+        tasks = [asyncio.create_task(run_one(name)) for name in companies]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                yield await fut
+        finally:
+            for t in tasks:
+                t.cancel()
@@ -0,0 +1,30 @@
+"""clean_body_final 골든 테스트 — tests/golden/clean_body/<이름>.input.txt → <이름>.expected.txt
+
+expected는 기존(정규식 순차 적용) 구현의 출력 — 정제 규칙을 의도적으로 바꾸면 expected도 함께 갱신하고
+analyzer.PARSER_VERSION을 올릴 것
+"""
+import glob
+import os
+
+import pytest
+
+from analyzer import clean_body_final
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), 'golden', 'clean_body')
+CASES = sorted(glob.glob(os.path.join(GOLDEN_DIR, '*.input.txt')))
+
+
+def _read(path: str) -> str:
+    # 개행(CRLF 포함)을 그대로 읽음
+    with open(path, encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def test_cases_present():
+    assert CASES
+
+
+@pytest.mark.parametrize('input_path', CASES, ids=lambda p: os.path.basename(p)[:-len('.input.txt')])
+def test_clean_body_final_golden(input_path):
+    expected = _read(input_path[:-len('.input.txt')] + '.expected.txt')
+    assert clean_body_final(_read(input_path)) == expected
@@ -0,0 +1,102 @@
+# universe.py
+"""종목 유니버스 (종목명 목록 / 종목명→종목코드 / 종목명 매처)
+
+krx_stocks.csv를 읽어 RegexCache 오토마톤까지 만든 결과를 CACHE_DIR에 pickle로 저장하고,
+CSV 내용(sha256)이 같으면 다음 실행부터는 파일만 읽는다 (Streamlit 재시작 / 워커 기동 시 재빌드 없음).
+"""
+import csv
+import gc
+import hashlib
+import logging
+import os
+import pickle
+from typing import Dict, List, Optional, Tuple
+
+from analyzer import RegexCache
+from cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger('stock_analyzer.universe')
+
+
+class CompanyUniverse:
+    # 저장 형식이나 RegexCache 내부 구조를 바꾸면 올릴 것 — 이전 파일은 무시하고 다시 빌드
+    VERSION = 1
+    FILENAME = 'company_universe.pkl'
+
+    def __init__(self, companies: List[str], code_map: Dict[str, str], regex_cache: RegexCache, csv_hash: str):
+        self.companies = companies
+        self.code_map = code_map
+        self.regex_cache = regex_cache
+        self.csv_hash = csv_hash
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    @staticmethod
+    def read_csv(path: str) -> Tuple[List[str], Dict[str, str]]:
+        """종목명 목록, 종목명→종목코드 (cp949 → utf-8 순서로 시도)"""
+        for enc in ('cp949', 'utf-8'):
+            try:
+                with open(path, encoding=enc, newline='') as f:
+                    rows = list(csv.DictReader(f))
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            raise ValueError(f"{path}: 지원하지 않는 인코딩")
+
+        companies, code_map = [], {}
+        for row in rows:
+            name = (row.get('종목명') or '').strip()
+            if not name:
+                continue
+            companies.append(name)
+            code_map.setdefault(name, (row.get('종목코드') or '').strip())
+        return companies, code_map
+
+    @classmethod
+    def build(cls, path: str, csv_hash: str = None) -> 'CompanyUniverse':
+        companies, code_map = cls.read_csv(path)
+        return cls(companies, code_map, RegexCache(companies), csv_hash or cls.hash_file(path))
+
+    @classmethod
+    def load_or_build(cls, path: str = 'krx_stocks.csv', cache_dir: str = DEFAULT_CACHE_DIR) -> 'CompanyUniverse':
+        artifact = os.path.join(cache_dir, cls.FILENAME)
+        csv_hash = cls.hash_file(path)
+        try:
+            with open(artifact, 'rb') as f:
+                # 작은 dict 수천 개를 만드는 동안 GC가 반복 실행되지 않도록 (로드 시간 약 절반)
+                gc.disable()
+                try:
+                    version, universe = pickle.load(f)
+                finally:
+                    gc.enable()
+            if version == cls.VERSION and universe.csv_hash == csv_hash:
+                return universe
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug("종목 유니버스 캐시를 읽지 못함 — 다시 생성: %s: %s", type(e).__name__, e)
+
+        universe = cls.build(path, csv_hash)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{artifact}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                pickle.dump((cls.VERSION, universe), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, artifact)
+        except Exception as e:
+            logger.warning("종목 유니버스 캐시 저장 실패: %s: %s", type(e).__name__, e)
+        return universe
+
+
+def load_company_universe(path: str = 'krx_stocks.csv', cache_dir: str = DEFAULT_CACHE_DIR
+                          ) -> Tuple[List[str], Optional[RegexCache], Dict[str, str]]:
+    """(종목명 목록, RegexCache, 종목명→종목코드) — CSV를 읽을 수 없으면 빈 목록"""
+    try:
+        universe = CompanyUniverse.load_or_build(path, cache_dir)
+    except (OSError, ValueError, csv.Error):
+        return [], None, {}
+    return universe.companies, universe.regex_cache, universe.code_map
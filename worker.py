@@ -0,0 +1,179 @@
+# worker.py
+"""분석 작업 큐 워커 — Streamlit과 별도 프로세스로 실행
+
+사용법:
+    python worker.py                    # BATCH_CONCURRENCY 만큼 동시 처리, 계속 대기
+    python worker.py --concurrency 4
+    python worker.py --once             # 대기열이 빌 때까지 처리 후 종료
+    python worker.py --json-logs --metrics-port 9108   # JSON 로그 + Prometheus /metrics
+
+app.py는 analysis_jobs 테이블에 작업을 등록만 하고, 이 워커가 가져가 분석한다.
+- 워커 여러 개를 동시에 띄워도 같은 작업을 중복 처리하지 않음 (FOR UPDATE SKIP LOCKED)
+- 실행 중 작업은 주기적으로 생존 신호를 남김 — 워커가 죽으면 JOB_STALE_AFTER초 뒤 다시 대기열로
+- Ctrl+C / SIGTERM: 새 작업은 가져오지 않고 진행 중인 작업을 마친 뒤 종료 (두 번 누르면 즉시 중단, 작업은 대기열로 반환)
+
+설정: 환경변수 > .streamlit/secrets.toml (pipeline.load_secrets)
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import sys
+from typing import Dict, List
+
+import metrics
+from analyzer import Config
+from database import Database
+from metrics import log
+from pipeline import AnalysisEngine, config_from_secrets, load_secrets
+from universe import load_company_universe
+
+
+class JobWorker:
+    """analysis_jobs 대기열을 폴링하며 최대 concurrency개 종목을 동시에 분석"""
+
+    def __init__(self, engine: AnalysisEngine, db: Database, config: Config, concurrency: int,
+                 worker_id: str = None):
+        self.engine = engine
+        self.db = db
+        self.config = config
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = asyncio.Event()
+        self.running: Dict[asyncio.Task, Dict] = {}
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.config.JOB_HEARTBEAT_INTERVAL)
+            try:
+                await asyncio.to_thread(self.db.heartbeat_jobs, [job['id'] for job in self.running.values()])
+            except Exception as e:
+                log(f"생존 신호 실패: {type(e).__name__}: {e}", logging.WARNING)
+
+    async def _claim(self) -> List[Dict]:
+        c = self.config
+        requeued = await asyncio.to_thread(self.db.requeue_stale_jobs, c.JOB_STALE_AFTER, c.JOB_MAX_ATTEMPTS)
+        if requeued:
+            log(f"응답 없는 작업 {requeued}건 재등록", logging.WARNING, event='jobs_requeued', count=requeued)
+        free = self.concurrency - len(self.running)
+        if free <= 0:
+            return []
+        jobs = await asyncio.to_thread(self.db.claim_jobs, self.worker_id, free)
+        for job in jobs:
+            task = asyncio.create_task(self.engine.analyze_company(job['company_name'], job['stock_code']))
+            self.running[task] = job
+            log(f"시작 #{job['id']} {job['company_name']}" + (f" (시도 {job['attempts']})" if job['attempts'] > 1 else ""),
+                event='job_started', job_id=job['id'], company=job['company_name'], attempts=job['attempts'])
+        return jobs
+
+    async def _finish(self, task: asyncio.Task):
+        job = self.running.pop(task)
+        event = task.result()
+        await asyncio.to_thread(self.db.finish_job, job['id'], event['ok'], event['error'], event.get('analysis_id'))
+        metrics.inc('jobs_total', result='ok' if event['ok'] else 'error')
+        fields = dict(event=('job_done' if event['ok'] else 'job_failed'), job_id=job['id'],
+                      company=job['company_name'], elapsed=round(event['elapsed'], 3), news_count=event['news_count'],
+                      error=event['error'], trace=event.get('trace'))
+        if event['ok']:
+            log(f"완료 #{job['id']} {job['company_name']} — 기사 {event['news_count']}건, {event['elapsed']:.0f}s", **fields)
+        else:
+            log(f"실패 #{job['id']} {job['company_name']} — {event['error']}", logging.WARNING, **fields)
+
+    async def run(self, once: bool = False):
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while self.running or not self.stopping.is_set():
+                jobs = []
+                if not self.stopping.is_set():
+                    try:
+                        jobs = await self._claim()
+                    except Exception as e:
+                        # DB 일시 장애 — 다음 폴링에서 재시도
+                        log(f"작업 조회 실패: {type(e).__name__}: {e}", logging.WARNING)
+                if once and not jobs and not self.running:
+                    break
+                stop_wait = asyncio.create_task(self.stopping.wait())
+                done, _ = await asyncio.wait([stop_wait, *self.running], timeout=self.config.JOB_POLL_INTERVAL,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                stop_wait.cancel()
+                for task in done:
+                    if task in self.running:
+                        try:
+                            await self._finish(task)
+                        except Exception as e:
+                            # 결과 기록 실패 — 생존 신호가 끊기면 다른 워커가 다시 처리
+                            log(f"결과 기록 실패: {type(e).__name__}: {e}", logging.ERROR)
+        finally:
+            heartbeat.cancel()
+            if self.running:
+                # 강제 중단 — 끝내지 못한 작업은 바로 대기열로 반환
+                tasks = list(self.running)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                ids = [job['id'] for job in self.running.values()]
+                self.running.clear()
+                await asyncio.to_thread(self.db.release_jobs, ids)
+                log(f"미완료 작업 {len(ids)}건 대기열로 반환")
+
+
+async def run_worker(config: Config, db: Database, concurrency: int, once: bool = False):
+    companies, regex_cache, _ = load_company_universe('krx_stocks.csv', config.CACHE_DIR)
+    if regex_cache is None:
+        raise RuntimeError("krx_stocks.csv를 읽을 수 없습니다.")
+
+    async with AnalysisEngine(config, regex_cache, db) as engine:
+        worker = JobWorker(engine, db, config, concurrency)
+        main_task = asyncio.current_task()
+
+        def on_signal():
+            if worker.stopping.is_set():
+                main_task.cancel()
+            else:
+                log("종료 요청 — 진행 중인 작업을 마친 뒤 종료 (한 번 더 누르면 즉시 중단)")
+                worker.stopping.set()
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, on_signal)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows — Ctrl+C는 즉시 중단으로 처리
+
+        log(f"워커 시작 {worker.worker_id} — 종목 {len(companies)}개, 동시 {worker.concurrency}건")
+        await worker.run(once)
+        log("워커 종료")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="stock-analyzer 분석 작업 워커")
+    parser.add_argument('--concurrency', type=int, default=None, help="동시 분석 종목 수 (기본: BATCH_CONCURRENCY)")
+    parser.add_argument('--poll', type=float, default=None, help="대기열 확인 간격(초)")
+    parser.add_argument('--once', action='store_true', help="대기열이 비면 종료")
+    parser.add_argument('--json-logs', action='store_true', help="로그를 한 줄에 JSON 1개로 출력")
+    parser.add_argument('--metrics-port', type=int, default=None, help="이 포트에서 /metrics (Prometheus) 제공")
+    args = parser.parse_args(argv)
+    metrics.configure_logging(args.json_logs)
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+
+    secrets = load_secrets()
+    config = config_from_secrets(secrets)
+    if args.poll:
+        config.JOB_POLL_INTERVAL = args.poll
+    concurrency = args.concurrency or config.BATCH_CONCURRENCY
+    # 동시 분석 수만큼 DB 연결이 필요할 수 있음 (+ 폴링/생존 신호)
+    db = Database(secrets.get("DATABASE_URL"), maxconn=max(10, concurrency + 2))
+    try:
+        asyncio.run(run_worker(config, db, concurrency, args.once))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())